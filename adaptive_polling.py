@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Adaptive Poll Scheduler
+Replaces the hardcoded poll sleeps in the monitors. Tightens the interval
+while users are waiting for an OTP or OTPs are arriving, and backs off
+exponentially when idle or when the panel errors.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptivePollScheduler:
+    """Computes the next poll delay from demand, arrivals and errors"""
+
+    def __init__(self, min_interval: float = 0.3, hot_interval: float = 1.0,
+                 idle_interval: float = 3.0, max_interval: float = 30.0,
+                 error_max_interval: float = 60.0, backoff_factor: float = 1.5,
+                 arrival_window: float = 120.0, number_bot=None):
+        # Floor used while OTPs are actively arriving
+        self.min_interval = min_interval
+
+        # Used while at least one user waits for an OTP
+        self.hot_interval = hot_interval
+
+        # Starting point of the idle back-off and its ceiling
+        self.idle_interval = idle_interval
+        self.max_interval = max_interval
+
+        # Ceiling for error back-off
+        self.error_max_interval = error_max_interval
+        self.backoff_factor = backoff_factor
+
+        # Recent OTP arrival timestamps (monotonic) for the arrival rate
+        self.arrival_window = arrival_window
+        self.arrivals = deque()
+
+        # Source of "numbers waiting for OTP" (TelegramNumberBot.user_sessions)
+        self.number_bot = number_bot
+
+        # State
+        self.current_interval = idle_interval
+        self.idle_polls = 0
+        self.consecutive_errors = 0
+        self.total_polls = 0
+        self.last_poll_at: Optional[float] = None
+
+    def waiting_numbers(self) -> int:
+        """How many assigned numbers are still waiting for an OTP"""
+        if not self.number_bot:
+            return 0
+        try:
+            sessions = list(self.number_bot.user_sessions.values())
+        except Exception:
+            return 0
+        return sum(1 for session in sessions if session.get('waiting_for_otp'))
+
+    def arrival_rate(self) -> float:
+        """OTPs per minute over the arrival window"""
+        self._trim_arrivals(time.monotonic())
+        return len(self.arrivals) * 60.0 / self.arrival_window
+
+    def _trim_arrivals(self, now: float):
+        while self.arrivals and now - self.arrivals[0] > self.arrival_window:
+            self.arrivals.popleft()
+
+    def record_success(self, new_otps: int = 0):
+        """Record a completed poll and how many new OTPs it produced"""
+        now = time.monotonic()
+        self.total_polls += 1
+        self.last_poll_at = now
+        self.consecutive_errors = 0
+
+        if new_otps > 0:
+            self.arrivals.extend([now] * new_otps)
+            self.idle_polls = 0
+        else:
+            self.idle_polls += 1
+
+        self._trim_arrivals(now)
+        self.current_interval = self._compute_interval(new_otps)
+
+    def record_error(self):
+        """Record a failed poll - exponential back-off"""
+        self.total_polls += 1
+        self.consecutive_errors += 1
+        base = max(self.current_interval, self.hot_interval)
+        self.current_interval = min(self.error_max_interval, base * self.backoff_factor)
+
+    def _compute_interval(self, new_otps: int) -> float:
+        """Pick the next interval for a successful poll"""
+        waiting = self.waiting_numbers()
+
+        # OTPs just arrived - stay at the floor to catch follow-up messages
+        if new_otps > 0:
+            return self.min_interval
+
+        # Users waiting: poll hot, tighter still if arrivals are recent
+        if waiting > 0:
+            if self.arrivals:
+                return self.min_interval
+            return self.hot_interval
+
+        # Idle: exponential back-off from the idle interval up to the ceiling
+        interval = self.idle_interval * (self.backoff_factor ** max(0, self.idle_polls - 1))
+        return min(self.max_interval, interval)
+
+    def wake(self):
+        """Drop to the hot interval right away, e.g. when a number was just assigned
+
+        Only cuts an idle back-off - while the panel is failing the error back-off stands.
+        """
+        self.idle_polls = 0
+        if self.consecutive_errors:
+            return
+        self.current_interval = min(self.current_interval, self.hot_interval)
+
+    async def sleep(self):
+        """Sleep for the current interval, waking early if demand appears"""
+        deadline = time.monotonic() + self.current_interval
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            # Re-check demand at most every hot_interval so a newly assigned
+            # number does not wait out a long idle back-off (error back-off is kept)
+            if (self.current_interval > self.hot_interval and self.consecutive_errors == 0
+                    and self.waiting_numbers() > 0):
+                self.wake()
+                deadline = min(deadline, time.monotonic() + self.current_interval)
+                continue
+            await asyncio.sleep(min(remaining, self.hot_interval))
+
+    def get_metrics(self) -> dict:
+        """Current scheduler state for logging/health"""
+        return {
+            'poll_interval': round(self.current_interval, 3),
+            'poll_rate_per_min': round(60.0 / self.current_interval, 1) if self.current_interval else 0.0,
+            'otp_arrival_rate_per_min': round(self.arrival_rate(), 2),
+            'waiting_numbers': self.waiting_numbers(),
+            'idle_polls': self.idle_polls,
+            'consecutive_errors': self.consecutive_errors,
+            'total_polls': self.total_polls,
+        }
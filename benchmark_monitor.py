@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Monitor Benchmark
+Runs a monitor against the local mock panel and reports OTP throughput and
+detection latency (row injected on the panel → OTP handed to delivery).
+
+- requests  SimpleRequestsOTPBot (the production monitor) through its own run() loop
+- browser   OTPTelegramBot's Playwright scrape path (needs playwright + chromium)
+
+Nothing leaves the machine: channel posts and user notifications go to an
+in-process sink instead of Telegram.
+
+    python benchmark_monitor.py --monitor requests --duration 30 --rate 5 --waiting-numbers 200
+    python benchmark_monitor.py --rate 20 --latency-ms 150 --session-ttl 20 --error-rate 0.02 --json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from mock_panel import MockPanel
+from panel_accounts import PanelAccount
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class DeliverySink:
+    """Stands in for the number bot / channel; records when each panel row was delivered"""
+
+    def __init__(self, panel: MockPanel, waiting_numbers: int = 0):
+        self.panel = panel
+        self.detected: Dict[tuple, float] = {}
+        self.latencies_ms: List[float] = []
+        self.duplicates = 0
+        self.channel_posts = 0
+
+        # Users "waiting for OTP" make the requests monitor use targeted queries
+        self.user_sessions = {
+            index: {'number': number, 'waiting_for_otp': True, 'country': range_name}
+            for index, (range_name, number) in enumerate(panel.numbers[:waiting_numbers])
+        }
+
+    def record(self, number: str, message: str):
+        key = (number, message)
+        injected_at = self.panel.injected_at.get(key)
+        if key in self.detected:
+            self.duplicates += 1
+            return
+        self.detected[key] = time.time()
+        if injected_at is not None:
+            self.latencies_ms.append((self.detected[key] - injected_at) * 1000)
+
+    async def notify_user_otp(self, number: str, otp_code: str, service: str, full_message: str):
+        self.record(number, full_message)
+
+    def post_to_channel(self, message: str) -> bool:
+        self.channel_posts += 1
+        return True
+
+    def report(self, duration: float, injected: int) -> dict:
+        detected = len(self.latencies_ms)
+        return {
+            'duration_s': round(duration, 1),
+            'injected': injected,
+            'detected': detected,
+            'missed': max(0, injected - detected),
+            'duplicates': self.duplicates,
+            'channel_posts': self.channel_posts,
+            'otp_per_s': round(detected / duration, 2) if duration else 0.0,
+            'latency_p50_ms': _round(percentile(self.latencies_ms, 50)),
+            'latency_p99_ms': _round(percentile(self.latencies_ms, 99)),
+            'latency_max_ms': _round(max(self.latencies_ms) if self.latencies_ms else None),
+        }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 1) if value is not None else None
+
+
+async def run_requests_monitor(panel: MockPanel, sink: DeliverySink):
+    """Production monitor, unmodified apart from where it delivers - runs until cancelled"""
+    from simple_requests_otp_bot import SimpleRequestsOTPBot
+
+    account = PanelAccount('benchmark', panel.base_url, panel.username, panel.password)
+    bot = SimpleRequestsOTPBot(account=account, number_bot=sink)
+    bot.post_to_channel = sink.post_to_channel
+
+    await bot.run()
+
+
+async def run_browser_monitor(panel: MockPanel, sink: DeliverySink):
+    """OTPTelegramBot's scrape loop: navigate → read table → extract, with its adaptive cadence - runs until cancelled"""
+    os.environ.setdefault('BOT_TOKEN', '0:benchmark')
+    import otp_telegram_bot
+    from panel_login import PanelLoginFlow
+
+    # No Supabase-backed number bot - the sink receives every extracted OTP
+    otp_telegram_bot.NUMBER_BOT_AVAILABLE = False
+    bot = otp_telegram_bot.OTPTelegramBot()
+    account = PanelAccount('benchmark', panel.base_url, panel.username, panel.password)
+    bot.login_url, bot.sms_url = account.login_url, account.sms_url
+    bot.login_flow = PanelLoginFlow(account.login_url, account.username, account.password)
+
+    if not await bot.setup_browser():
+        raise RuntimeError("Playwright browser could not be started")
+    try:
+        if not await bot.login_to_website():
+            raise RuntimeError("Login to mock panel failed")
+
+        while True:
+            rows = await bot.check_for_new_messages()
+            new_otps = 0
+            for row in rows:
+                if bot.extract_sms_data(row):
+                    before = len(sink.detected)
+                    sink.record(row[2], row[4])
+                    new_otps += len(sink.detected) - before
+            bot.poll_scheduler.record_success(new_otps)
+            await bot.poll_scheduler.sleep()
+    finally:
+        if bot.browser:
+            await bot.browser.close()
+        if bot.playwright:
+            await bot.playwright.stop()
+
+
+MONITORS = {
+    'requests': run_requests_monitor,
+    'browser': run_browser_monitor,
+}
+
+
+async def run_benchmark(monitor: str = 'requests', duration: float = 30.0, warmup: float = 2.0,
+                        grace: float = 5.0, waiting_numbers: int = 0, **panel_options) -> dict:
+    """Start a mock panel, run one monitor against it, return the report"""
+    # Keep the benchmark's high-water mark away from the real one
+    state_dir = tempfile.mkdtemp(prefix='otp-bench-')
+    os.environ['PANEL_STATE_FILE'] = os.path.join(state_dir, 'panel_state.json')
+
+    panel = MockPanel(**panel_options).start()
+    sink = DeliverySink(panel, waiting_numbers=waiting_numbers)
+    rate = panel.rate
+    monitor_task = None
+    try:
+        # Login and first poll happen during warm-up; arrivals start afterwards
+        panel.rate = 0
+        monitor_task = asyncio.create_task(MONITORS[monitor](panel, sink))
+        await asyncio.sleep(warmup)
+        injected_before = len(panel.injected_at)
+        panel.rate = rate
+        started = time.monotonic()
+        await asyncio.sleep(duration)
+        panel.rate = 0
+        injected = len(panel.injected_at) - injected_before
+        elapsed = time.monotonic() - started
+
+        # Give the monitor a moment to pick up the last arrivals
+        await asyncio.sleep(grace)
+        if monitor_task.done():
+            # Surface a monitor that died (e.g. no browser) instead of reporting zero OTPs
+            monitor_task.result()
+    finally:
+        if monitor_task is not None:
+            monitor_task.cancel()
+            await asyncio.gather(monitor_task, return_exceptions=True)
+        panel.stop()
+
+    report = sink.report(elapsed, injected)
+    report.update(monitor=monitor, panel=panel.get_stats())
+    return report
+
+
+def print_report(report: dict):
+    print(f"\n📊 Monitor benchmark ({report['monitor']})")
+    print(f"   Duration:        {report['duration_s']}s")
+    print(f"   Injected OTPs:   {report['injected']}")
+    print(f"   Detected OTPs:   {report['detected']} (missed {report['missed']}, duplicates {report['duplicates']})")
+    print(f"   Throughput:      {report['otp_per_s']} OTP/s")
+    print(f"   Latency p50:     {report['latency_p50_ms']} ms")
+    print(f"   Latency p99:     {report['latency_p99_ms']} ms")
+    print(f"   Latency max:     {report['latency_max_ms']} ms")
+    print(f"   Panel:           {report['panel']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OTP monitor throughput/latency benchmark against the mock panel")
+    parser.add_argument('--monitor', choices=sorted(MONITORS), default='requests')
+    parser.add_argument('--duration', type=float, default=30.0)
+    parser.add_argument('--warmup', type=float, default=2.0)
+    parser.add_argument('--rate', type=float, default=5.0, help="SMS arrivals per second")
+    parser.add_argument('--latency-ms', type=float, default=50.0, help="panel response latency")
+    parser.add_argument('--jitter-ms', type=float, default=20.0)
+    parser.add_argument('--session-ttl', type=float, default=0.0, help="panel session lifetime (0 = forever)")
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--waiting-numbers', type=int, default=0,
+                        help="numbers with a user waiting for OTP (enables targeted polling)")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    parser.add_argument('--verbose', action='store_true', help="show the monitor's own logs")
+    args = parser.parse_args()
+
+    # The monitors configure logging on import - pick the level before that
+    os.environ.setdefault('LOG_LEVEL', 'INFO' if args.verbose else 'WARNING')
+    os.environ.setdefault('TRACE_EXPORTER', 'none')
+    from log_setup import setup_logging
+    setup_logging()
+
+    result = asyncio.run(run_benchmark(
+        monitor=args.monitor, duration=args.duration, warmup=args.warmup, waiting_numbers=args.waiting_numbers,
+        rate=args.rate, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        session_ttl=args.session_ttl, error_rate=args.error_rate, seed=args.seed,
+    ))
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Query Budget Check
+Runs the user-facing flows of TelegramNumberBot against the in-memory
+Supabase (memory_supabase.py) and counts database round trips per flow.
+Each flow has a fixed budget, pinned to the exact round-trip count of the
+flow today; the check runs every flow at a small and a large data scale
+(users, OTP history, burned and assigned numbers) so a query issued per
+row - an N+1 loop - or any extra query at all blows the budget and exits
+non-zero.
+
+    python benchmark_queries.py                     # CI gate
+    python benchmark_queries.py --scales 10 2000 --latency-ms 20
+    python benchmark_queries.py --json
+
+Telegram calls go to the local fake Bot API (fake_telegram_api.py).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from fake_telegram_api import FakeTelegramAPI
+from fake_updates import FakeContext, FakeUpdate
+from memory_supabase import MemorySupabase
+
+# Round trips allowed per flow. These are exact regression pins (no margin): each
+# equals the flow's measured count, so even one added query fails the check and
+# has to be justified here - raise only with a reason, never to paper over a loop.
+# Fewer queries than the budget pass; lower the pin when a flow gets cheaper.
+QUERY_BUDGETS = {
+    'start': 1,             # approval check
+    'access_request': 6,    # approval, cooldown, pending list, insert request, reset cooldown
+    'get_number': 9,        # 2 approval checks, cooldown + assignment of a candidate batch, assign (4), save session
+    'change_number': 7,     # cooldown + assignment of a candidate batch, assign (4), save session
+    'status': 3,            # approval, stats row, recent OTPs
+    'otp_arrival': 3,       # history insert, cooldown replace (2)
+}
+
+ADMIN_ID = 1
+USER_ID = 1000
+NEW_USER_ID = 2000
+COUNTRIES = ('Benchland', 'Mockistan')
+
+
+def write_country_files(directory: str, pool_size: int) -> Dict[str, List[str]]:
+    """One XLSX per country, phone numbers in the first column"""
+    from openpyxl import Workbook
+
+    pools = {}
+    for index, country in enumerate(COUNTRIES):
+        numbers = [str(22790000000 + index * 10000000 + n) for n in range(pool_size)]
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(['Number'])
+        for number in numbers:
+            sheet.append([int(number)])
+        workbook.save(os.path.join(directory, f"{country}.xlsx"))
+        pools[country] = numbers
+    return pools
+
+
+def seed_database(db: MemorySupabase, pools: Dict[str, List[str]], scale: int):
+    """Background data that grows with scale; the flows' own query counts must not"""
+    now = datetime.now()
+    later = (now + timedelta(days=1)).isoformat()
+    country = COUNTRIES[0]
+    pool = pools[country]
+
+    db.seed('admin_settings', [{'setting_key': 'admin_user_id', 'setting_value': str(ADMIN_ID)}])
+    db.seed('approved_users', [{'user_id': USER_ID + n, 'is_active': True} for n in range(scale + 1)])
+    db.seed('user_sessions', [
+        {'user_id': USER_ID + n, 'country': country, 'number': pool[n], 'assigned_at': now.isoformat(),
+         'waiting_for_otp': False} for n in range(1, scale + 1)])
+    db.seed('otp_history', [
+        {'user_id': USER_ID + n % 5, 'number': pool[n % len(pool)], 'country': country, 'service': 'WhatsApp',
+         'otp_code': f"{n % 1000:03d}-{n % 997:03d}", 'message': 'code', 'received_at': now.isoformat()}
+        for n in range(scale)])
+    db.seed('user_otp_stats', [{'user_id': USER_ID, 'total_otps': scale, 'unique_services': 1,
+                                'unique_countries': 1, 'last_otp_at': now.isoformat(),
+                                'first_otp_at': now.isoformat()}])
+    # Half the pool burned by recent OTPs, a quarter held by other users
+    db.seed('otp_cooldown', [{'number': number, 'last_otp_at': now.isoformat(), 'cooldown_until': later}
+                             for number in pool[:scale]])
+    db.seed('number_assignments', [
+        {'user_id': USER_ID + 1 + n, 'number': number, 'country': country, 'assigned_at': now.isoformat(),
+         'expires_at': later, 'is_active': True} for n, number in enumerate(pool[scale:scale + scale // 2])])
+
+
+async def run_flows(bot, db: MemorySupabase) -> Dict[str, dict]:
+    """Each flow as a user would trigger it; returns queries and wall time per flow"""
+    country = COUNTRIES[0]
+    context = FakeContext()
+    results = {}
+
+    async def measure(name: str, *steps):
+        db.reset_counts()
+        started = time.perf_counter()
+        replies = []
+        for handler, update in steps:
+            await handler(update, context)
+            replies.extend(update.replies())
+        results[name] = {
+            'queries': db.query_count,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+            'by_table': db.get_stats()['by_table'],
+            'reply': replies[-1].strip().splitlines()[0] if replies else None,
+        }
+
+    await measure('start', (bot.start_command, FakeUpdate.text(USER_ID, "/start")))
+    await measure('access_request', (bot.start_command, FakeUpdate.text(NEW_USER_ID, "/start", username='newbie')))
+    await measure('get_number',
+                  (bot.handle_message, FakeUpdate.text(USER_ID, "📱 Get Number")),
+                  (bot.handle_callback_query, FakeUpdate.callback(USER_ID, f"country_{country}")))
+    await measure('change_number', (bot.handle_callback_query, FakeUpdate.callback(USER_ID, f"change_{country}")))
+    await measure('status', (bot.handle_message, FakeUpdate.text(USER_ID, "📊 My Status")))
+
+    db.reset_counts()
+    number = bot.user_sessions[USER_ID]['number']
+    started = time.perf_counter()
+    await bot.notify_user_otp(number, "123-456", "WhatsApp", f"Your WhatsApp code 123-456 for {number}")
+    results['otp_arrival'] = {
+        'queries': db.query_count,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+        'by_table': db.get_stats()['by_table'],
+        'reply': None,
+    }
+    return results
+
+
+async def run_scale(scale: int, latency_ms: float) -> Dict[str, dict]:
+    from telegram_number_bot import TelegramNumberBot
+
+    countries_dir = tempfile.mkdtemp(prefix='otp-queries-')
+    pools = write_country_files(countries_dir, pool_size=2 * scale + 50)
+    # Same 1000-row response cap as Supabase, so unpaged selects show up
+    db = MemorySupabase(latency_ms=latency_ms, max_rows=1000)
+    seed_database(db, pools, scale)
+
+    bot = TelegramNumberBot(supabase_client=db)
+    bot.countries_dir = countries_dir
+    bot.load_countries()
+    bot.load_number_states()
+    bot.load_user_sessions_from_db()
+    return await run_flows(bot, db)
+
+
+async def check(scales: List[int], latency_ms: float) -> dict:
+    # Assignment order is shuffled - keep runs comparable
+    random.seed(1)
+    api = FakeTelegramAPI(flood_limits=False).start()
+    os.environ['TELEGRAM_API_URL'] = api.base_url
+    try:
+        by_scale = {scale: await run_scale(scale, latency_ms) for scale in scales}
+    finally:
+        api.stop()
+
+    report = {'latency_ms': latency_ms, 'scales': scales, 'flows': {}, 'violations': []}
+    for flow, budget in QUERY_BUDGETS.items():
+        counts = {scale: by_scale[scale][flow]['queries'] for scale in scales}
+        report['flows'][flow] = {
+            'budget': budget,
+            'queries': counts,
+            'elapsed_ms': {scale: by_scale[scale][flow]['elapsed_ms'] for scale in scales},
+            'reply': by_scale[scales[-1]][flow]['reply'],
+        }
+        worst = max(counts.values())
+        if worst > budget:
+            report['violations'].append({
+                'flow': flow, 'budget': budget, 'queries': counts,
+                'by_table': by_scale[max(counts, key=counts.get)][flow]['by_table'],
+            })
+    return report
+
+
+def print_report(report: dict):
+    scales = report['scales']
+    print(f"\n📊 Query budgets (scales {scales}, {report['latency_ms']}ms per query)")
+    print(f"   {'flow':<16}{'budget':>7}  " + "".join(f"{'q@' + str(s):>9}{'ms@' + str(s):>10}" for s in scales))
+    for flow, row in report['flows'].items():
+        cells = "".join(f"{row['queries'][s]:>9}{row['elapsed_ms'][s]:>10}" for s in scales)
+        marker = '❌' if max(row['queries'].values()) > row['budget'] else '✅'
+        print(f"{marker} {flow:<16}{row['budget']:>7}  {cells}")
+    for violation in report['violations']:
+        print(f"\n❌ {violation['flow']}: {violation['queries']} queries, budget {violation['budget']}")
+        for table, count in violation['by_table'].items():
+            print(f"     {table}: {count}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Database round trips per user flow, checked against budgets")
+    parser.add_argument('--scales', type=int, nargs='+', default=[10, 500],
+                        help="background data sizes to run every flow at")
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="simulated per-query latency")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    os.environ.setdefault('BOT_TOKEN', '123456:benchmark')
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    os.environ.setdefault('TRACE_EXPORTER', 'none')
+    from log_setup import setup_logging
+    setup_logging()
+
+    result = asyncio.run(check(sorted(set(args.scales)), args.latency_ms))
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
+    sys.exit(1 if result['violations'] else 0)
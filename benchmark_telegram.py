@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Telegram Delivery Benchmark
+Drives the bots' outbound path (TelegramDelivery - shared bot, 429 handling)
+against the local fake Bot API and reports messages/s, queueing delay and
+flood-limit behaviour.
+
+- otp-burst  N OTPs land at once; each is a user notification handled by C
+             concurrent workers (pollers) plus a queued, paced channel post
+- broadcast  /broadcast to U users at the admin broadcast pace
+
+    python benchmark_telegram.py otp-burst --otps 2000 --concurrency 4
+    python benchmark_telegram.py broadcast --users 20000 --broadcast-rate 25 --blocked-rate 0.05
+    python benchmark_telegram.py otp-burst --no-flood-limits --latency-ms 80 --json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from typing import List, Optional
+
+from benchmark_monitor import percentile
+from fake_telegram_api import FakeTelegramAPI
+
+CHANNEL_ID = "-1002724043027"
+
+
+def _ms(value: Optional[float]) -> Optional[float]:
+    return round(value * 1000, 1) if value is not None else None
+
+
+def summarize(label: str, elapsed: float, sent: int, failed: int, latencies: List[float],
+              queue_delays: List[float], delivery, api: FakeTelegramAPI) -> dict:
+    return {
+        'scenario': label,
+        'elapsed_s': round(elapsed, 2),
+        'sent': sent,
+        'failed': failed,
+        'messages_per_s': round(sent / elapsed, 1) if elapsed else 0.0,
+        'send_p50_ms': _ms(percentile(latencies, 50)),
+        'send_p99_ms': _ms(percentile(latencies, 99)),
+        'queue_delay_p50_ms': _ms(percentile(queue_delays, 50)),
+        'queue_delay_p99_ms': _ms(percentile(queue_delays, 99)),
+        'queue_delay_max_ms': _ms(max(queue_delays) if queue_delays else None),
+        'client': delivery.get_stats(),
+        'api': {key: value for key, value in api.get_stats().items() if key != 'by_method'},
+    }
+
+
+async def otp_burst(delivery, api: FakeTelegramAPI, otps: int, concurrency: int, users: int) -> dict:
+    """All OTPs queued at t0; workers notify the waiting user, then queue the channel post (as the monitor does)"""
+    from telegram_delivery import ChannelPoster
+
+    queue: asyncio.Queue = asyncio.Queue()
+    rng = random.Random(1)
+    for index in range(otps):
+        queue.put_nowait((index, rng.randrange(1, users + 1)))
+
+    poster = ChannelPoster(delivery, CHANNEL_ID)
+    latencies: List[float] = []
+    queue_delays: List[float] = []
+    counts = {'sent': 0, 'failed': 0}
+    started = time.monotonic()
+
+    async def worker():
+        while True:
+            try:
+                index, user_id = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            queue_delays.append(time.monotonic() - started)
+            code = f"{100 + index % 900}-{100 + (index * 7) % 900}"
+            send_start = time.monotonic()
+            try:
+                await delivery.send(chat_id=user_id, text=f"🔔 **OTP Received**\n\n🔐 OTP: `{code}`", target='user')
+                latencies.append(time.monotonic() - send_start)
+                counts['sent'] += 1
+            except Exception:
+                counts['failed'] += 1
+            poster.post(f"🔔 OTP {code} (WhatsApp)", parse_mode=None)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    users_done = time.monotonic() - started
+
+    # The channel queue drains at the group limit on its own; report how long that takes
+    while poster.queue:
+        await asyncio.sleep(0.1)
+    report = summarize(f"otp-burst ({otps} OTPs, {concurrency} workers)", users_done,
+                       counts['sent'], counts['failed'], latencies, queue_delays, delivery, api)
+    report['channel'] = dict(poster.get_stats(), drain_s=round(time.monotonic() - started, 2))
+    return report
+
+
+async def broadcast(delivery, api: FakeTelegramAPI, users: int, rate: float) -> dict:
+    """The admin /broadcast path: one text to every user, paced"""
+    started = time.monotonic()
+    sent, failed = await delivery.broadcast(range(1, users + 1), "📢 **Admin Message**\n\nBenchmark", rate=rate)
+    elapsed = time.monotonic() - started
+    # Queueing delay of the last user = how long the broadcast keeps everyone else waiting
+    return summarize(f"broadcast ({users} users at {rate}/s)", elapsed, sent, failed,
+                     [], [elapsed], delivery, api)
+
+
+async def run(args) -> dict:
+    api = FakeTelegramAPI(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, global_rate=args.global_rate,
+                          private_rate=args.private_rate, group_rate_per_minute=args.group_rate,
+                          blocked_rate=args.blocked_rate, flood_limits=not args.no_flood_limits, seed=1).start()
+    os.environ['TELEGRAM_API_URL'] = api.base_url
+    from telegram_delivery import TelegramDelivery
+
+    delivery = TelegramDelivery("123456:benchmark", max_flood_retries=args.flood_retries)
+    try:
+        if args.scenario == 'otp-burst':
+            return await otp_burst(delivery, api, args.otps, args.concurrency, args.users)
+        return await broadcast(delivery, api, args.users, args.broadcast_rate)
+    finally:
+        api.stop()
+
+
+def print_report(report: dict):
+    print(f"\n📊 Telegram delivery benchmark: {report['scenario']}")
+    print(f"   Elapsed:          {report['elapsed_s']}s")
+    print(f"   Sent / failed:    {report['sent']} / {report['failed']}")
+    print(f"   Throughput:       {report['messages_per_s']} messages/s")
+    print(f"   Send p50/p99:     {report['send_p50_ms']} / {report['send_p99_ms']} ms")
+    print(f"   Queue delay p50/p99/max: {report['queue_delay_p50_ms']} / {report['queue_delay_p99_ms']} / "
+          f"{report['queue_delay_max_ms']} ms")
+    if 'channel' in report:
+        print(f"   Channel queue:    {report['channel']}")
+    print(f"   Client:           {report['client']}")
+    print(f"   Fake API:         {report['api']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Outbound Telegram delivery benchmark against the fake Bot API")
+    parser.add_argument('scenario', choices=['otp-burst', 'broadcast'])
+    parser.add_argument('--otps', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=1, help="workers sending OTPs in parallel")
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--broadcast-rate', type=float, default=10.0, help="broadcast messages/second")
+    parser.add_argument('--flood-retries', type=int, default=1, help="429 retries per message")
+    parser.add_argument('--latency-ms', type=float, default=30.0)
+    parser.add_argument('--jitter-ms', type=float, default=10.0)
+    parser.add_argument('--global-rate', type=float, default=30.0)
+    parser.add_argument('--private-rate', type=float, default=1.0)
+    parser.add_argument('--group-rate', type=float, default=20.0, help="messages/minute per group or channel")
+    parser.add_argument('--blocked-rate', type=float, default=0.0)
+    parser.add_argument('--no-flood-limits', action='store_true')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    from log_setup import setup_logging
+    setup_logging()
+
+    result = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+User Load Benchmark
+Simulated users drive TelegramNumberBot's registered handlers with
+synthetic Updates (fake_updates.py) at a configurable concurrency, on top
+of the in-memory Supabase and the local fake Bot API. Reports handler
+latency percentiles, throughput and event-loop stalls, for sizing
+deployments and catching regressions.
+
+Every simulated user runs one session:
+    /start → 📱 Get Number → pick country → 📊 My Status → change number → status
+A fraction of users is not approved and only goes through the access-request path.
+
+    python benchmark_users.py --users 500 --concurrency 50
+    python benchmark_users.py --users 200 --concurrency 20 --db-latency-ms 30 --json
+"""
+
+import argparse
+import asyncio
+import collections
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Dict, List
+
+from benchmark_monitor import percentile
+from benchmark_queries import ADMIN_ID, COUNTRIES, write_country_files
+from fake_telegram_api import FakeTelegramAPI
+from fake_updates import FakeContext, FakeUpdate
+from memory_supabase import MemorySupabase
+
+FIRST_USER_ID = 100000
+
+
+class LoadRecorder:
+    """Latency samples per handler step"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = collections.defaultdict(list)
+        self.errors = collections.Counter()
+
+    async def call(self, step: str, handler, update, context):
+        started = time.perf_counter()
+        try:
+            await handler(update, context)
+        except Exception:
+            self.errors[step] += 1
+        finally:
+            self.samples[step].append(time.perf_counter() - started)
+
+    def report(self) -> Dict[str, dict]:
+        return {
+            step: {
+                'calls': len(values),
+                'errors': self.errors.get(step, 0),
+                'p50_ms': _ms(percentile(values, 50)),
+                'p95_ms': _ms(percentile(values, 95)),
+                'p99_ms': _ms(percentile(values, 99)),
+                'max_ms': _ms(max(values)),
+            }
+            for step, values in self.samples.items()
+        }
+
+
+def _ms(value: float) -> float:
+    return round(value * 1000, 1)
+
+
+async def user_session(bot, recorder: LoadRecorder, user_id: int, approved: bool, think: float):
+    """One simulated user, start to finish"""
+    context = FakeContext()
+    country = COUNTRIES[user_id % len(COUNTRIES)]
+
+    async def step(name: str, handler, update):
+        await recorder.call(name, handler, update, context)
+        if think:
+            await asyncio.sleep(random.uniform(0, 2 * think))
+
+    if not approved:
+        await step('start_command (access request)', bot.start_command, FakeUpdate.text(user_id, "/start"))
+        return
+
+    await step('start_command', bot.start_command, FakeUpdate.text(user_id, "/start"))
+    await step('handle_message (get number)', bot.handle_message, FakeUpdate.text(user_id, "📱 Get Number"))
+    await step('handle_callback_query (country)', bot.handle_callback_query,
+               FakeUpdate.callback(user_id, f"country_{country}"))
+    await step('handle_message (status)', bot.handle_message, FakeUpdate.text(user_id, "📊 My Status"))
+    await step('handle_change_number', bot.handle_change_number, FakeUpdate.callback(user_id, f"change_{country}"))
+    await step('show_user_status', bot.show_user_status, FakeUpdate.text(user_id, "📊 My Status"))
+
+
+async def run_load(users: int, concurrency: int, approved_rate: float, db_latency_ms: float,
+                   telegram_latency_ms: float, think_ms: float) -> dict:
+    from loop_watchdog import WATCHDOG
+    from telegram_number_bot import TelegramNumberBot
+
+    api = FakeTelegramAPI(latency_ms=telegram_latency_ms, flood_limits=False).start()
+    os.environ['TELEGRAM_API_URL'] = api.base_url
+
+    countries_dir = tempfile.mkdtemp(prefix='otp-load-')
+    write_country_files(countries_dir, pool_size=2 * users + 50)
+
+    rng = random.Random(1)
+    user_ids = [FIRST_USER_ID + n for n in range(users)]
+    approved = {user_id for user_id in user_ids if rng.random() < approved_rate}
+    db = MemorySupabase(latency_ms=db_latency_ms, keep_log=False)
+    db.seed('admin_settings', [{'setting_key': 'admin_user_id', 'setting_value': str(ADMIN_ID)}])
+    db.seed('approved_users', [{'user_id': user_id, 'is_active': True} for user_id in sorted(approved)])
+
+    bot = TelegramNumberBot(supabase_client=db)
+    bot.countries_dir = countries_dir
+    bot.load_countries()
+    bot.load_number_states()
+    db.reset_counts()
+
+    recorder = LoadRecorder()
+    queue: asyncio.Queue = asyncio.Queue()
+    for user_id in user_ids:
+        queue.put_nowait(user_id)
+
+    async def worker():
+        while True:
+            try:
+                user_id = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await user_session(bot, recorder, user_id, user_id in approved, think_ms / 1000)
+
+    WATCHDOG.start()
+    started = time.monotonic()
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.monotonic() - started
+    finally:
+        WATCHDOG.stop()
+        api.stop()
+
+    steps = recorder.report()
+    calls = sum(step['calls'] for step in steps.values())
+    return {
+        'users': users,
+        'concurrency': concurrency,
+        'db_latency_ms': db_latency_ms,
+        'elapsed_s': round(elapsed, 2),
+        'handler_calls': calls,
+        'handler_calls_per_s': round(calls / elapsed, 1) if elapsed else 0.0,
+        'sessions_per_s': round(users / elapsed, 1) if elapsed else 0.0,
+        'numbers_assigned': sum(1 for session in bot.user_sessions.values() if session.get('number')),
+        'steps': steps,
+        'db_queries': db.query_count,
+        'telegram': {key: value for key, value in api.get_stats().items() if key != 'by_method'},
+        'loop': WATCHDOG.get_stats(),
+    }
+
+
+def print_report(report: dict):
+    print(f"\n📊 User load: {report['users']} users, {report['concurrency']} concurrent, "
+          f"{report['db_latency_ms']}ms per DB query")
+    print(f"   Elapsed:        {report['elapsed_s']}s")
+    print(f"   Throughput:     {report['handler_calls_per_s']} handler calls/s, {report['sessions_per_s']} sessions/s")
+    print(f"   Assigned:       {report['numbers_assigned']} numbers, {report['db_queries']} DB queries")
+    print(f"   {'handler':<34}{'calls':>7}{'errors':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  (ms)")
+    for step, row in report['steps'].items():
+        print(f"   {step:<34}{row['calls']:>7}{row['errors']:>8}{row['p50_ms']:>9}{row['p95_ms']:>9}"
+              f"{row['p99_ms']:>9}{row['max_ms']:>9}")
+    loop = report['loop']
+    print(f"   Loop stalls:    {loop['stalls']} over {loop['threshold_ms']}ms")
+    for offender in loop['offenders'][:5]:
+        print(f"     {offender['function']}: {offender['count']}x, {offender['total_ms']}ms total")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulated concurrent users against TelegramNumberBot's handlers")
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=20, help="users active at the same time")
+    parser.add_argument('--approved-rate', type=float, default=0.9, help="fraction of users already approved")
+    parser.add_argument('--db-latency-ms', type=float, default=10.0, help="simulated Supabase round trip")
+    parser.add_argument('--telegram-latency-ms', type=float, default=30.0, help="fake Bot API response time")
+    parser.add_argument('--think-ms', type=float, default=0.0, help="mean pause between a user's actions")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    os.environ.setdefault('BOT_TOKEN', '123456:benchmark')
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    os.environ.setdefault('TRACE_EXPORTER', 'none')
+    os.environ.setdefault('LOOP_STALL_THRESHOLD_MS', '100')
+    from log_setup import setup_logging
+    setup_logging()
+
+    result = asyncio.run(run_load(args.users, args.concurrency, args.approved_rate, args.db_latency_ms,
+                                  args.telegram_latency_ms, args.think_ms))
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Catch-up Engine
+After downtime or a logout the monitor pages through the SMS CDR AJAX
+endpoint (start/length) from the last persisted high-water mark until it is
+caught up, streaming each page into the normal processing pipeline.
+Only a bounded window of pages is held in memory at any time.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional
+
+from tracing import panel_now
+
+try:
+    import fcntl
+except ImportError:  # Windows - single-process use only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class HighWaterMark:
+    """Newest processed panel row timestamp, persisted to a small JSON file
+
+    Several monitor processes (shards) share the file, one key per account;
+    saves are serialised with an flock on <path>.lock.
+    """
+
+    def __init__(self, path: str, key: str = 'default', max_hashes_at_mark: int = 200):
+        self.path = path
+        self.key = key
+        self.max_hashes_at_mark = max_hashes_at_mark
+
+        # Newest row timestamp processed ('YYYY-MM-DD HH:MM:SS' sorts lexically)
+        self.timestamp: Optional[str] = None
+
+        # Message hashes of rows sharing that exact second (so they are not resent)
+        self.hashes_at_mark: List[str] = []
+
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        """Load the mark for this key from disk"""
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    state = json.load(f).get(self.key, {})
+                self.timestamp = state.get('timestamp')
+                self.hashes_at_mark = state.get('hashes_at_mark', [])
+                if self.timestamp:
+                    logger.info(f"📍 High-water mark loaded: {self.timestamp}")
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load high-water mark: {e}")
+
+    def advance(self, timestamp: str, message_hash: str):
+        """Move the mark forward for a processed row"""
+        if not timestamp:
+            return
+        try:
+            datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+        except ValueError:
+            return
+
+        if self.timestamp is None or timestamp > self.timestamp:
+            self.timestamp = timestamp
+            self.hashes_at_mark = [message_hash]
+            self.dirty = True
+        elif timestamp == self.timestamp and message_hash not in self.hashes_at_mark:
+            self.hashes_at_mark = (self.hashes_at_mark + [message_hash])[-self.max_hashes_at_mark:]
+            self.dirty = True
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive lock across processes for the read-modify-write of the shared file"""
+        if fcntl is None:
+            yield
+            return
+        with open(f"{self.path}.lock", 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def snapshot(self) -> Optional[Dict]:
+        """Immutable copy of an unsaved mark, clearing dirty (call on the event loop)"""
+        if not self.dirty:
+            return None
+        self.dirty = False
+        return {'timestamp': self.timestamp, 'hashes_at_mark': tuple(self.hashes_at_mark)}
+
+    def write(self, snapshot: Dict) -> bool:
+        """Atomically persist a snapshot (locked read-modify-write, private temp file, then rename)
+
+        Touches no live state, so it can run in a worker thread while the loop
+        keeps advancing the mark.
+        """
+        try:
+            with self._locked():
+                state = {}
+                if os.path.exists(self.path):
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        state = json.load(f)
+                state[self.key] = {
+                    'timestamp': snapshot['timestamp'],
+                    'hashes_at_mark': list(snapshot['hashes_at_mark']),
+                    'saved_at': datetime.now().strftime(TIMESTAMP_FORMAT),
+                }
+                directory = os.path.dirname(os.path.abspath(self.path))
+                fd, tmp_path = tempfile.mkstemp(prefix=f"{os.path.basename(self.path)}.", suffix='.tmp', dir=directory)
+                try:
+                    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                        json.dump(state, f)
+                    os.replace(tmp_path, self.path)
+                except BaseException:
+                    os.unlink(tmp_path)
+                    raise
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ Could not save high-water mark: {e}")
+            return False
+
+    def save(self):
+        """Snapshot and write in one go (same thread)"""
+        snapshot = self.snapshot()
+        if snapshot is not None and not self.write(snapshot):
+            self.dirty = True
+
+    async def save_async(self):
+        """Snapshot on the loop, file lock + I/O in a worker thread"""
+        snapshot = self.snapshot()
+        if snapshot is not None and not await asyncio.to_thread(self.write, snapshot):
+            self.dirty = True
+
+
+class CatchUpEngine:
+    """Pages through the AJAX endpoint from a timestamp until caught up"""
+
+    def __init__(self, bot, page_size: int = 100, max_parallel: int = 3, max_pages: int = 500):
+        # Bot providing fetch_ajax_page(filters, start, length) and parse_ajax_records(records)
+        self.bot = bot
+        self.page_size = page_size
+
+        # Pages fetched concurrently - also the bound on pages held in memory
+        self.max_parallel = max_parallel
+
+        # Safety cap on a single catch-up run
+        self.max_pages = max_pages
+
+        self.runs = 0
+        self.pages_fetched = 0
+        self.rows_streamed = 0
+
+        # False when the last stream() stopped on a failed page - its gap is not closed
+        self.last_run_complete = True
+
+    async def _fetch_page(self, filters: Dict[str, str], start: int) -> Optional[dict]:
+        """Fetch one page in a worker thread (requests is blocking)"""
+        return await asyncio.to_thread(self.bot.fetch_ajax_page, filters, start, self.page_size)
+
+    async def stream(self, since: str) -> AsyncIterator[List[Dict]]:
+        """Yield parsed message pages for rows between `since` and now"""
+        self.runs += 1
+        self.last_run_complete = False
+        filters = {
+            'fdate1': since,
+            'fdate2': panel_now().strftime('%Y-%m-%d 23:59:59'),
+        }
+
+        # First page tells us how many rows the backlog holds
+        first = await self._fetch_page(filters, 0)
+        if first is None:
+            logger.warning("⚠️ Catch-up: first page failed")
+            return
+        self.last_run_complete = True
+
+        total = self._total_rows(first)
+        first_rows = first.get('aaData', [])
+        self.pages_fetched += 1
+        logger.info(f"⏪ Catch-up from {since}: {total if total is not None else 'unknown'} rows")
+
+        page = self.bot.parse_ajax_records(first_rows)
+        self.rows_streamed += len(page)
+        yield page
+
+        if len(first_rows) < self.page_size:
+            return
+
+        # Remaining pages in bounded parallel windows
+        start = self.page_size
+        pages = 1
+        while pages < self.max_pages and (total is None or start < total):
+            window = []
+            while len(window) < self.max_parallel and pages + len(window) < self.max_pages:
+                if total is not None and start >= total:
+                    break
+                window.append(start)
+                start += self.page_size
+
+            if not window:
+                break
+
+            results = await asyncio.gather(*(self._fetch_page(filters, s) for s in window))
+
+            done = False
+            for result in results:
+                pages += 1
+                if result is None:
+                    logger.warning("⚠️ Catch-up: page failed, stopping early")
+                    self.last_run_complete = False
+                    done = True
+                    break
+                rows = result.get('aaData', [])
+                self.pages_fetched += 1
+                page = self.bot.parse_ajax_records(rows)
+                self.rows_streamed += len(page)
+                yield page
+                if len(rows) < self.page_size:
+                    done = True
+                    break
+
+            if done:
+                break
+
+        if pages >= self.max_pages:
+            logger.warning(f"⚠️ Catch-up stopped at {self.max_pages} pages")
+
+    def _total_rows(self, data: dict) -> Optional[int]:
+        """DataTables total for the filtered set (legacy or current key names)"""
+        for key in ('iTotalDisplayRecords', 'recordsFiltered', 'iTotalRecords', 'recordsTotal'):
+            if key in data:
+                try:
+                    return int(data[key])
+                except (TypeError, ValueError):
+                    continue
+        return None
+
+    def get_stats(self) -> dict:
+        """Catch-up counters"""
+        return {
+            'runs': self.runs,
+            'pages_fetched': self.pages_fetched,
+            'rows_streamed': self.rows_streamed,
+        }
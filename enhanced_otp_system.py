@@ -16,12 +16,11 @@ import json
 # Import existing components
 from otp_telegram_bot import OTPTelegramBot
 from telegram_number_bot import TelegramNumberBot
+from adaptive_polling import AdaptivePollScheduler
+from log_setup import setup_logging
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 class EnhancedOTPSystem:
@@ -40,6 +39,11 @@ class EnhancedOTPSystem:
         # Monitoring state
         self.monitoring_active = False
         self.last_successful_scan = datetime.now()
+        
+        # Adaptive poll cadence (0.3s when active, backing off from 0.8s when idle)
+        self.poll_scheduler = AdaptivePollScheduler(
+            min_interval=0.3, hot_interval=0.5, idle_interval=0.8, max_interval=10.0
+        )
     
     async def initialize_system(self):
         """Initialize the complete OTP system"""
@@ -133,6 +137,7 @@ class EnhancedOTPSystem:
         loop_count = 0
         consecutive_errors = 0
         max_consecutive_errors = 5
+        self.poll_scheduler.number_bot = self.number_bot
         
         while self.monitoring_active:
             try:
@@ -174,13 +179,11 @@ class EnhancedOTPSystem:
                 # Performance logging
                 if loop_count % 50 == 0:
                     uptime = datetime.now() - self.start_time
-                    logger.info(f"📊 Performance: {self.processed_count} OTPs processed, {consecutive_errors} errors, Uptime: {uptime}")
+                    logger.info(f"📊 Performance: {self.processed_count} OTPs processed, {consecutive_errors} errors, Uptime: {uptime}, Poll: {self.poll_scheduler.get_metrics()}")
                 
-                # Adaptive sleep based on activity
-                if new_found > 0:
-                    await asyncio.sleep(0.3)  # Faster when active
-                else:
-                    await asyncio.sleep(0.8)   # Slower when idle
+                # Adaptive sleep based on activity, waiting users and errors
+                self.poll_scheduler.record_success(new_found)
+                await self.poll_scheduler.sleep()
                 
             except asyncio.TimeoutError:
                 consecutive_errors += 1
@@ -191,7 +194,8 @@ class EnhancedOTPSystem:
                     asyncio.create_task(self.emergency_recovery())
                     consecutive_errors = 0
                 
-                await asyncio.sleep(2)
+                self.poll_scheduler.record_error()
+                await self.poll_scheduler.sleep()
                 
             except Exception as e:
                 consecutive_errors += 1
@@ -203,7 +207,8 @@ class EnhancedOTPSystem:
                     asyncio.create_task(self.emergency_recovery())
                     consecutive_errors = 0
                 
-                await asyncio.sleep(3)
+                self.poll_scheduler.record_error()
+                await self.poll_scheduler.sleep()
     
     async def emergency_recovery(self):
         """Emergency recovery system"""
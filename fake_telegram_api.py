@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Fake Telegram Bot API
+Local stand-in for api.telegram.org so outbound delivery can be load tested:
+
+- POST /bot<token>/<method>   sendMessage, editMessageText, getMe, getUpdates, ...
+- every call is recorded (method, chat, status, time)
+- configurable response latency
+- Telegram-style flood limits: a global messages/second budget plus
+  per-chat budgets (private chats ~1/s, groups/channels ~20/min);
+  over budget answers 429 with parameters.retry_after
+- optional fraction of private chats that have blocked the bot (403)
+
+Point the bots at it with TELEGRAM_API_URL=http://127.0.0.1:8081
+Run standalone:  python fake_telegram_api.py --port 8081
+"""
+
+import argparse
+import collections
+import json
+import logging
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+# Methods that post a message to a chat and count against flood limits
+SEND_METHODS = {'sendmessage', 'sendphoto', 'senddocument', 'forwardmessage', 'copymessage'}
+
+
+class TokenBucket:
+    """rate tokens/second, holding at most `burst`"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """0 when a token was taken, otherwise seconds until one is available"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class FakeTelegramAPI:
+    """Bot API state (flood buckets, call log) plus the HTTP server"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 global_rate: float = 30.0, private_rate: float = 1.0, private_burst: float = 3.0,
+                 group_rate_per_minute: float = 20.0, blocked_rate: float = 0.0, flood_limits: bool = True,
+                 max_calls: int = 200000, seed: Optional[int] = None):
+        self.host = host
+        self.port = port
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+
+        # Flood limits (Telegram's documented guidance)
+        self.flood_limits = flood_limits
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.private_rate = private_rate
+        self.private_burst = private_burst
+        self.group_rate = group_rate_per_minute / 60.0
+        self.chat_buckets: Dict[int, TokenBucket] = {}
+
+        # Fraction of private chats that answer 403 "bot was blocked by the user"
+        self.blocked_rate = blocked_rate
+        self.random = random.Random(seed)
+        self.blocked_chats: Dict[int, bool] = {}
+
+        # (time, method, chat_id, status)
+        self.calls = collections.deque(maxlen=max_calls)
+        self.counts = collections.Counter()
+        self.messages_by_chat = collections.Counter()
+        self.next_message_id = 1
+        self._lock = threading.Lock()
+
+        self.server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    # ----- API semantics -----
+
+    def _flood_wait(self, chat_id: int) -> float:
+        """Seconds the caller must wait, 0 when the message may be sent"""
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            if chat_id < 0:
+                bucket = TokenBucket(self.group_rate, self.group_rate * 60)
+            else:
+                bucket = TokenBucket(self.private_rate, self.private_burst)
+            self.chat_buckets[chat_id] = bucket
+        wait = bucket.take()
+        if wait:
+            return wait
+        wait = self.global_bucket.take()
+        if wait:
+            # Not sent after all - give the chat its token back
+            bucket.tokens += 1
+        return wait
+
+    def _is_blocked(self, chat_id: int) -> bool:
+        if chat_id < 0 or not self.blocked_rate:
+            return False
+        if chat_id not in self.blocked_chats:
+            self.blocked_chats[chat_id] = self.random.random() < self.blocked_rate
+        return self.blocked_chats[chat_id]
+
+    def call(self, method: str, params: Dict) -> Tuple[int, Dict]:
+        """(HTTP status, Bot API response body) for one method call"""
+        name = method.lower()
+        chat_id = _as_int(params.get('chat_id'))
+        now = time.time()
+
+        with self._lock:
+            if name in SEND_METHODS and chat_id is not None:
+                if self._is_blocked(chat_id):
+                    return self._record(now, method, chat_id, 403, {
+                        'ok': False, 'error_code': 403, 'description': "Forbidden: bot was blocked by the user"})
+                wait = self._flood_wait(chat_id) if self.flood_limits else 0.0
+                if wait:
+                    retry_after = max(1, math.ceil(wait))
+                    return self._record(now, method, chat_id, 429, {
+                        'ok': False, 'error_code': 429,
+                        'description': f"Too Many Requests: retry after {retry_after}",
+                        'parameters': {'retry_after': retry_after}})
+                self.messages_by_chat[chat_id] += 1
+
+            if name in SEND_METHODS or name == 'editmessagetext':
+                message_id = self.next_message_id
+                self.next_message_id += 1
+                result = {
+                    'message_id': _as_int(params.get('message_id')) or message_id,
+                    'date': int(now),
+                    'chat': {'id': chat_id or 0, 'type': 'private' if (chat_id or 0) > 0 else 'channel'},
+                    'text': params.get('text', ''),
+                }
+            elif name == 'getme':
+                result = {'id': 123456, 'is_bot': True, 'first_name': 'Fake OTP Bot', 'username': 'fake_otp_bot',
+                          'can_join_groups': True, 'can_read_all_group_messages': False,
+                          'supports_inline_queries': False}
+            elif name == 'getupdates':
+                result = []
+            else:
+                result = True
+            return self._record(now, method, chat_id, 200, {'ok': True, 'result': result})
+
+    def _record(self, now: float, method: str, chat_id: Optional[int], status: int, body: Dict) -> Tuple[int, Dict]:
+        self.calls.append((now, method, chat_id, status))
+        self.counts[(method, status)] += 1
+        return status, body
+
+    # ----- lifecycle -----
+
+    def start(self) -> 'FakeTelegramAPI':
+        self.server = ThreadingHTTPServer((self.host, self.port), _handler_for(self))
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self._thread = threading.Thread(target=self.server.serve_forever, name='fake-telegram-api', daemon=True)
+        self._thread.start()
+        logger.info(f"🧪 Fake Telegram API on {self.base_url}")
+        return self
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            by_status = collections.Counter()
+            for (method, status), count in self.counts.items():
+                by_status[status] += count
+            return {
+                'calls': sum(self.counts.values()),
+                'delivered': sum(self.messages_by_chat.values()),
+                'rate_limited': by_status.get(429, 0),
+                'blocked': by_status.get(403, 0),
+                'chats': len(self.messages_by_chat),
+                'by_method': {f"{method} {status}": count for (method, status), count in sorted(self.counts.items())},
+            }
+
+    def delivered_per_second(self) -> float:
+        """Successful sends per second between the first and last one"""
+        with self._lock:
+            sends = [call[0] for call in self.calls if call[1].lower() in SEND_METHODS and call[3] == 200]
+        if len(sends) < 2:
+            return float(len(sends))
+        return len(sends) / max(sends[-1] - sends[0], 1e-6)
+
+
+def _as_int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _handler_for(api: FakeTelegramAPI):
+    class BotAPIHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _params(self) -> Dict:
+            length = int(self.headers.get('Content-Length', 0) or 0)
+            body = self.rfile.read(length) if length else b''
+            content_type = self.headers.get('Content-Type', '')
+            params = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+            if 'application/json' in content_type and body:
+                params.update(json.loads(body))
+            elif body and 'multipart/form-data' not in content_type:
+                params.update({key: values[0] for key, values in parse_qs(body.decode('utf-8', 'replace')).items()})
+            return params
+
+        def _handle(self):
+            parts = urlparse(self.path).path.strip('/').split('/')
+            params = self._params()
+            if len(parts) != 2 or not parts[0].startswith('bot'):
+                self._send(404, {'ok': False, 'error_code': 404, 'description': 'Not Found'})
+                return
+
+            method = parts[1]
+            if method.lower() == 'getupdates':
+                # Long polling: hold the request briefly like the real API does with nothing to deliver
+                time.sleep(min(float(params.get('timeout', 0) or 0), 1.0))
+            elif api.latency_ms or api.jitter_ms:
+                time.sleep(max(0.0, api.latency_ms + api.random.uniform(-api.jitter_ms, api.jitter_ms)) / 1000)
+
+            status, body = api.call(method, params)
+            self._send(status, body)
+
+        def _send(self, status: int, body: Dict):
+            payload = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        do_GET = _handle
+        do_POST = _handle
+
+    return BotAPIHandler
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Local stand-in for the Telegram Bot API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency-ms', type=float, default=30.0)
+    parser.add_argument('--jitter-ms', type=float, default=10.0)
+    parser.add_argument('--global-rate', type=float, default=30.0, help="messages/second across all chats")
+    parser.add_argument('--private-rate', type=float, default=1.0, help="messages/second per private chat")
+    parser.add_argument('--group-rate', type=float, default=20.0, help="messages/minute per group or channel")
+    parser.add_argument('--blocked-rate', type=float, default=0.0, help="fraction of users that blocked the bot")
+    parser.add_argument('--no-flood-limits', action='store_true')
+    args = parser.parse_args()
+
+    fake = FakeTelegramAPI(args.host, args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                           global_rate=args.global_rate, private_rate=args.private_rate,
+                           group_rate_per_minute=args.group_rate, blocked_rate=args.blocked_rate,
+                           flood_limits=not args.no_flood_limits).start()
+    try:
+        while True:
+            time.sleep(10)
+            logger.info(f"📊 {fake.get_stats()}")
+    except KeyboardInterrupt:
+        fake.stop()
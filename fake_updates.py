@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Fake Telegram Updates
+Minimal duck-typed Update / Message / CallbackQuery / Context objects for
+driving TelegramNumberBot handlers directly (no Bot API, no polling).
+Replies and edits are recorded on the objects instead of being sent.
+
+    update = FakeUpdate.text(user_id=42, text="📊 My Status")
+    await bot.handle_message(update, FakeContext())
+    print(update.message.replies[-1])
+"""
+
+import time
+from typing import List, Optional
+
+
+class FakeUser:
+    def __init__(self, user_id: int, first_name: str = "Bench", username: str = "", last_name: str = ""):
+        self.id = user_id
+        self.first_name = first_name
+        self.username = username
+        self.last_name = last_name
+        self.is_bot = False
+
+
+class FakeChat:
+    def __init__(self, chat_id: int):
+        self.id = chat_id
+        self.type = 'private'
+
+
+class FakeMessage:
+    """Incoming message; reply_text/edit_text record what the bot answered"""
+
+    _next_id = 1
+
+    def __init__(self, chat_id: int, text: str = "", document=None):
+        self.message_id = FakeMessage._next_id
+        FakeMessage._next_id += 1
+        self.chat = FakeChat(chat_id)
+        self.chat_id = chat_id
+        self.text = text
+        self.document = document
+        self.date = time.time()
+        self.replies: List[str] = []
+        self.edits: List[str] = []
+
+    async def reply_text(self, text: str, **kwargs) -> 'FakeMessage':
+        self.replies.append(text)
+        return FakeMessage(self.chat_id, text)
+
+    async def edit_text(self, text: str, **kwargs) -> 'FakeMessage':
+        self.edits.append(text)
+        self.text = text
+        return self
+
+
+class FakeCallbackQuery:
+    """Inline button press on a message the bot sent earlier"""
+
+    def __init__(self, user: FakeUser, data: str, message: Optional[FakeMessage] = None):
+        self.id = str(time.monotonic_ns())
+        self.from_user = user
+        self.data = data
+        self.message = message or FakeMessage(user.id)
+        self.answered = 0
+
+    async def answer(self, *args, **kwargs) -> bool:
+        self.answered += 1
+        return True
+
+    async def edit_message_text(self, text: str, **kwargs) -> FakeMessage:
+        return await self.message.edit_text(text, **kwargs)
+
+
+class FakeUpdate:
+    def __init__(self, user: FakeUser, message: Optional[FakeMessage] = None,
+                 callback_query: Optional[FakeCallbackQuery] = None):
+        self.update_id = time.monotonic_ns()
+        self.effective_user = user
+        self.effective_chat = FakeChat(user.id)
+        self.message = message
+        self.callback_query = callback_query
+
+    @property
+    def effective_message(self) -> Optional[FakeMessage]:
+        return self.message or (self.callback_query.message if self.callback_query else None)
+
+    @classmethod
+    def text(cls, user_id: int, text: str, **user_fields) -> 'FakeUpdate':
+        return cls(FakeUser(user_id, **user_fields), message=FakeMessage(user_id, text))
+
+    @classmethod
+    def callback(cls, user_id: int, data: str, **user_fields) -> 'FakeUpdate':
+        user = FakeUser(user_id, **user_fields)
+        return cls(user, callback_query=FakeCallbackQuery(user, data))
+
+    def replies(self) -> List[str]:
+        """Everything the bot answered to this update, in order"""
+        message = self.effective_message
+        return (message.replies + message.edits) if message else []
+
+
+class FakeContext:
+    """ContextTypes.DEFAULT_TYPE stand-in: command args and (optionally) a bot"""
+
+    def __init__(self, args: Optional[List[str]] = None, bot=None):
+        self.args = args or []
+        self.bot = bot
+        self.user_data = {}
+        self.chat_data = {}
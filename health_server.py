@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Async Health Server
+Minimal HTTP server on the bot's own event loop, reporting real state:
+
+- /health   liveness - 503 when the loop is stalled or a supervised child escalated
+- /ready    readiness - 503 until the panel is logged in and polls succeed
+            (panel trouble never fails liveness - a restart can't fix the panel)
+- /status   full JSON status (polls, login, outbound queue, loop lag, restarts)
+- /         human-readable status page
+
+Because it shares the loop, a blocked event loop also blocks /health, which
+is exactly what the platform's health check should notice. Loop lag comes
+from the loop watchdog's heartbeat.
+"""
+
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+
+from loop_watchdog import WATCHDOG, LoopWatchdog
+
+logger = logging.getLogger(__name__)
+
+STATUS_TEXT = {200: 'OK', 404: 'Not Found', 405: 'Method Not Allowed', 503: 'Service Unavailable'}
+
+
+class HealthServer:
+    """asyncio HTTP endpoint; status comes from a provider callable"""
+
+    def __init__(self, status_provider: Callable[[], Dict], host: str = '0.0.0.0', port: int = 10000,
+                 watchdog: Optional[LoopWatchdog] = None, max_loop_lag_ms: float = 5000.0):
+        # Returns {'live': bool, 'ready': bool, ...} - anything else goes into /status
+        self.status_provider = status_provider
+        self.host = host
+        self.port = port
+        self.watchdog = watchdog or WATCHDOG
+        self.max_loop_lag_ms = max_loop_lag_ms
+
+        # Extra routes, e.g. /metrics: path -> (content_type, callable returning text)
+        self.routes: Dict[str, Tuple[str, Callable[[], str]]] = {}
+
+        self.server = None
+        self.requests_served = 0
+
+    def add_route(self, path: str, handler: Callable[[], str], content_type: str = 'text/plain; charset=utf-8'):
+        self.routes[path] = (content_type, handler)
+
+    async def start(self):
+        self.watchdog.start()
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        logger.info(f"🌐 Health server listening on port {self.port}")
+
+    async def stop(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+
+    def status(self) -> Dict:
+        """Provider status plus loop lag; the loop lag alone can fail liveness"""
+        try:
+            status = dict(self.status_provider())
+        except Exception as e:
+            status = {'live': False, 'ready': False, 'error': str(e)}
+
+        status['event_loop'] = self.watchdog.lag_stats()
+        max_lag_ms = self.watchdog.max_lag_ms
+        if max_lag_ms > self.max_loop_lag_ms:
+            status['live'] = False
+            status.setdefault('reasons', []).append(f"event loop lag {max_lag_ms:.0f}ms")
+        status['server_time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        return status
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            # Drain headers - no request bodies are supported
+            while True:
+                header = await asyncio.wait_for(reader.readline(), timeout=5)
+                if header in (b'\r\n', b'\n', b''):
+                    break
+
+            parts = request_line.decode('latin-1').split()
+            method = parts[0] if parts else ''
+            path = parts[1].split('?')[0] if len(parts) > 1 else '/'
+
+            if method not in ('GET', 'HEAD'):
+                code, content_type, body = 405, 'text/plain', 'method not allowed'
+            else:
+                code, content_type, body = self._route(path)
+
+            payload = body.encode('utf-8')
+            head = (
+                f"HTTP/1.1 {code} {STATUS_TEXT.get(code, '')}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                "Cache-Control: no-store\r\n"
+                "Connection: close\r\n\r\n"
+            ).encode('latin-1')
+            writer.write(head if method == 'HEAD' else head + payload)
+            await writer.drain()
+            self.requests_served += 1
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        except Exception as e:
+            logger.warning(f"⚠️ Health request error: {e}")
+        finally:
+            writer.close()
+
+    def _route(self, path: str) -> Tuple[int, str, str]:
+        if path in self.routes:
+            content_type, handler = self.routes[path]
+            return 200, content_type, handler()
+
+        if path == '/health':
+            status = self.status()
+            return (200 if status.get('live') else 503), 'application/json', json.dumps(
+                {'live': status.get('live', False), 'reasons': status.get('reasons', [])})
+
+        if path == '/ready':
+            status = self.status()
+            ready = status.get('ready') and status.get('live')
+            return (200 if ready else 503), 'application/json', json.dumps(
+                {'ready': bool(ready), 'reasons': status.get('reasons', [])})
+
+        if path == '/status':
+            return 200, 'application/json', json.dumps(self.status(), default=str)
+
+        if path == '/':
+            return 200, 'text/html; charset=utf-8', self._html(self.status())
+
+        return 404, 'text/plain', 'not found'
+
+    def _html(self, status: Dict) -> str:
+        state = '✅ Running' if status.get('live') else '❌ Stalled'
+        ready = '🟢 Ready' if status.get('ready') else '🟡 Not ready'
+        reasons = ''.join(f"<li>{reason}</li>" for reason in status.get('reasons', []))
+        return f"""<!DOCTYPE html>
+<html>
+<head><title>TaskTreasure OTP Bot System</title><meta charset="utf-8"></head>
+<body>
+<h1>🤖 TaskTreasure OTP Bot System</h1>
+<h2>System Status: {state} · {ready}</h2>
+<p>🕒 <strong>Server Time:</strong> {status['server_time']}</p>
+<ul>{reasons}</ul>
+<pre>{json.dumps(status, indent=2, default=str)}</pre>
+<hr>
+<p><small>Powered by @tasktreasur_support | TaskTreasure OTP System</small></p>
+</body>
+</html>"""
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Logging Setup
+One place to configure logging for every entry point:
+
+- records are handed to a bounded queue and written by a background
+  listener thread, so console/file I/O never blocks a poll or a send
+- per-call-site rate limiting: a log line that fires on every poll or row
+  is capped, and the next record that gets through says how many were dropped
+- LOG_FORMAT=json for one structured JSON object per line (with trace_id)
+- LOG_FILE rotates by size instead of growing forever
+
+Environment: LOG_LEVEL, LOG_FORMAT (text|json), LOG_FILE, LOG_MAX_BYTES,
+LOG_BACKUP_COUNT, LOG_RATE_LIMIT (records per call site per LOG_RATE_WINDOW seconds).
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from metrics import REGISTRY
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+LOG_RECORDS_DROPPED = REGISTRY.counter(
+    'log_records_dropped_total', 'Log records not written (rate limited or queue full)', ['reason'])
+
+# Attributes every LogRecord has - anything else was passed via extra=
+_STANDARD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_setup_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record; extra= fields are kept as keys"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            'site': f"{record.module}:{record.lineno}",
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """Caps records per call site (file:line) per window; WARNING and above by default always pass"""
+
+    def __init__(self, max_per_window: int = 60, window: float = 60.0, exempt_level: int = logging.WARNING):
+        super().__init__()
+        self.max_per_window = max_per_window
+        self.window = window
+        self.exempt_level = exempt_level
+        # (pathname, lineno) -> [window_start, emitted, suppressed]
+        self.sites: Dict[Tuple[str, int], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.max_per_window <= 0 or record.levelno >= self.exempt_level:
+            return True
+
+        now = time.monotonic()
+        key = (record.pathname, record.lineno)
+        with self._lock:
+            site = self.sites.get(key)
+            if site is None:
+                site = self.sites[key] = [now, 0, 0]
+            if now - site[0] >= self.window:
+                suppressed = site[2]
+                site[0], site[1], site[2] = now, 0, 0
+                if suppressed:
+                    record.msg = f"{record.getMessage()} (+{suppressed} similar suppressed)"
+                    record.args = None
+                    record.suppressed = suppressed
+            if site[1] >= self.max_per_window:
+                site[2] += 1
+                LOG_RECORDS_DROPPED.inc(reason='rate_limited')
+                return False
+            site[1] += 1
+        return True
+
+
+class TraceContextFilter(logging.Filter):
+    """Stamps the current OTP trace_id while still on the caller's task/thread"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, 'trace_id'):
+            from tracing import TRACER
+            trace_id = TRACER.current_trace_id()
+            if trace_id:
+                record.trace_id = trace_id
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Never blocks the caller: records are dropped (and counted) when the queue is full"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render the message here (args may not be thread-safe later) but keep
+        # the exception text separate so the JSON formatter can put it in its own key
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc(reason='queue_full')
+
+
+def setup_logging(level: Optional[str] = None, log_file: Optional[str] = None,
+                  json_format: Optional[bool] = None, queue_size: int = 10000):
+    """Configure the root logger once per process; later calls are no-ops"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+
+        level = (level or os.getenv('LOG_LEVEL', 'INFO')).upper()
+        log_file = os.getenv('LOG_FILE', log_file)
+        if json_format is None:
+            json_format = os.getenv('LOG_FORMAT', 'text').lower() == 'json'
+        formatter = JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT)
+
+        # The handlers that actually do I/O run on the listener thread
+        outputs = [logging.StreamHandler()]
+        if log_file:
+            outputs.append(logging.handlers.RotatingFileHandler(
+                log_file,
+                maxBytes=int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024))),
+                backupCount=int(os.getenv('LOG_BACKUP_COUNT', '5')),
+                encoding='utf-8',
+            ))
+        for output in outputs:
+            output.setFormatter(formatter)
+
+        handler = NonBlockingQueueHandler(queue.Queue(maxsize=queue_size))
+        handler.addFilter(RateLimitFilter(
+            max_per_window=int(os.getenv('LOG_RATE_LIMIT', '60')),
+            window=float(os.getenv('LOG_RATE_WINDOW', '60')),
+        ))
+        handler.addFilter(TraceContextFilter())
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel(level)
+
+        # Chatty client libraries: request lines at INFO on every poll/send
+        for noisy in ('httpx', 'httpcore', 'urllib3', 'hpack'):
+            logging.getLogger(noisy).setLevel(logging.WARNING)
+
+        _listener = logging.handlers.QueueListener(handler.queue, *outputs, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Flush queued records (registered with atexit)"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
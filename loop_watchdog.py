@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Event Loop Watchdog
+Detects blocking calls on the asyncio loop. A heartbeat coroutine ticks on
+the loop; a watcher thread notices when the tick is late, samples the loop
+thread's stack with sys._current_frames() while it is still blocked, and
+attributes the stall to the innermost project function on that stack
+(e.g. is_number_in_cooldown, check_for_messages). The same heartbeat's lag
+feeds the health server's liveness check.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Dict, Optional
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# Only frames from this directory count as "our" code when naming offenders
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+LOOP_STALLS = REGISTRY.counter(
+    'event_loop_stalls_total', 'Event loop stalls beyond the watchdog threshold', ['function'])
+LOOP_STALL_DURATION = REGISTRY.histogram(
+    'event_loop_stall_seconds', 'Duration of event loop stalls', ['function'],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+LOOP_LAG = REGISTRY.gauge('event_loop_lag_seconds', 'Current event loop heartbeat lag')
+
+
+def offender_from_frame(frame) -> str:
+    """Innermost project function on the stack, as 'function (file:line)'"""
+    fallback = None
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if fallback is None:
+            fallback = f"{frame.f_code.co_name} ({os.path.basename(filename)}:{frame.f_lineno})"
+        path = os.path.abspath(filename)
+        if path.startswith(PROJECT_DIR) and 'site-packages' not in path and path != os.path.abspath(__file__):
+            return f"{frame.f_code.co_name} ({os.path.basename(filename)}:{frame.f_lineno})"
+        frame = frame.f_back
+    return fallback or "unknown"
+
+
+class LoopWatchdog:
+    """Heartbeat on the loop + watcher thread that samples the blocked stack"""
+
+    def __init__(self, threshold_ms: float = 250.0, interval: float = 0.05, max_offenders: int = 50,
+                 lag_window: float = 60.0):
+        # A heartbeat later than this counts as a stall
+        self.threshold = threshold_ms / 1000.0
+        self.interval = interval
+        self.max_offenders = max_offenders
+
+        self.loop_thread_id: Optional[int] = None
+        self.last_beat = time.monotonic()
+        self.heartbeat_task: Optional[asyncio.Task] = None
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        # Current stall being observed by the watcher thread
+        self._stall_started: Optional[float] = None
+        self._stall_offender: Optional[str] = None
+        self._stall_stack: Optional[str] = None
+
+        # function -> {'count', 'total_ms', 'max_ms', 'stack'}; written by the
+        # watcher thread, read from the loop - guarded by _lock
+        self.offenders: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self.stalls = 0
+
+        # Heartbeat lag samples over the last lag_window seconds (also guarded by _lock)
+        self.lag = 0.0
+        self.lag_samples = deque(maxlen=max(1, int(lag_window / interval)))
+
+    def start(self):
+        """Start on the running loop"""
+        if self.heartbeat_task is not None and not self.heartbeat_task.done():
+            return
+        self.loop_thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+        self.heartbeat_task = asyncio.create_task(self._heartbeat())
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, name='loop-watchdog', daemon=True)
+        self._watcher.start()
+        logger.info(f"🐕 Loop watchdog started (threshold {self.threshold * 1000:.0f}ms)")
+
+    def stop(self):
+        self._stop.set()
+        if self.heartbeat_task:
+            self.heartbeat_task.cancel()
+
+    async def _heartbeat(self):
+        while True:
+            self.last_beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            lag = time.monotonic() - self.last_beat - self.interval
+            with self._lock:
+                self.lag = max(0.0, lag)
+                self.lag_samples.append(self.lag)
+            LOOP_LAG.set(self.lag)
+
+            if lag > self.threshold:
+                if self._stall_started is None:
+                    # Sample now, while the loop thread is still inside the blocking call
+                    frame = sys._current_frames().get(self.loop_thread_id)
+                    if frame is None:
+                        continue
+                    self._stall_started = self.last_beat + self.interval
+                    self._stall_offender = offender_from_frame(frame)
+                    self._stall_stack = "".join(traceback.format_stack(frame, limit=15))
+            elif self._stall_started is not None:
+                self._finish_stall()
+
+    def _finish_stall(self):
+        duration = self.last_beat - self._stall_started
+        offender = self._stall_offender
+        with self._lock:
+            self.stalls += 1
+            record = self.offenders.get(offender)
+            if record is None:
+                if len(self.offenders) >= self.max_offenders:
+                    offender = "other"
+                record = self.offenders.setdefault(offender, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'stack': None})
+            first_time = record['count'] == 0
+            record['count'] += 1
+            record['total_ms'] += duration * 1000
+            record['max_ms'] = max(record['max_ms'], duration * 1000)
+            record['stack'] = self._stall_stack
+
+        LOOP_STALLS.inc(function=offender)
+        LOOP_STALL_DURATION.observe(duration, function=offender)
+
+        # Full stack the first time an offender shows up, one line afterwards
+        if first_time:
+            logger.warning(f"🐢 Event loop blocked {duration * 1000:.0f}ms in {offender}\n{self._stall_stack}")
+        else:
+            logger.warning(f"🐢 Event loop blocked {duration * 1000:.0f}ms in {offender} (x{record['count']})")
+
+        self._stall_started = None
+        self._stall_offender = None
+        self._stall_stack = None
+
+    @property
+    def max_lag_ms(self) -> float:
+        """Worst heartbeat lag over the lag window"""
+        with self._lock:
+            return max(self.lag_samples, default=0.0) * 1000
+
+    def lag_stats(self) -> dict:
+        with self._lock:
+            lag = self.lag
+        return {
+            'lag_ms': round(lag * 1000, 1),
+            'max_lag_ms': round(self.max_lag_ms, 1),
+        }
+
+    def get_stats(self) -> dict:
+        """Worst offenders first"""
+        with self._lock:
+            records = [(name, dict(record)) for name, record in self.offenders.items()]
+            stalls = self.stalls
+        ranked = sorted(records, key=lambda item: item[1]['total_ms'], reverse=True)
+        # The watcher thread may clear it at any moment
+        stall_started = self._stall_started
+        return {
+            'threshold_ms': round(self.threshold * 1000),
+            'stalls': stalls,
+            'blocked_now_ms': round((time.monotonic() - stall_started) * 1000) if stall_started else 0,
+            'offenders': [
+                {
+                    'function': name,
+                    'count': record['count'],
+                    'total_ms': round(record['total_ms']),
+                    'max_ms': round(record['max_ms']),
+                }
+                for name, record in ranked[:10]
+            ],
+        }
+
+
+# Process-wide watchdog
+WATCHDOG = LoopWatchdog(threshold_ms=float(os.getenv('LOOP_STALL_THRESHOLD_MS', '250')))
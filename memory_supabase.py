@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+In-memory Supabase
+Stand-in for the Supabase table API the bots use (select/insert/upsert/
+update/delete with eq/neq/gt/gte/lt/lte/in_/order/limit/range and
+count='exact') backed by plain dicts. max_rows caps select responses like
+PostgREST's max-rows setting. Every execute() is counted per table/operation and
+can be delayed by a configurable latency, so benchmarks can measure how
+many round trips a flow costs without a network.
+
+    db = MemorySupabase(latency_ms=5)
+    db.seed('approved_users', [{'user_id': 1, 'is_active': True}])
+    bot = TelegramNumberBot(supabase_client=db)
+"""
+
+import collections
+import copy
+import itertools
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class QueryResult:
+    """Mirrors postgrest's APIResponse: .data rows and .count for count='exact'"""
+
+    def __init__(self, data: List[Dict], count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+    def __repr__(self):
+        return f"QueryResult(rows={len(self.data)}, count={self.count})"
+
+
+def _compare(op: str, value: Any, expected: Any) -> bool:
+    if op == 'eq':
+        return value == expected
+    if op == 'neq':
+        return value != expected
+    if op == 'in':
+        return value in expected
+    if value is None or expected is None:
+        return False
+    try:
+        if op == 'gt':
+            return value > expected
+        if op == 'gte':
+            return value >= expected
+        if op == 'lt':
+            return value < expected
+        if op == 'lte':
+            return value <= expected
+    except TypeError:
+        # Mixed types (e.g. int column vs ISO string) never match, like a failed cast
+        return False
+    raise ValueError(f"Unsupported filter: {op}")
+
+
+class MemoryQuery:
+    """Chained query builder; nothing happens until execute()"""
+
+    def __init__(self, db: 'MemorySupabase', table: str):
+        self._db = db
+        self._table = table
+        self._operation = 'select'
+        self._columns: Optional[List[str]] = None
+        self._count: Optional[str] = None
+        self._payload: Any = None
+        self._on_conflict: Optional[str] = None
+        self._filters: List[tuple] = []
+        self._order: List[tuple] = []
+        self._limit: Optional[int] = None
+        self._offset = 0
+
+    # ----- operations -----
+
+    def select(self, *columns: str, count: Optional[str] = None) -> 'MemoryQuery':
+        self._operation = 'select'
+        names = [name.strip() for column in columns for name in column.split(',') if name.strip()]
+        self._columns = None if not names or '*' in names else names
+        self._count = count
+        return self
+
+    def insert(self, payload, **kwargs) -> 'MemoryQuery':
+        self._operation = 'insert'
+        self._payload = payload
+        return self
+
+    def upsert(self, payload, on_conflict: str = 'id', **kwargs) -> 'MemoryQuery':
+        self._operation = 'upsert'
+        self._payload = payload
+        self._on_conflict = on_conflict
+        return self
+
+    def update(self, payload, **kwargs) -> 'MemoryQuery':
+        self._operation = 'update'
+        self._payload = payload
+        return self
+
+    def delete(self, **kwargs) -> 'MemoryQuery':
+        self._operation = 'delete'
+        return self
+
+    # ----- filters and modifiers -----
+
+    def _filter(self, op: str, column: str, value) -> 'MemoryQuery':
+        self._filters.append((op, column, value))
+        return self
+
+    def eq(self, column: str, value) -> 'MemoryQuery':
+        return self._filter('eq', column, value)
+
+    def neq(self, column: str, value) -> 'MemoryQuery':
+        return self._filter('neq', column, value)
+
+    def gt(self, column: str, value) -> 'MemoryQuery':
+        return self._filter('gt', column, value)
+
+    def gte(self, column: str, value) -> 'MemoryQuery':
+        return self._filter('gte', column, value)
+
+    def lt(self, column: str, value) -> 'MemoryQuery':
+        return self._filter('lt', column, value)
+
+    def lte(self, column: str, value) -> 'MemoryQuery':
+        return self._filter('lte', column, value)
+
+    def in_(self, column: str, values: Iterable) -> 'MemoryQuery':
+        return self._filter('in', column, set(values))
+
+    def order(self, column: str, desc: bool = False, **kwargs) -> 'MemoryQuery':
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, size: int, **kwargs) -> 'MemoryQuery':
+        self._limit = size
+        return self
+
+    def range(self, start: int, end: int, **kwargs) -> 'MemoryQuery':
+        """Rows start..end inclusive, as postgrest-py's range()"""
+        self._offset = start
+        self._limit = end - start + 1
+        return self
+
+    def _matches(self, row: Dict) -> bool:
+        return all(_compare(op, row.get(column), value) for op, column, value in self._filters)
+
+    # ----- execution -----
+
+    def execute(self) -> QueryResult:
+        self._db._record(self._table, self._operation, self._filters)
+        with self._db._lock:
+            rows = self._db.tables[self._table]
+            result = getattr(self, f"_execute_{self._operation}")(rows)
+        return result
+
+    def _execute_select(self, rows: List[Dict]) -> QueryResult:
+        matched = [row for row in rows if self._matches(row)]
+        for column, desc in reversed(self._order):
+            # None sorts last, as in Postgres' default ordering
+            matched.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=desc)
+        count = len(matched) if self._count else None
+        matched = matched[self._offset:]
+        if self._limit is not None:
+            matched = matched[:self._limit]
+        if self._db.max_rows is not None:
+            matched = matched[:self._db.max_rows]
+        if self._columns is not None:
+            matched = [{column: row.get(column) for column in self._columns} for row in matched]
+        return QueryResult(copy.deepcopy(matched), count)
+
+    def _rows_from_payload(self) -> List[Dict]:
+        payload = self._payload if isinstance(self._payload, list) else [self._payload]
+        return [dict(row) for row in payload]
+
+    def _execute_insert(self, rows: List[Dict]) -> QueryResult:
+        inserted = [self._db._with_id(self._table, row) for row in self._rows_from_payload()]
+        rows.extend(inserted)
+        return QueryResult(copy.deepcopy(inserted))
+
+    def _execute_upsert(self, rows: List[Dict]) -> QueryResult:
+        keys = [key.strip() for key in self._on_conflict.split(',')]
+        written = []
+        for new_row in self._rows_from_payload():
+            existing = next((row for row in rows
+                             if all(row.get(key) == new_row.get(key) for key in keys)), None)
+            if existing is not None:
+                existing.update(new_row)
+                written.append(existing)
+            else:
+                row = self._db._with_id(self._table, new_row)
+                rows.append(row)
+                written.append(row)
+        return QueryResult(copy.deepcopy(written))
+
+    def _execute_update(self, rows: List[Dict]) -> QueryResult:
+        updated = []
+        for row in rows:
+            if self._matches(row):
+                row.update(self._payload)
+                updated.append(row)
+        return QueryResult(copy.deepcopy(updated))
+
+    def _execute_delete(self, rows: List[Dict]) -> QueryResult:
+        deleted = [row for row in rows if self._matches(row)]
+        rows[:] = [row for row in rows if not self._matches(row)]
+        return QueryResult(deleted)
+
+
+class MemorySupabase:
+    """Supabase client stand-in: tables are lists of row dicts; queries are counted"""
+
+    def __init__(self, latency_ms: float = 0.0, keep_log: bool = True, max_rows: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.keep_log = keep_log
+        # Response row cap (Supabase's default is 1000) - None for unlimited
+        self.max_rows = max_rows
+        self.tables: Dict[str, List[Dict]] = collections.defaultdict(list)
+        self.counts = collections.Counter()
+        # (table, operation, filtered columns) per query, for pinpointing N+1 loops
+        self.log: List[tuple] = []
+        self._ids: Dict[str, itertools.count] = collections.defaultdict(lambda: itertools.count(1))
+        self._lock = threading.Lock()
+
+    def table(self, name: str) -> MemoryQuery:
+        return MemoryQuery(self, name)
+
+    def seed(self, table: str, rows: Iterable[Dict]):
+        """Load rows without counting them as queries"""
+        with self._lock:
+            self.tables[table].extend(self._with_id(table, dict(row)) for row in rows)
+
+    def _with_id(self, table: str, row: Dict) -> Dict:
+        if row.get('id') is None:
+            row['id'] = next(self._ids[table])
+        return row
+
+    def _record(self, table: str, operation: str, filters: List[tuple]):
+        with self._lock:
+            self.counts[(table, operation)] += 1
+            if self.keep_log:
+                self.log.append((table, operation, tuple(column for _, column, _ in filters)))
+        if self.latency_ms:
+            # Blocking, like the real synchronous client
+            time.sleep(self.latency_ms / 1000)
+
+    @property
+    def query_count(self) -> int:
+        return sum(self.counts.values())
+
+    def reset_counts(self):
+        with self._lock:
+            self.counts.clear()
+            self.log.clear()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                'queries': sum(self.counts.values()),
+                'by_table': {f"{table}.{operation}": count
+                             for (table, operation), count in sorted(self.counts.items())},
+                'rows': {table: len(rows) for table, rows in sorted(self.tables.items())},
+            }
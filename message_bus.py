@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Local Message Bus
+Tiny JSON-lines pub/sub broker over a Unix socket (or TCP) so the panel
+monitor and the Telegram user bot can run as separate processes.
+
+- Monitor publishes `otp` events; the user bot delivers them to users
+- User bot publishes `sessions` snapshots of numbers awaiting OTP (retained);
+  the monitor keeps a read-only copy for targeted/adaptive polling
+- Clients reconnect on their own, so either side can restart independently
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from tracing import TRACER
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUS_ADDRESS = "unix:///tmp/otp_bot_bus.sock"
+
+# Per-line read limit (asyncio's default is 64 KiB, too small for snapshots)
+MAX_LINE_BYTES = 16 * 1024 * 1024
+
+# Topics
+TOPIC_OTP = "otp"
+TOPIC_SESSIONS = "sessions"
+
+
+def bus_address() -> str:
+    """Bus address from MESSAGE_BUS_ADDRESS (unix:///path or tcp://host:port)"""
+    return os.getenv('MESSAGE_BUS_ADDRESS', DEFAULT_BUS_ADDRESS)
+
+
+def parse_address(address: str):
+    """Split an address into ('unix', path) or ('tcp', (host, port))"""
+    if address.startswith('unix://'):
+        return 'unix', address[len('unix://'):]
+    if address.startswith('tcp://'):
+        host, _, port = address[len('tcp://'):].rpartition(':')
+        return 'tcp', (host or '127.0.0.1', int(port))
+    raise ValueError(f"Unsupported bus address: {address}")
+
+
+def encode(message: dict) -> bytes:
+    return (json.dumps(message, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+async def read_line(reader: asyncio.StreamReader) -> Optional[bytes]:
+    """Next line from the stream; None when an oversized line was skipped"""
+    try:
+        return await reader.readline()
+    except ValueError:
+        # Line over MAX_LINE_BYTES: readline() discards it, the connection stays usable
+        logger.warning("⚠️ Bus: dropped oversized message")
+        return None
+
+
+class _Subscriber:
+    """One connected client with a bounded outbound queue"""
+
+    def __init__(self, writer: asyncio.StreamWriter, max_queue: int):
+        self.writer = writer
+        self.topics: Set[str] = set()
+        self.queue: deque = deque(maxlen=max_queue)
+        self.ready = asyncio.Event()
+        self.dropped = 0
+
+    def offer(self, payload: bytes):
+        if len(self.queue) == self.queue.maxlen:
+            # Slow consumer - drop the oldest message instead of growing
+            self.dropped += 1
+        self.queue.append(payload)
+        self.ready.set()
+
+
+class MessageBusServer:
+    """Broker: fans published messages out to subscribers, keeps retained messages"""
+
+    def __init__(self, address: Optional[str] = None, max_queue: int = 1000):
+        self.address = address or bus_address()
+        self.max_queue = max_queue
+        self.subscribers: List[_Subscriber] = []
+
+        # topic -> last retained payload, replayed to new subscribers
+        self.retained: Dict[str, bytes] = {}
+
+        self.published = 0
+        self.server = None
+
+    async def start(self):
+        kind, target = parse_address(self.address)
+        if kind == 'unix':
+            if os.path.exists(target):
+                os.unlink(target)
+            self.server = await asyncio.start_unix_server(
+                self._handle_client, path=target, limit=MAX_LINE_BYTES
+            )
+        else:
+            self.server = await asyncio.start_server(
+                self._handle_client, host=target[0], port=target[1], limit=MAX_LINE_BYTES
+            )
+        logger.info(f"🚌 Message bus listening on {self.address}")
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        subscriber = _Subscriber(writer, self.max_queue)
+        self.subscribers.append(subscriber)
+        sender = asyncio.create_task(self._send_loop(subscriber))
+        try:
+            while True:
+                line = await read_line(reader)
+                if line is None:
+                    continue
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    logger.warning("⚠️ Bus: ignoring malformed message")
+                    continue
+
+                op = message.get('op')
+                if op == 'subscribe':
+                    for topic in message.get('topics', []):
+                        subscriber.topics.add(topic)
+                        if topic in self.retained:
+                            subscriber.offer(self.retained[topic])
+                elif op == 'publish':
+                    self._publish(message, line)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            sender.cancel()
+            self.subscribers.remove(subscriber)
+            writer.close()
+
+    def _publish(self, message: dict, line: bytes):
+        topic = message.get('topic')
+        payload = line if line.endswith(b'\n') else line + b'\n'
+        self.published += 1
+        if message.get('retain'):
+            self.retained[topic] = payload
+        for subscriber in self.subscribers:
+            if topic in subscriber.topics:
+                subscriber.offer(payload)
+
+    async def _send_loop(self, subscriber: _Subscriber):
+        try:
+            while True:
+                await subscriber.ready.wait()
+                subscriber.ready.clear()
+                while subscriber.queue:
+                    subscriber.writer.write(subscriber.queue.popleft())
+                await subscriber.writer.drain()
+        except ConnectionError:
+            # Reader side notices the disconnect and cleans up
+            pass
+
+    def get_stats(self) -> dict:
+        return {
+            'subscribers': len(self.subscribers),
+            'published': self.published,
+            'retained_topics': sorted(self.retained),
+            'dropped': sum(s.dropped for s in self.subscribers),
+        }
+
+
+class MessageBusClient:
+    """Reconnecting bus client: publish while connected, buffer (bounded) while not"""
+
+    def __init__(self, address: Optional[str] = None, name: str = "client",
+                 reconnect_delay: float = 1.0, max_pending: int = 1000):
+        self.address = address or bus_address()
+        self.name = name
+        self.reconnect_delay = reconnect_delay
+
+        self.handlers: Dict[str, List[Callable[[dict], Awaitable[None]]]] = {}
+        self.pending: deque = deque(maxlen=max_pending)
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.connected = asyncio.Event()
+
+        self.received = 0
+        self.sent = 0
+        self.reconnects = 0
+
+    def subscribe(self, topic: str, handler: Callable[[dict], Awaitable[None]]):
+        """Register an async handler for a topic (before run())"""
+        self.handlers.setdefault(topic, []).append(handler)
+
+    def publish(self, topic: str, data: dict, retain: bool = False):
+        """Queue a message; sent immediately when connected"""
+        payload = encode({'op': 'publish', 'topic': topic, 'data': data, 'retain': retain, 'ts': time.time()})
+        if self.writer is not None:
+            try:
+                self.writer.write(payload)
+                self.sent += 1
+                return
+            except Exception:
+                self.writer = None
+        self.pending.append(payload)
+
+    async def _connect(self):
+        kind, target = parse_address(self.address)
+        if kind == 'unix':
+            return await asyncio.open_unix_connection(path=target, limit=MAX_LINE_BYTES)
+        return await asyncio.open_connection(host=target[0], port=target[1], limit=MAX_LINE_BYTES)
+
+    async def run(self):
+        """Connect, subscribe and dispatch forever, reconnecting on failure"""
+        while True:
+            try:
+                reader, writer = await self._connect()
+            except OSError as e:
+                logger.debug(f"Bus connect failed ({self.name}): {e}")
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+
+            if self.handlers:
+                writer.write(encode({'op': 'subscribe', 'topics': list(self.handlers)}))
+            while self.pending:
+                writer.write(self.pending.popleft())
+                self.sent += 1
+            self.writer = writer
+            self.connected.set()
+            logger.info(f"🚌 {self.name} connected to message bus")
+
+            try:
+                while True:
+                    line = await read_line(reader)
+                    if line is None:
+                        continue
+                    if not line:
+                        break
+                    await self._dispatch(line)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                pass
+            finally:
+                self.writer = None
+                self.connected.clear()
+                writer.close()
+
+            self.reconnects += 1
+            logger.warning(f"⚠️ {self.name} lost message bus connection, reconnecting...")
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _dispatch(self, line: bytes):
+        try:
+            message = json.loads(line)
+        except ValueError:
+            return
+        self.received += 1
+        for handler in self.handlers.get(message.get('topic'), []):
+            try:
+                await handler(message.get('data') or {})
+            except Exception as e:
+                logger.error(f"❌ Bus handler error ({message.get('topic')}): {e}")
+
+
+class RemoteNumberBot:
+    """Monitor-side stand-in for TelegramNumberBot when the user bot runs in another process"""
+
+    def __init__(self, client: MessageBusClient):
+        self.client = client
+
+        # Read-only mirror of the user bot's sessions (user_id -> session)
+        self.user_sessions: Dict[str, Dict] = {}
+        client.subscribe(TOPIC_SESSIONS, self._on_sessions)
+
+    async def _on_sessions(self, data: dict):
+        self.user_sessions = data.get('sessions', {})
+
+    async def notify_user_otp(self, number: str, otp_code: str, service: str, full_message: str):
+        """Hand the OTP to the user bot process (with the trace correlation ID)"""
+        self.client.publish(TOPIC_OTP, {
+            'number': number,
+            'otp_code': otp_code,
+            'service': service,
+            'full_message': full_message,
+            'trace_id': TRACER.current_trace_id(),
+        })
+
+
+class NumberBotBridge:
+    """User-bot side: delivers bus OTPs and publishes session snapshots"""
+
+    def __init__(self, number_bot, client: MessageBusClient, snapshot_interval: float = 30.0):
+        self.number_bot = number_bot
+        self.client = client
+        self.snapshot_interval = snapshot_interval
+        client.subscribe(TOPIC_OTP, self._on_otp)
+
+        # Session changes push a snapshot right away
+        number_bot.session_listeners.append(self.publish_sessions)
+
+    async def _on_otp(self, data: dict):
+        # Continue the monitor's trace under the same correlation ID
+        with TRACER.trace('otp_delivery', trace_id=data.get('trace_id'), number=data['number']):
+            await self.number_bot.notify_user_otp(
+                data['number'], data['otp_code'], data['service'], data['full_message']
+            )
+
+    def publish_sessions(self):
+        # Only sessions waiting for an OTP matter to the monitor; keeps the
+        # retained snapshot small however many users the bot has
+        sessions = {
+            str(user_id): {
+                'number': session.get('number'),
+                'country': session.get('country'),
+                'waiting_for_otp': session.get('waiting_for_otp', False),
+            }
+            for user_id, session in list(self.number_bot.user_sessions.items())
+            if session.get('waiting_for_otp')
+        }
+        self.client.publish(TOPIC_SESSIONS, {'sessions': sessions}, retain=True)
+
+    async def run(self):
+        """Periodic snapshot so a restarted monitor converges quickly"""
+        while True:
+            self.publish_sessions()
+            await asyncio.sleep(self.snapshot_interval)
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Metrics Registry
+Prometheus-style counters, gauges and histograms for the OTP pipeline,
+rendered in the text exposition format and served at /metrics by the
+health server. No client library needed - only what the bot uses.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Tuple
+
+# Latency buckets (seconds) - panel polls and Telegram sends are 10ms..30s
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _label_key(label_names: Tuple[str, ...], labels: Dict[str, str]) -> Tuple[str, ...]:
+    if set(labels) != set(label_names):
+        raise ValueError(f"Expected labels {label_names}, got {tuple(labels)}")
+    return tuple(str(labels[name]) for name in label_names)
+
+
+def _format_labels(label_names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(label_names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    """Common bits: name, help, label names, per-label-set values"""
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        # Pollers run in worker threads - updates must not race
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(self.label_names, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(self.label_names, labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Value that goes up and down"""
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = _label_key(self.label_names, labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(self.label_names, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(self.label_names, labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Bucketed observations with sum and count"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = _label_key(self.label_names, labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0}
+            state['counts'][bisect.bisect_left(self.buckets, value)] += 1
+            state['sum'] += value
+            state['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a with-block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        state = self._values.get(_label_key(self.label_names, labels))
+        return state['count'] if state else 0
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        with self._lock:
+            items = sorted((key, dict(state, counts=list(state['counts']))) for key, state in self._values.items())
+        for key, state in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), state['counts']):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(state['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {state['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics; creating an existing name returns the same metric"""
+
+    def __init__(self):
+        self.metrics: Dict[str, _Metric] = {}
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        metric = self.metrics.get(name)
+        if metric is None:
+            metric = self.metrics[name] = cls(name, *args, **kwargs)
+        elif not isinstance(metric, cls):
+            raise ValueError(f"Metric {name} already registered as {metric.kind}")
+        return metric
+
+    def counter(self, name: str, documentation: str, label_names: Iterable[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, label_names)
+
+    def gauge(self, name: str, documentation: str, label_names: Iterable[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, label_names)
+
+    def histogram(self, name: str, documentation: str, label_names: Iterable[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, label_names, buckets=buckets)
+
+    def render(self) -> str:
+        """Prometheus text exposition format"""
+        lines = []
+        for name in sorted(self.metrics):
+            lines.extend(self.metrics[name].render())
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry
+REGISTRY = MetricsRegistry()
+
+# OTP pipeline metrics
+POLL_DURATION = REGISTRY.histogram(
+    'otp_poll_duration_seconds', 'Panel poll latency (logout check + AJAX queries)', ['account', 'mode'])
+POLL_ERRORS = REGISTRY.counter(
+    'otp_poll_errors_total', 'Failed panel polls', ['account'])
+ROWS_FETCHED = REGISTRY.counter(
+    'otp_panel_rows_fetched_total', 'SMS rows fetched from the panel', ['account'])
+NEW_OTPS = REGISTRY.counter(
+    'otp_new_total', 'New OTPs delivered', ['account'])
+DEDUP_HITS = REGISTRY.counter(
+    'otp_dedup_hits_total', 'OTP rows skipped because they were already processed', ['account'])
+EXTRACTION_DURATION = REGISTRY.histogram(
+    'otp_extraction_seconds', 'OTP extraction time per message',
+    buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01))
+TELEGRAM_SEND_DURATION = REGISTRY.histogram(
+    'otp_telegram_send_seconds', 'Telegram send latency', ['target'])
+TELEGRAM_SEND_RETRIES = REGISTRY.counter(
+    'otp_telegram_send_retries_total', 'Telegram sends retried (e.g. Markdown fallback)', ['target'])
+TELEGRAM_SEND_FAILURES = REGISTRY.counter(
+    'otp_telegram_send_failures_total', 'Telegram sends that failed for good', ['target'])
+CHANNEL_QUEUE_DELAY = REGISTRY.histogram(
+    'otp_channel_queue_delay_seconds', 'Time a channel post waited in the background queue',
+    buckets=(0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0))
+CHANNEL_QUEUE_DEPTH = REGISTRY.gauge(
+    'otp_channel_queue_depth', 'Channel posts waiting in the background queue')
+CHANNEL_POSTS_DROPPED = REGISTRY.counter(
+    'otp_channel_posts_dropped_total', 'Channel posts dropped because the background queue was full')
+SUPABASE_QUERY_DURATION = REGISTRY.histogram(
+    'supabase_query_seconds', 'Supabase query latency', ['table', 'operation'])
+SUPABASE_QUERY_ERRORS = REGISTRY.counter(
+    'supabase_query_errors_total', 'Supabase queries that raised', ['table', 'operation'])
+NUMBER_ASSIGNMENT_DURATION = REGISTRY.histogram(
+    'number_assignment_seconds', 'Time to find and assign a number to a user', ['country'])
+
+
+class _InstrumentedQuery:
+    """Wraps a Supabase query builder; times execute() per table/operation"""
+
+    OPERATIONS = ('select', 'insert', 'update', 'upsert', 'delete')
+
+    def __init__(self, builder, table: str, operation: str = 'select'):
+        self._builder = builder
+        self._table = table
+        self._operation = operation
+
+    def __getattr__(self, name):
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            operation = name if name in self.OPERATIONS else self._operation
+            # Builder methods chain - keep wrapping until execute()
+            if name != 'execute' and result is not None and hasattr(result, 'execute'):
+                return _InstrumentedQuery(result, self._table, operation)
+            return result
+
+        if name == 'execute':
+            def execute(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return attr(*args, **kwargs)
+                except Exception:
+                    SUPABASE_QUERY_ERRORS.inc(table=self._table, operation=self._operation)
+                    raise
+                finally:
+                    SUPABASE_QUERY_DURATION.observe(time.perf_counter() - start,
+                                                    table=self._table, operation=self._operation)
+            return execute
+        return call
+
+
+class InstrumentedSupabase:
+    """Drop-in proxy for a Supabase client that records per-table query latency"""
+
+    def __init__(self, client):
+        self._client = client
+
+    def table(self, name: str):
+        return _InstrumentedQuery(self._client.table(name), name)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
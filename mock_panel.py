@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Mock SMS Panel
+Local stand-in for the SMS panel so the monitors can be measured offline:
+
+- GET  /ints/login                         login form with the "A + B" captcha
+- POST /ints/signin                        checks credentials + captcha, sets the session
+- GET  /ints/client/SMSCDRStats            SMS table page (redirects to login when expired)
+- POST /ints/client/res/data_smscdr.php    DataTables JSON (fdate1/fdate2/fnum/frange, start/length)
+
+SMS rows arrive at a configurable rate (Poisson), every response can be
+delayed, sessions expire after a fixed lifetime and a fraction of data
+requests (SMS page, AJAX) can fail with HTTP 500. The time each row was
+injected is kept, so a benchmark can measure detection latency exactly
+(panel timestamps only have second precision).
+
+Run standalone:  python mock_panel.py --port 8080 --rate 5
+Then point a monitor at it with PANEL_BASE_URL=http://127.0.0.1:8080/ints
+"""
+
+import argparse
+import html
+import json
+import logging
+import random
+import secrets
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+# (range name, country code) - numbers are generated inside these ranges
+DEFAULT_RANGES = [
+    ('Nigeria MTN', '2348'),
+    ('Kenya Safaricom', '2547'),
+    ('Indonesia Telkomsel', '62812'),
+    ('Pakistan Jazz', '92300'),
+]
+
+SERVICES = [
+    ('WhatsApp', "Your WhatsApp code {code}\nDon't share this code with others"),
+    ('Facebook', "{code} is your Facebook confirmation code"),
+    ('Telegram', "Telegram code: {code}. Do not give this code to anyone"),
+    ('Google', "G-{code} is your Google verification code."),
+]
+
+
+class MockPanel:
+    """Panel state (rows, sessions) plus the HTTP server serving it"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, username: str = 'bench', password: str = 'bench',
+                 rate: float = 2.0, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 session_ttl: float = 0.0, error_rate: float = 0.0, numbers_per_range: int = 50,
+                 max_rows: int = 100000, seed: Optional[int] = None):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+
+        # SMS arrivals per second (0 = only rows added with inject())
+        self.rate = rate
+        # Per-request delay and failure injection
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        # Seconds a login stays valid (0 = forever)
+        self.session_ttl = session_ttl
+        self.max_rows = max_rows
+
+        self.random = random.Random(seed)
+        self.numbers: List[Tuple[str, str]] = [
+            (range_name, f"{prefix}{self.random.randrange(10 ** (11 - len(prefix)), 10 ** (12 - len(prefix)))}")
+            for range_name, prefix in DEFAULT_RANGES
+            for _ in range(numbers_per_range)
+        ]
+
+        # Rows newest last: [timestamp, range, number, cli, message, currency, payout]
+        self.rows: List[list] = []
+        # (number, message) -> time.time() the row became visible
+        self.injected_at: Dict[Tuple[str, str], float] = {}
+        # session id -> {'captcha': int, 'logged_in_at': float or None}
+        self.sessions: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+        self.stats = {'logins': 0, 'failed_logins': 0, 'page_requests': 0, 'ajax_requests': 0,
+                      'errors_injected': 0, 'expired_sessions': 0}
+
+        self.server: Optional[ThreadingHTTPServer] = None
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/ints"
+
+    # ----- data -----
+
+    def inject(self, number: Optional[str] = None, service: Optional[str] = None,
+               range_name: Optional[str] = None) -> list:
+        """Add one SMS row now; returns the row"""
+        if number is None:
+            range_name, number = self.random.choice(self.numbers)
+        cli, template = next((s for s in SERVICES if s[0] == service), None) or self.random.choice(SERVICES)
+        code = f"{self.random.randrange(100, 1000)}-{self.random.randrange(100, 1000)}"
+        message = template.format(code=code)
+        now = time.time()
+        row = [datetime.fromtimestamp(now).strftime('%Y-%m-%d %H:%M:%S'), range_name or 'Unknown',
+               number, cli, message, '$', 0.005]
+        with self._lock:
+            self.rows.append(row)
+            self.injected_at[(number, message)] = now
+            if len(self.rows) > self.max_rows:
+                dropped = self.rows[:len(self.rows) - self.max_rows]
+                del self.rows[:len(dropped)]
+                for old in dropped:
+                    self.injected_at.pop((old[2], old[4]), None)
+        return row
+
+    def query(self, params: Dict[str, str]) -> dict:
+        """DataTables response for the SMS CDR endpoint, newest first"""
+        fdate1 = params.get('fdate1', '')
+        fdate2 = params.get('fdate2', '') or '9999'
+        fnum = params.get('fnum', '')
+        frange = params.get('frange', '')
+        start = int(params.get('start', 0) or 0)
+        length = int(params.get('length', 25) or 25)
+
+        with self._lock:
+            total = len(self.rows)
+            matched = [
+                row for row in reversed(self.rows)
+                if fdate1 <= row[0] <= fdate2
+                and (not fnum or fnum in row[2])
+                and (not frange or frange == row[1])
+            ]
+        page = [list(row) for row in matched[start:start + length]]
+        # The real panel appends a totals row to every page
+        page.append([f"0,0,0,{len(page)}", 0, 0, 0, 0, 0, 0])
+        return {
+            'sEcho': int(params.get('draw', 1) or 1),
+            'iTotalRecords': total,
+            'iTotalDisplayRecords': len(matched),
+            'aaData': page,
+        }
+
+    def latest_rows(self, limit: int = 50) -> List[list]:
+        with self._lock:
+            return [list(row) for row in self.rows[-limit:][::-1]]
+
+    # ----- sessions -----
+
+    def new_session(self) -> Tuple[str, int, int]:
+        sid = secrets.token_hex(13)
+        a, b = self.random.randrange(1, 20), self.random.randrange(1, 20)
+        with self._lock:
+            self.sessions[sid] = {'captcha': a + b, 'logged_in_at': None}
+        return sid, a, b
+
+    def login(self, sid: Optional[str], form: Dict[str, str]) -> Optional[str]:
+        """None on success, otherwise the error the real panel shows"""
+        with self._lock:
+            session = self.sessions.get(sid or '')
+            if session is None:
+                return "Captcha Verification Failed"
+            if str(session['captcha']) != form.get('capt', '').strip():
+                self.stats['failed_logins'] += 1
+                return "Captcha Verification Failed"
+            if form.get('username') != self.username or form.get('password') != self.password:
+                self.stats['failed_logins'] += 1
+                return "Username/Password Invalid"
+            session['logged_in_at'] = time.time()
+            self.stats['logins'] += 1
+        return None
+
+    def is_authenticated(self, sid: Optional[str]) -> bool:
+        with self._lock:
+            session = self.sessions.get(sid or '')
+            if session is None or session['logged_in_at'] is None:
+                return False
+            if self.session_ttl and time.time() - session['logged_in_at'] > self.session_ttl:
+                session['logged_in_at'] = None
+                self.stats['expired_sessions'] += 1
+                return False
+            return True
+
+    # ----- lifecycle -----
+
+    def _arrivals(self):
+        """Poisson arrivals at self.rate rows/second"""
+        while not self._stop.is_set():
+            if self.rate <= 0:
+                self._stop.wait(0.1)
+                continue
+            if self._stop.wait(self.random.expovariate(self.rate)):
+                break
+            # Rate may have been set to 0 (paused) while waiting
+            if self.rate > 0:
+                self.inject()
+
+    def start(self) -> 'MockPanel':
+        self.server = ThreadingHTTPServer((self.host, self.port), _handler_for(self))
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self.server.serve_forever, name='mock-panel-http', daemon=True),
+            threading.Thread(target=self._arrivals, name='mock-panel-arrivals', daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"🧪 Mock panel on {self.base_url} ({self.rate}/s, {self.latency_ms}ms latency)")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return dict(self.stats, rows=len(self.rows), sessions=len(self.sessions))
+
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html><head><title>Login</title></head>
+<body>
+<form action="signin" method="post">
+<input type="text" name="username" id="username" value="">
+<input type="password" name="password" id="password" value="">
+<label for="capt">What is {a} + {b} = ?</label>
+<input type="text" name="capt" id="capt" value="">
+<button type="submit">Login</button>
+</form>
+{error}
+</body></html>"""
+
+SMS_PAGE = """<!DOCTYPE html>
+<html><head><title>SMS CDR Stats</title></head>
+<body>
+<a href="logout">Logout</a>
+<table>
+<thead><tr><th>Date</th><th>Range</th><th>Number</th><th>CLI</th><th>SMS</th></tr></thead>
+<tbody>{rows}</tbody>
+</table>
+</body></html>"""
+
+
+def _handler_for(panel: MockPanel):
+    class PanelHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _sid(self) -> Optional[str]:
+            for part in self.headers.get('Cookie', '').split(';'):
+                name, _, value = part.strip().partition('=')
+                if name == 'PHPSESSID':
+                    return value
+            return None
+
+        def _form(self) -> Dict[str, str]:
+            length = int(self.headers.get('Content-Length', 0) or 0)
+            body = self.rfile.read(length).decode('utf-8', 'replace') if length else ''
+            return {key: values[0] for key, values in parse_qs(body, keep_blank_values=True).items()}
+
+        def _send(self, code: int, body: str = '', content_type: str = 'text/html; charset=utf-8',
+                  headers: Optional[Dict[str, str]] = None):
+            payload = body.encode('utf-8')
+            self.send_response(code)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _redirect(self, location: str, headers: Optional[Dict[str, str]] = None):
+            self._send(302, '', headers=dict(headers or {}, Location=location))
+
+        def _delay_or_fail(self, can_fail: bool = True) -> bool:
+            """Simulated latency; True when this request should fail"""
+            if panel.latency_ms or panel.jitter_ms:
+                time.sleep(max(0.0, panel.latency_ms + panel.random.uniform(-panel.jitter_ms, panel.jitter_ms)) / 1000)
+            if can_fail and panel.error_rate and panel.random.random() < panel.error_rate:
+                panel.stats['errors_injected'] += 1
+                self._send(500, 'Internal Server Error', 'text/plain')
+                return True
+            return False
+
+        def _login_page(self, error: str = ''):
+            sid, a, b = panel.new_session()
+            body = LOGIN_PAGE.format(a=a, b=b, error=f"<div class=\"alert\">{error}</div>" if error else '')
+            self._send(200, body, headers={'Set-Cookie': f"PHPSESSID={sid}; path=/"})
+
+        def do_GET(self):
+            path = urlparse(self.path).path
+            if self._delay_or_fail(can_fail=path == '/ints/client/SMSCDRStats'):
+                return
+            if path in ('/ints/login', '/ints/', '/ints'):
+                self._login_page()
+            elif path == '/ints/client/SMSCDRStats':
+                panel.stats['page_requests'] += 1
+                if not panel.is_authenticated(self._sid()):
+                    self._redirect('/ints/login')
+                    return
+                rows = ''.join(
+                    '<tr>' + ''.join(f"<td>{html.escape(str(cell))}</td>" for cell in row[:5]) + '</tr>'
+                    for row in panel.latest_rows()
+                )
+                self._send(200, SMS_PAGE.format(rows=rows))
+            else:
+                self._send(404, 'not found', 'text/plain')
+
+        def do_POST(self):
+            path = urlparse(self.path).path
+            form = self._form()
+            if self._delay_or_fail(can_fail=path == '/ints/client/res/data_smscdr.php'):
+                return
+            if path == '/ints/signin':
+                error = panel.login(self._sid(), form)
+                if error:
+                    self._login_page(error)
+                else:
+                    self._redirect('/ints/client/SMSCDRStats')
+            elif path == '/ints/client/res/data_smscdr.php':
+                panel.stats['ajax_requests'] += 1
+                if not panel.is_authenticated(self._sid()):
+                    self._redirect('/ints/login')
+                    return
+                self._send(200, json.dumps(panel.query(form)), 'application/json')
+            else:
+                self._send(404, 'not found', 'text/plain')
+
+    return PanelHandler
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Local stand-in for the SMS panel")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--username', default='bench')
+    parser.add_argument('--password', default='bench')
+    parser.add_argument('--rate', type=float, default=2.0, help="SMS arrivals per second")
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--session-ttl', type=float, default=0.0, help="seconds a login stays valid (0 = forever)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of data requests answered with HTTP 500")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    mock = MockPanel(args.host, args.port, args.username, args.password, rate=args.rate,
+                     latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, session_ttl=args.session_ttl,
+                     error_rate=args.error_rate, seed=args.seed).start()
+    try:
+        while True:
+            time.sleep(10)
+            logger.info(f"📊 {mock.get_stats()}")
+    except KeyboardInterrupt:
+        mock.stop()
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Number Index
+Binary cache of a country number file, stored next to it as
+<file>.idx (e.g. Countries/Togo.xlsx.idx):
+
+    header   magic, version, source size + mtime + sha256, counts
+    int64[]  sorted unique numbers that round-trip through int (digits,
+             no '+', no leading zero) - memory-mapped, never parsed
+    extras   the few numbers that don't ('+228...', '0612...'), utf-8 lines
+
+The index is valid while the source's size and mtime match; when only the
+mtime changed (touched / copied) the sha256 decides. Otherwise the source
+is parsed once with number_loader and the index rewritten atomically.
+"""
+
+import array
+import bisect
+import hashlib
+import itertools
+import logging
+import mmap
+import os
+import struct
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from number_loader import NumberFileResult, read_numbers
+
+logger = logging.getLogger(__name__)
+
+INDEX_SUFFIX = '.idx'
+MAGIC = b'OTPNIDX\x00'
+VERSION = 2
+# magic, version, reserved, source size, source mtime_ns, sha256, int count, extras bytes, rows, invalid
+HEADER = struct.Struct('<8sHHQq32sQQQQ')
+# Array starts 8-byte aligned so the mmap can be cast to int64 in place
+DATA_OFFSET = (HEADER.size + 7) // 8 * 8
+INT64_MAX_DIGITS = 18
+
+
+def index_path(source_path: str) -> str:
+    return source_path + INDEX_SUFFIX
+
+
+def file_sha256(path: str) -> bytes:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def _is_int_number(number: str) -> bool:
+    return number.isdigit() and number[0] != '0' and len(number) <= INT64_MAX_DIGITS
+
+
+def _split(numbers: List[str]):
+    """(sorted unique int64 array, sorted unique extras) - every number lands in exactly one"""
+    ints = set()
+    extras = set()
+    for number in numbers:
+        if _is_int_number(number):
+            ints.add(int(number))
+        else:
+            extras.add(number)
+    return array.array('q', sorted(ints)), sorted(extras)
+
+
+class NumberIndex:
+    """Read-only view of one country's numbers, backed by an mmap or an in-memory array"""
+
+    def __init__(self, ints, extras: List[str], rows: int = 0, invalid: int = 0,
+                 path: Optional[str] = None, mapping: Optional[mmap.mmap] = None):
+        self.ints = ints
+        self.extras = extras
+        self.rows = rows
+        self.invalid = invalid
+        self.path = path
+        self._mapping = mapping
+
+    def __len__(self) -> int:
+        return len(self.ints) + len(self.extras)
+
+    def __contains__(self, number: str) -> bool:
+        if _is_int_number(number):
+            value = int(number)
+            position = bisect.bisect_left(self.ints, value)
+            return position < len(self.ints) and self.ints[position] == value
+        position = bisect.bisect_left(self.extras, number)
+        return position < len(self.extras) and self.extras[position] == number
+
+    def __iter__(self) -> Iterator[str]:
+        yield from map(str, self.ints)
+        yield from self.extras
+
+    def numbers(self) -> List[str]:
+        """Fresh list of number strings (callers shuffle it)"""
+        return list(self)
+
+    def close(self):
+        if self._mapping is not None:
+            self.ints.release()
+            self._mapping.close()
+            self._mapping = None
+
+    # ----- persistence -----
+
+    @classmethod
+    def from_result(cls, result: NumberFileResult) -> 'NumberIndex':
+        ints, extras = _split(result.numbers)
+        return cls(ints, extras, rows=result.rows, invalid=result.invalid)
+
+    @classmethod
+    def build(cls, source_path: str, result: Optional[NumberFileResult] = None,
+              sha256: Optional[bytes] = None) -> 'NumberIndex':
+        """Parse the source (unless already parsed) and write its index; in-memory if it can't be written"""
+        stat = os.stat(source_path)
+        if result is None:
+            result = read_numbers(source_path)
+        index = cls.from_result(result)
+        try:
+            index.write(index_path(source_path), stat, sha256 or file_sha256(source_path))
+        except OSError as e:
+            logger.warning(f"⚠️ Could not write number index for {source_path}: {e}")
+            return index
+        return cls.open(index_path(source_path)) or index
+
+    def write(self, path: str, source_stat: os.stat_result, sha256: bytes):
+        extras = "\n".join(self.extras).encode('utf-8')
+        ints = self.ints if sys.byteorder == 'little' else _swapped(array.array('q', self.ints))
+        header = HEADER.pack(MAGIC, VERSION, 0, source_stat.st_size, source_stat.st_mtime_ns, sha256,
+                             len(self.ints), len(extras), self.rows, self.invalid)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(header.ljust(DATA_OFFSET, b'\x00'))
+            f.write(ints.tobytes())
+            f.write(extras)
+        # Readers see the old index or the new one, never half of one
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def read_header(path: str) -> Optional[tuple]:
+        try:
+            with open(path, 'rb') as f:
+                raw = f.read(HEADER.size)
+        except OSError:
+            return None
+        if len(raw) != HEADER.size:
+            return None
+        header = HEADER.unpack(raw)
+        if header[0] != MAGIC or header[1] != VERSION:
+            return None
+        return header
+
+    @classmethod
+    def open(cls, path: str) -> Optional['NumberIndex']:
+        """Memory-map an index file; None when it is missing or corrupt"""
+        header = cls.read_header(path)
+        if header is None:
+            return None
+        _, _, _, _, _, _, int_count, extras_size, rows, invalid = header
+        try:
+            with open(path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size != DATA_OFFSET + int_count * 8 + extras_size:
+                    return None
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        extras_start = DATA_OFFSET + int_count * 8
+        extras_raw = mapping[extras_start:extras_start + extras_size].decode('utf-8')
+        extras = extras_raw.split("\n") if extras_raw else []
+        if sys.byteorder == 'little':
+            ints = memoryview(mapping)[DATA_OFFSET:extras_start].cast('q')
+            return cls(ints, extras, rows=rows, invalid=invalid, path=path, mapping=mapping)
+        # Big-endian host: the file is little-endian, copy and swap
+        ints = _swapped(array.array('q', mapping[DATA_OFFSET:extras_start]))
+        mapping.close()
+        return cls(ints, extras, rows=rows, invalid=invalid, path=path)
+
+
+def _swapped(values: array.array) -> array.array:
+    copy = array.array('q', values)
+    copy.byteswap()
+    return copy
+
+
+class PoolDiff:
+    """What replacing a country's pool with a new file changes"""
+
+    MAX_SAMPLES = 5
+
+    def __init__(self):
+        self.added = 0
+        self.removed = 0
+        self.unchanged = 0
+        self.added_samples: List[str] = []
+        self.removed_samples: List[str] = []
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.removed)
+
+    def _add(self, number):
+        self.added += 1
+        if len(self.added_samples) < self.MAX_SAMPLES:
+            self.added_samples.append(str(number))
+
+    def _remove(self, number):
+        self.removed += 1
+        if len(self.removed_samples) < self.MAX_SAMPLES:
+            self.removed_samples.append(str(number))
+
+    def merge(self, old, new):
+        """Walk two sorted unique sequences once"""
+        i = j = 0
+        while i < len(old) and j < len(new):
+            if old[i] == new[j]:
+                self.unchanged += 1
+                i += 1
+                j += 1
+            elif old[i] < new[j]:
+                self._remove(old[i])
+                i += 1
+            else:
+                self._add(new[j])
+                j += 1
+        for k in range(i, len(old)):
+            self._remove(old[k])
+        for k in range(j, len(new)):
+            self._add(new[k])
+
+    def summary(self) -> str:
+        return f"+{self.added} / -{self.removed} / ={self.unchanged}"
+
+
+def diff_indexes(old: Optional[NumberIndex], new: NumberIndex) -> PoolDiff:
+    """Added / removed / unchanged numbers between two indexes (O(old + new), no sets)"""
+    diff = PoolDiff()
+    diff.merge(old.ints if old is not None else (), new.ints)
+    diff.merge(old.extras if old is not None else [], new.extras)
+    return diff
+
+
+def _keys(numbers: Iterable[str]) -> set:
+    """Number strings → the values an index stores (int where it round-trips, str otherwise)"""
+    return {int(number) if _is_int_number(number) else number for number in numbers}
+
+
+class PoolCheck:
+    """How many numbers of an uploaded pool can actually be handed out"""
+
+    MAX_SAMPLES = 5
+
+    def __init__(self, total: int):
+        self.total = total
+        self.duplicates: Dict[str, int] = {}  # other country -> numbers it shares with this pool
+        self.duplicate_samples: List[str] = []
+        self.in_other_countries = 0
+        self.cooldown = 0
+        self.assigned = 0
+        self.unusable = 0
+
+    @property
+    def usable(self) -> int:
+        return self.total - self.unusable
+
+    def summary(self) -> str:
+        return (f"{self.usable}/{self.total} usable ({self.in_other_countries} in other countries, "
+                f"{self.cooldown} in cooldown, {self.assigned} assigned)")
+
+
+def check_pool(index: NumberIndex, other_pools: Dict[str, NumberIndex], cooldown: Iterable[str] = (),
+               assigned: Iterable[str] = ()) -> PoolCheck:
+    """Cross-country duplicates, cooldown and live assignments of a pool (hash sets, O(pool + other pools))"""
+    check = PoolCheck(len(index))
+    keys = set(index.ints)
+    keys.update(index.extras)
+
+    unusable = set()
+    for country, other in other_pools.items():
+        shared = keys.intersection(other.ints)
+        shared.update(keys.intersection(other.extras))
+        if shared:
+            check.duplicates[country] = len(shared)
+            unusable |= shared
+    check.in_other_countries = len(unusable)
+    check.duplicate_samples = [str(number) for number in itertools.islice(unusable, PoolCheck.MAX_SAMPLES)]
+
+    burned = keys.intersection(_keys(cooldown))
+    busy = keys.intersection(_keys(assigned))
+    check.cooldown = len(burned)
+    check.assigned = len(busy)
+    check.unusable = len(unusable | burned | busy)
+    return check
+
+
+def load_index(source_path: str) -> NumberIndex:
+    """Index for a number file: mapped from <file>.idx when current, rebuilt otherwise"""
+    path = index_path(source_path)
+    stat = os.stat(source_path)
+    header = NumberIndex.read_header(path)
+    if header is not None:
+        _, _, _, size, mtime_ns, sha256, _, _, _, _ = header
+        if size == stat.st_size and mtime_ns == stat.st_mtime_ns:
+            index = NumberIndex.open(path)
+            if index is not None:
+                return index
+        elif size == stat.st_size:
+            # Same size, new mtime - only the content hash tells whether it changed
+            current = file_sha256(source_path)
+            if current == sha256:
+                index = NumberIndex.open(path)
+                if index is not None:
+                    try:
+                        # Re-key on the new mtime so the next start skips hashing
+                        index.write(path, stat, current)
+                    except OSError:
+                        pass
+                    return index
+            return NumberIndex.build(source_path, sha256=current)
+    return NumberIndex.build(source_path)
+
+
+def remove_index(source_path: str):
+    try:
+        os.remove(index_path(source_path))
+    except FileNotFoundError:
+        pass
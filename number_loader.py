@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Number Loader
+Reads phone numbers from a country file in one streaming pass - no pandas:
+
+- .xlsx  first column of the first sheet via openpyxl read-only mode
+- .csv   first column
+- .txt   one number per line
+
+A non-numeric first row is treated as the header. Values are normalised
+the way the bot always has (Excel floats / scientific notation → digits,
+everything except digits and '+' stripped, more than 5 characters) and
+rows that do not make a number are reported back instead of vanishing.
+"""
+
+import csv
+import io
+import math
+import os
+import re
+from decimal import Decimal, InvalidOperation
+from typing import BinaryIO, Callable, Iterator, List, Optional, Tuple, Union
+
+SUPPORTED_EXTENSIONS = ('.xlsx', '.csv', '.txt')
+
+# Plain decimal or scientific notation, e.g. "22890543967", "2.2890543967E+10", "22890543967.0"
+_NUMERIC = re.compile(r'^[+-]?\d+(\.\d*)?([eE][+-]?\d+)?$')
+_NON_NUMBER = re.compile(r'[^\d+]')
+
+# Invalid rows kept for the report - enough to show the admin what is wrong
+MAX_INVALID_SAMPLES = 20
+
+# Rows between progress callbacks
+PROGRESS_EVERY = 10000
+
+
+def normalize_number(value) -> Optional[str]:
+    """Cell value → clean number string, None when it is not a phone number"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        text = str(value)
+    elif isinstance(value, float):
+        if math.isnan(value) or math.isinf(value):
+            return None
+        text = str(int(value))
+    else:
+        text = str(value).strip()
+        if not text:
+            return None
+        if _NUMERIC.match(text):
+            # Excel-exported strings: "2.2890543967E+10" / "22890543967.0"
+            try:
+                text = str(int(Decimal(text)))
+            except (InvalidOperation, ValueError):
+                pass
+    clean = _NON_NUMBER.sub('', text)
+    return clean if len(clean) > 5 else None
+
+
+class NumberFileResult:
+    """Numbers in file order plus what was skipped"""
+
+    def __init__(self):
+        self.numbers: List[str] = []
+        self.rows = 0
+        self.blank = 0
+        self.invalid = 0
+        # (row number, raw value) of the first MAX_INVALID_SAMPLES invalid rows
+        self.invalid_samples: List[Tuple[int, str]] = []
+        self.header: Optional[str] = None
+
+    def add(self, row_number: int, value):
+        self.rows += 1
+        number = normalize_number(value)
+        if number is not None:
+            self.numbers.append(number)
+            return
+        if value is None or (isinstance(value, str) and not value.strip()):
+            self.blank += 1
+            return
+        if row_number == 1 and not self.numbers:
+            # Column title ("Number", "Phone", ...) - not an error
+            self.header = str(value)
+            self.rows -= 1
+            return
+        self.invalid += 1
+        if len(self.invalid_samples) < MAX_INVALID_SAMPLES:
+            self.invalid_samples.append((row_number, str(value)))
+
+    def summary(self) -> str:
+        text = f"{len(self.numbers)} valid numbers from {self.rows} rows"
+        if self.invalid:
+            samples = ", ".join(f"row {row}: {value!r}" for row, value in self.invalid_samples[:5])
+            text += f", {self.invalid} invalid ({samples})"
+        return text
+
+
+Source = Union[str, bytes, BinaryIO]
+
+
+def _open_binary(source: Source) -> BinaryIO:
+    if isinstance(source, (bytes, bytearray)):
+        return io.BytesIO(source)
+    if isinstance(source, str):
+        return open(source, 'rb')
+    return source
+
+
+def _xlsx_cells(stream: BinaryIO) -> Iterator:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        for (value,) in workbook.worksheets[0].iter_rows(min_col=1, max_col=1, values_only=True):
+            yield value
+    finally:
+        workbook.close()
+
+
+def _text_lines(stream: BinaryIO) -> Iterator[str]:
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', errors='replace', newline='')
+    try:
+        yield from text
+    finally:
+        text.detach()
+
+
+def _csv_cells(stream: BinaryIO) -> Iterator:
+    for row in csv.reader(_text_lines(stream)):
+        yield row[0] if row else None
+
+
+def _txt_cells(stream: BinaryIO) -> Iterator:
+    for line in _text_lines(stream):
+        yield line.strip() or None
+
+
+_READERS = {
+    '.xlsx': _xlsx_cells,
+    '.csv': _csv_cells,
+    '.txt': _txt_cells,
+}
+
+
+def file_extension(filename: str) -> str:
+    return os.path.splitext(filename)[1].lower()
+
+
+def read_numbers(source: Source, filename: Optional[str] = None,
+                 progress: Optional[Callable[[int], None]] = None) -> NumberFileResult:
+    """Stream the first column of an .xlsx/.csv/.txt file (path, bytes or binary file object)
+
+    progress(rows_read) is called every PROGRESS_EVERY rows.
+    """
+    name = filename or (source if isinstance(source, str) else '')
+    extension = file_extension(name)
+    if extension not in _READERS:
+        raise ValueError(f"Unsupported number file type: {extension or name!r} "
+                         f"(use {', '.join(SUPPORTED_EXTENSIONS)})")
+
+    result = NumberFileResult()
+    stream = _open_binary(source)
+    try:
+        for row_number, value in enumerate(_READERS[extension](stream), start=1):
+            result.add(row_number, value)
+            if progress is not None and row_number % PROGRESS_EVERY == 0:
+                progress(row_number)
+    finally:
+        if stream is not source:
+            stream.close()
+    return result
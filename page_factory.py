@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Managed Page Factory
+Creates Playwright pages with a full resource-blocking profile, reuses a
+single monitoring page and closes orphaned pages left behind by re-logins.
+PagePool bounds how many pages can exist and tracks each page's lifecycle.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# Resource types the SMS table never needs
+BLOCKED_RESOURCE_TYPES = {
+    'image', 'stylesheet', 'font', 'media', 'texttrack',
+    'manifest', 'eventsource', 'websocket', 'ping',
+}
+
+# Trackers/analytics - blocked whatever the resource type
+BLOCKED_URL_PATTERNS = (
+    'google-analytics.com', 'googletagmanager.com', 'doubleclick.net',
+    'facebook.net', 'connect.facebook', 'hotjar.com', 'mc.yandex',
+    'clarity.ms', 'tawk.to', 'crisp.chat', 'cloudflareinsights.com',
+    '/analytics', '/gtag/', 'matomo', 'piwik',
+)
+
+# Third-party (CDN) scripts the DataTables SMS view may load - other third-party scripts
+# are dropped; the panel's own same-origin scripts are always allowed
+ALLOWED_SCRIPT_PATTERNS = ('jquery', 'datatable', 'bootstrap', 'moment')
+
+
+class ManagedPageFactory:
+    """Single reusable page with request blocking and orphan cleanup"""
+
+    def __init__(self, browser, user_agent: str = DEFAULT_USER_AGENT, default_timeout: int = 30000,
+                 blocked_resource_types: Optional[Iterable[str]] = None,
+                 blocked_url_patterns: Optional[Iterable[str]] = None,
+                 allowed_script_patterns: Optional[Iterable[str]] = None):
+        self.browser = browser
+        self.user_agent = user_agent
+        self.default_timeout = default_timeout
+
+        self.blocked_resource_types = set(blocked_resource_types or BLOCKED_RESOURCE_TYPES)
+        self.blocked_url_patterns = tuple(blocked_url_patterns or BLOCKED_URL_PATTERNS)
+        self.allowed_script_patterns = tuple(allowed_script_patterns or ALLOWED_SCRIPT_PATTERNS)
+
+        # The one page we keep alive
+        self.page = None
+
+        # Blocking statistics by resource type
+        self.blocked_counts: Dict[str, int] = {}
+        self.allowed_count = 0
+
+    def should_block(self, resource_type: str, url: str, page_url: str = "") -> bool:
+        """Decide whether a request is dropped"""
+        url_lower = url.lower()
+
+        if any(pattern in url_lower for pattern in self.blocked_url_patterns):
+            return True
+
+        if resource_type in self.blocked_resource_types:
+            return True
+
+        if resource_type == 'script':
+            # The panel's own JS sets up the SMS DataTable and the login form - never drop it
+            page_origin = urlparse(page_url).netloc if page_url else ''
+            if not page_origin or urlparse(url).netloc == page_origin:
+                return False
+            # Third-party: only the table's libraries (CDN copies of jQuery/DataTables...)
+            return not any(pattern in url_lower for pattern in self.allowed_script_patterns)
+
+        return False
+
+    async def _route_request(self, route):
+        """Playwright route handler applying the blocklist"""
+        request = route.request
+        try:
+            page_url = request.frame.page.url if request.frame else ""
+        except Exception:
+            page_url = ""
+
+        if self.should_block(request.resource_type, request.url, page_url):
+            self.blocked_counts[request.resource_type] = self.blocked_counts.get(request.resource_type, 0) + 1
+            await route.abort()
+        else:
+            self.allowed_count += 1
+            await route.continue_()
+
+    async def create_page(self):
+        """Create a new page with the blocking profile applied"""
+        page = await self.browser.new_page(user_agent=self.user_agent)
+        page.set_default_timeout(self.default_timeout)
+        await page.route("**/*", self._route_request)
+        return page
+
+    async def get_page(self):
+        """Return the managed page, creating it only if missing or closed"""
+        if self.page is None or self.page.is_closed():
+            self.page = await self.create_page()
+            logger.info("📄 Managed page created with resource blocking")
+        await self.close_orphans()
+        return self.page
+
+    async def close_orphans(self, keep: Optional[Iterable] = None) -> int:
+        """Close every page in the browser except the managed one (or the given pages)"""
+        keep_ids = {id(page) for page in keep} if keep is not None else {id(self.page)}
+        closed = 0
+        for context in list(self.browser.contexts):
+            for page in list(context.pages):
+                if id(page) in keep_ids:
+                    continue
+                try:
+                    await page.close()
+                    closed += 1
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not close orphaned page: {e}")
+        if closed:
+            logger.info(f"🧹 Closed {closed} orphaned page(s)")
+        return closed
+
+    def get_stats(self) -> dict:
+        """Blocking statistics"""
+        return {
+            'blocked': dict(self.blocked_counts),
+            'blocked_total': sum(self.blocked_counts.values()),
+            'allowed_total': self.allowed_count,
+        }
+
+
+class PagePool:
+    """Bounded pool of managed pages with explicit lifecycle tracking"""
+
+    def __init__(self, factory: ManagedPageFactory, max_pages: int = 2, acquire_timeout: float = 10.0):
+        self.factory = factory
+        self.max_pages = max_pages
+        self.acquire_timeout = acquire_timeout
+
+        # One slot per page that may exist at the same time
+        self._slots = asyncio.Semaphore(max_pages)
+
+        # id(page) -> lifecycle record
+        self.lifecycle: Dict[int, dict] = {}
+
+        # Counters
+        self.pages_created = 0
+        self.pages_closed = 0
+        self.acquire_timeouts = 0
+
+    async def acquire(self, purpose: str):
+        """Create a page in a free slot - waits (bounded) when the pool is full"""
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self.acquire_timeouts += 1
+            raise RuntimeError(f"Page pool exhausted ({self.max_pages} pages in use)")
+
+        try:
+            page = await self.factory.create_page()
+        except Exception:
+            self._slots.release()
+            raise
+
+        self.lifecycle[id(page)] = {
+            'page': page,
+            'purpose': purpose,
+            'state': 'open',
+            'created_at': time.time(),
+        }
+        self.pages_created += 1
+        logger.info(f"📄 Page opened for {purpose} ({len(self.lifecycle)}/{self.max_pages})")
+        return page
+
+    def mark(self, page, purpose: str):
+        """Re-label a page, e.g. when a re-login page becomes the monitor page"""
+        record = self.lifecycle.get(id(page))
+        if record:
+            record['purpose'] = purpose
+
+    async def release(self, page):
+        """Close a page and free its slot"""
+        record = self.lifecycle.pop(id(page), None)
+        if record is None:
+            return
+
+        try:
+            if not page.is_closed():
+                await page.close()
+        except Exception as e:
+            logger.warning(f"⚠️ Error closing {record['purpose']} page: {e}")
+        finally:
+            record['state'] = 'closed'
+            self.pages_closed += 1
+            self._slots.release()
+            logger.info(f"📄 Page closed ({record['purpose']}, lived {time.time() - record['created_at']:.0f}s)")
+
+    async def close_untracked(self) -> int:
+        """Close pages the pool does not know about (leaked by other code paths)"""
+        tracked = [record['page'] for record in self.lifecycle.values()]
+        return await self.factory.close_orphans(keep=tracked)
+
+    async def close_all(self):
+        """Release every tracked page"""
+        for record in list(self.lifecycle.values()):
+            await self.release(record['page'])
+
+    def get_stats(self) -> dict:
+        """Pool state for logging/health"""
+        return {
+            'open_pages': len(self.lifecycle),
+            'max_pages': self.max_pages,
+            'pages': [
+                {'purpose': r['purpose'], 'age': round(time.time() - r['created_at'], 1)}
+                for r in self.lifecycle.values()
+            ],
+            'pages_created': self.pages_created,
+            'pages_closed': self.pages_closed,
+            'acquire_timeouts': self.acquire_timeouts,
+        }
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Panel Accounts & Monitor Sharding
+Loads panel accounts (base URL + credentials) from configuration and runs
+one lightweight requests poller per account on a single event loop, all
+sharing one dedup set and one delivery pipeline. Accounts are spread over
+processes/hosts with a consistent-hash ring so adding a shard only moves
+a fraction of the accounts.
+"""
+
+import asyncio
+import bisect
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# The panel every monitor used before accounts became configurable
+DEFAULT_BASE_URL = "http://94.23.120.156/ints"
+DEFAULT_USERNAME = "Roni_dada"
+DEFAULT_PASSWORD = "Roni_dada"
+
+
+class PanelAccount:
+    """One panel login: where it lives and how to authenticate"""
+
+    def __init__(self, name: str, base_url: str, username: str, password: str):
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.username = username
+        self.password = password
+
+    @property
+    def login_url(self) -> str:
+        return f"{self.base_url}/login"
+
+    @property
+    def sms_url(self) -> str:
+        return f"{self.base_url}/client/SMSCDRStats"
+
+    @property
+    def ajax_url(self) -> str:
+        return f"{self.base_url}/client/res/data_smscdr.php"
+
+    @property
+    def origin(self) -> str:
+        parsed = urlparse(self.base_url)
+        return f"{parsed.scheme}://{parsed.netloc}"
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'PanelAccount':
+        base_url = data.get('base_url', DEFAULT_BASE_URL)
+        username = data['username']
+        name = data.get('name') or f"{username}@{urlparse(base_url).netloc}"
+        return cls(name, base_url, username, data['password'])
+
+    def __repr__(self):
+        return f"PanelAccount({self.name})"
+
+
+def default_account() -> PanelAccount:
+    """Single account from PANEL_* env vars, falling back to the original panel"""
+    return PanelAccount.from_dict({
+        'name': os.getenv('PANEL_ACCOUNT_NAME'),
+        'base_url': os.getenv('PANEL_BASE_URL', DEFAULT_BASE_URL),
+        'username': os.getenv('PANEL_USERNAME', DEFAULT_USERNAME),
+        'password': os.getenv('PANEL_PASSWORD', DEFAULT_PASSWORD),
+    })
+
+
+def load_accounts() -> List[PanelAccount]:
+    """Accounts from PANEL_ACCOUNTS_FILE (JSON file) or PANEL_ACCOUNTS (JSON list)"""
+    raw = None
+    accounts_file = os.getenv('PANEL_ACCOUNTS_FILE')
+    if accounts_file:
+        with open(accounts_file, 'r', encoding='utf-8') as f:
+            raw = json.load(f)
+    elif os.getenv('PANEL_ACCOUNTS'):
+        raw = json.loads(os.getenv('PANEL_ACCOUNTS'))
+
+    if not raw:
+        return [default_account()]
+
+    accounts = [PanelAccount.from_dict(entry) for entry in raw]
+    names = [account.name for account in accounts]
+    if len(set(names)) != len(names):
+        raise ValueError("Panel account names must be unique")
+    return accounts
+
+
+class ConsistentHashRing:
+    """Maps keys to shards; adding/removing a shard only remaps ~1/N of the keys"""
+
+    def __init__(self, shards: List[str], replicas: int = 100):
+        self.replicas = replicas
+        self._ring: List[int] = []
+        self._owners: Dict[int, str] = {}
+        for shard in shards:
+            self.add(shard)
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int(hashlib.md5(key.encode()).hexdigest()[:16], 16)
+
+    def add(self, shard: str):
+        for replica in range(self.replicas):
+            point = self._hash(f"{shard}#{replica}")
+            self._owners[point] = shard
+            bisect.insort(self._ring, point)
+
+    def owner(self, key: str) -> str:
+        if not self._ring:
+            raise ValueError("Hash ring has no shards")
+        index = bisect.bisect(self._ring, self._hash(key)) % len(self._ring)
+        return self._owners[self._ring[index]]
+
+
+def accounts_for_shard(accounts: List[PanelAccount], shard_index: int, shard_count: int) -> List[PanelAccount]:
+    """Accounts owned by this shard (MONITOR_SHARD_INDEX of MONITOR_SHARD_COUNT)"""
+    if shard_count <= 1:
+        return list(accounts)
+    if not 0 <= shard_index < shard_count:
+        raise ValueError(f"Shard index {shard_index} outside 0..{shard_count - 1}")
+
+    ring = ConsistentHashRing([f"shard-{i}" for i in range(shard_count)])
+    mine = f"shard-{shard_index}"
+    return [account for account in accounts if ring.owner(account.name) == mine]
+
+
+class MultiAccountMonitor:
+    """One SimpleRequestsOTPBot poller per account, sharing dedup and delivery"""
+
+    def __init__(self, accounts: List[PanelAccount], number_bot=None):
+        self.accounts = accounts
+        self.number_bot = number_bot
+
+        # Shared across pollers so an OTP seen on two accounts is delivered once
+        self.processed_hashes = set()
+        self.pollers = []
+        self.started_at: Optional[float] = None
+
+    @classmethod
+    def from_env(cls, number_bot=None) -> 'MultiAccountMonitor':
+        """Load accounts and keep the ones assigned to this process's shard"""
+        shard_index = int(os.getenv('MONITOR_SHARD_INDEX', '0'))
+        shard_count = int(os.getenv('MONITOR_SHARD_COUNT', '1'))
+        accounts = accounts_for_shard(load_accounts(), shard_index, shard_count)
+        logger.info(f"🧩 Shard {shard_index + 1}/{shard_count}: {len(accounts)} panel account(s) "
+                    f"{[account.name for account in accounts]}")
+        return cls(accounts, number_bot=number_bot)
+
+    def build_pollers(self) -> list:
+        from simple_requests_otp_bot import SimpleRequestsOTPBot
+
+        self.pollers = []
+        for account in self.accounts:
+            poller = SimpleRequestsOTPBot(account=account, number_bot=self.number_bot)
+            poller.processed_hashes = self.processed_hashes
+            self.processed_hashes.update(poller.high_water_mark.hashes_at_mark)
+            self.pollers.append(poller)
+        return self.pollers
+
+    async def run(self):
+        """Run every poller on this event loop"""
+        if not self.accounts:
+            logger.warning("⚠️ No panel accounts assigned to this shard - monitor idle")
+            await asyncio.Event().wait()
+
+        pollers = self.pollers or self.build_pollers()
+        self.started_at = time.monotonic()
+        tasks = [asyncio.create_task(poller.run(), name=f"poller:{poller.account.name}") for poller in pollers]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            # Cancelled (supervisor restart/shutdown) or one poller crashed: stop the rest
+            # and release their sessions before a replacement monitor is built
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self.close()
+
+    async def close(self):
+        """Close every poller's session manager, channel poster and HTTP sessions"""
+        for poller in self.pollers:
+            try:
+                await poller.close()
+            except Exception as e:
+                logger.warning(f"⚠️ Closing poller {poller.account.name} failed: {e}")
+
+    def is_healthy(self, max_silence: float = 300.0) -> bool:
+        """At least one poller completed a poll recently (or we only just started)"""
+        now = time.monotonic()
+        if self.started_at is None or now - self.started_at < max_silence:
+            return True
+        return any(
+            poller.poll_scheduler.last_poll_at is not None
+            and now - poller.poll_scheduler.last_poll_at < max_silence
+            for poller in self.pollers
+        )
+
+    def get_stats(self) -> List[dict]:
+        """Per-account poller state"""
+        return [
+            {
+                'account': poller.account.name,
+                'logged_in': poller.logged_in,
+                'failure_count': poller.failure_count,
+                'last_poll_age': round(time.time() - poller.last_success_at, 1) if poller.last_success_at else None,
+                'outbound_inflight': poller.outbound_inflight,
+                'channel_pending': poller.channel_poster.pending if poller.channel_poster else 0,
+                'high_water_mark': poller.high_water_mark.timestamp,
+            }
+            for poller in self.pollers
+        ]
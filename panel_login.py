@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Panel Login Flow
+Event-driven Playwright login for the SMS panel.
+Waits on concrete signals (navigation commit, form selectors, response status)
+instead of fixed sleeps and networkidle waits.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Combined selectors - Playwright resolves the first matching element
+USERNAME_SELECTOR = 'input[name="username"], input[id="username"], input[name*="user"]'
+PASSWORD_SELECTOR = 'input[name="password"], input[id="password"], input[type="password"]'
+CAPTCHA_SELECTOR = 'input[name="capt"], input[id="capt"], input[name*="capt"]'
+CAPTCHA_LABEL_SELECTOR = 'label[for="capt"]'
+SUBMIT_SELECTOR = 'button[type="submit"], input[type="submit"], input[value*="Login"], button:has-text("Login")'
+
+# Chrome interstitial shown for certificate problems
+SSL_DETAILS_SELECTOR = '#details-button'
+SSL_PROCEED_SELECTOR = '#proceed-link'
+
+
+def solve_captcha(text: str) -> Optional[int]:
+    """Solve the panel's 'What is A + B = ?' captcha"""
+    match = re.search(r'(\d+)\s*\+\s*(\d+)', text or '')
+    if not match:
+        return None
+    return int(match.group(1)) + int(match.group(2))
+
+
+def is_logged_in_url(url: str) -> bool:
+    """Panel redirects to /client/... after a successful login"""
+    url = (url or '').lower()
+    return "client" in url and "login" not in url
+
+
+class LoginState:
+    """States of the login state machine"""
+    OPEN_FORM = "open_form"
+    FILL_FORM = "fill_form"
+    SUBMIT = "submit"
+    VERIFY = "verify"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class LoginAttemptError(Exception):
+    """Raised when a login attempt fails in a specific state"""
+
+    def __init__(self, state: str, reason: str, retryable: bool = True):
+        super().__init__(f"{state}: {reason}")
+        self.state = state
+        self.reason = reason
+        self.retryable = retryable
+
+
+class PanelLoginFlow:
+    """Login state machine: open form → fill form → submit → verify"""
+
+    def __init__(self, login_url: str, username: str, password: str,
+                 form_timeout: int = 5000, submit_timeout: int = 8000,
+                 max_attempts: int = 3, retry_delay: float = 0.25):
+        self.login_url = login_url
+        self.username = username
+        self.password = password
+
+        # Per-signal timeouts in milliseconds (Playwright units)
+        self.form_timeout = form_timeout
+        self.submit_timeout = submit_timeout
+
+        # Structured retries
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+        # Last run diagnostics
+        self.state = LoginState.OPEN_FORM
+        self.last_duration_ms = 0.0
+        self.last_error: Optional[str] = None
+
+    async def run(self, page) -> bool:
+        """Run the login flow on a page with structured retries"""
+        start_time = time.monotonic()
+
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                await self._attempt(page)
+                self.state = LoginState.DONE
+                self.last_error = None
+                self.last_duration_ms = (time.monotonic() - start_time) * 1000
+                logger.info(f"✅ Login successful in {self.last_duration_ms:.0f}ms (attempt {attempt})")
+                return True
+
+            except LoginAttemptError as e:
+                self.last_error = str(e)
+                logger.warning(f"⚠️ Login attempt {attempt}/{self.max_attempts} failed at {e.state}: {e.reason}")
+                if not e.retryable:
+                    break
+
+            except Exception as e:
+                self.last_error = f"{self.state}: {e}"
+                logger.warning(f"⚠️ Login attempt {attempt}/{self.max_attempts} error at {self.state}: {e}")
+
+            if attempt < self.max_attempts:
+                await asyncio.sleep(self.retry_delay * attempt)
+
+        self.state = LoginState.FAILED
+        self.last_duration_ms = (time.monotonic() - start_time) * 1000
+        logger.error(f"❌ Login failed after {self.last_duration_ms:.0f}ms: {self.last_error}")
+        return False
+
+    async def _attempt(self, page):
+        """Single pass through the state machine"""
+        # OPEN_FORM: navigation commit + form selector, nothing else
+        self.state = LoginState.OPEN_FORM
+        response = await page.goto(self.login_url, wait_until='domcontentloaded', timeout=self.form_timeout)
+
+        if is_logged_in_url(page.url):
+            # Session cookie still valid - panel bounced us straight to the client area
+            return
+
+        if response is not None and response.status >= 500:
+            raise LoginAttemptError(self.state, f"login page returned HTTP {response.status}")
+
+        await self._bypass_ssl_interstitial(page)
+
+        try:
+            await page.wait_for_selector(PASSWORD_SELECTOR, state='visible', timeout=self.form_timeout)
+        except Exception:
+            raise LoginAttemptError(self.state, "login form did not appear")
+
+        # FILL_FORM
+        self.state = LoginState.FILL_FORM
+        username_field = await page.query_selector(USERNAME_SELECTOR)
+        password_field = await page.query_selector(PASSWORD_SELECTOR)
+        if not username_field or not password_field:
+            raise LoginAttemptError(self.state, "username/password field missing", retryable=False)
+
+        await username_field.fill(self.username)
+        await password_field.fill(self.password)
+
+        captcha_field = await page.query_selector(CAPTCHA_SELECTOR)
+        if captcha_field:
+            captcha_label = await page.query_selector(CAPTCHA_LABEL_SELECTOR)
+            captcha_text = await captcha_label.inner_text() if captcha_label else await page.content()
+            answer = solve_captcha(captcha_text)
+            if answer is None:
+                raise LoginAttemptError(self.state, "captcha not found")
+            await captcha_field.fill(str(answer))
+            logger.debug(f"Captcha solved: {answer}")
+
+        submit_button = await page.query_selector(SUBMIT_SELECTOR)
+        if not submit_button:
+            raise LoginAttemptError(self.state, "submit button missing", retryable=False)
+
+        # SUBMIT: wait for the navigation the form post triggers (redirects included)
+        self.state = LoginState.SUBMIT
+        try:
+            async with page.expect_navigation(wait_until='commit', timeout=self.submit_timeout) as navigation:
+                await submit_button.click()
+            response = await navigation.value
+        except Exception as e:
+            raise LoginAttemptError(self.state, f"no navigation after submit ({e})")
+
+        if response is not None and response.status >= 400:
+            raise LoginAttemptError(self.state, f"login post returned HTTP {response.status}")
+
+        # VERIFY: the committed URL tells us the outcome
+        self.state = LoginState.VERIFY
+        if is_logged_in_url(page.url):
+            return
+
+        error_text = ""
+        try:
+            error_text = (await page.content()).lower()
+        except Exception:
+            pass
+
+        if "username/password invalid" in error_text:
+            raise LoginAttemptError(self.state, "invalid credentials", retryable=False)
+        if "captcha" in error_text:
+            raise LoginAttemptError(self.state, "captcha rejected")
+        raise LoginAttemptError(self.state, f"unexpected URL {page.url}")
+
+    async def _bypass_ssl_interstitial(self, page):
+        """Click through Chrome's certificate warning if it is showing"""
+        details_button = await page.query_selector(SSL_DETAILS_SELECTOR)
+        if not details_button:
+            return
+
+        logger.info("Detected SSL warning page, attempting to bypass...")
+        await details_button.click()
+        proceed_link = await page.wait_for_selector(SSL_PROCEED_SELECTOR, state='visible', timeout=self.form_timeout)
+        async with page.expect_navigation(wait_until='domcontentloaded', timeout=self.form_timeout):
+            await proceed_link.click()
+
+
+class ReloginCoordinator:
+    """Single-flight re-login: at most one re-login runs, callers share it"""
+
+    def __init__(self, relogin_func):
+        # Coroutine function performing the actual re-login
+        self.relogin_func = relogin_func
+        self.task: Optional[asyncio.Task] = None
+
+        # Counters
+        self.started = 0
+        self.coalesced = 0
+
+    @property
+    def in_progress(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def trigger(self) -> asyncio.Task:
+        """Start a re-login unless one is already running; returns the running task"""
+        if self.in_progress:
+            self.coalesced += 1
+            logger.info("🔐 Re-login already in progress, not starting another")
+            return self.task
+
+        self.started += 1
+        self.task = asyncio.create_task(self.relogin_func())
+        return self.task
+
+    async def relogin(self):
+        """Trigger and wait for the (shared) re-login"""
+        return await self.trigger()
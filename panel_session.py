@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Panel Session Manager
+Learns the panel's session lifetime, keeps an idle session warm with a
+cheap keep-alive when polls have backed off, and re-authenticates a
+parallel session shortly before the predicted expiry, swapping it in
+without missing a poll. Failed pre-emptive logins back off exponentially.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PanelSessionManager:
+    """Proactive session lifecycle for SimpleRequestsOTPBot"""
+
+    def __init__(self, bot, refresh_lead: float = 20.0, safety_margin: float = 0.9,
+                 min_lifetime: float = 30.0, history_size: int = 5, max_retry_delay: float = 300.0,
+                 keepalive_fraction: float = 0.5, keepalive_interval: float = 60.0):
+        # Bot owning the requests session (needs .session, .poll_lock, .sms_url, .create_session(),
+        # .login_once(session)) - the session is only used or swapped while holding poll_lock
+        self.bot = bot
+
+        # Keep-alive only after this share of the learned lifetime passed with no
+        # authenticated request (keepalive_interval until a lifetime is learned) -
+        # regular polls keep the session warm and suppress it
+        self.keepalive_fraction = keepalive_fraction
+        self.keepalive_interval = keepalive_interval
+
+        # Start the parallel re-login this many seconds before predicted expiry
+        self.refresh_lead = refresh_lead
+        self.safety_margin = safety_margin
+        self.min_lifetime = min_lifetime
+        # Failed pre-emptive logins retry after refresh_lead, doubling up to this
+        self.max_retry_delay = max_retry_delay
+
+        # Observed lifetimes (seconds) - the smallest recent one drives prediction
+        self.observed_lifetimes = deque(maxlen=history_size)
+        configured = os.getenv('PANEL_SESSION_LIFETIME')
+        if configured:
+            try:
+                self.observed_lifetimes.append(float(configured))
+            except ValueError:
+                logger.warning(f"⚠️ Invalid PANEL_SESSION_LIFETIME: {configured}")
+
+        # Current session timeline
+        self.logged_in_at: Optional[float] = None
+        self.last_activity_at: Optional[float] = None
+
+        # Idle keep-alive timer (runs while logged in)
+        self.keepalive_task: Optional[asyncio.Task] = None
+        self.last_keepalive_at: Optional[float] = None
+
+        # Parallel re-login task (at most one)
+        self.refresh_task: Optional[asyncio.Task] = None
+        self.refresh_failures = 0
+        self.next_refresh_at: Optional[float] = None
+
+        # Counters
+        self.keepalives_sent = 0
+        self.preemptive_refreshes = 0
+        self.reactive_relogins = 0
+
+    @property
+    def predicted_lifetime(self) -> Optional[float]:
+        """Conservative session lifetime estimate, None until learned"""
+        if not self.observed_lifetimes:
+            return None
+        return max(self.min_lifetime, min(self.observed_lifetimes) * self.safety_margin)
+
+    @property
+    def predicted_expiry(self) -> Optional[float]:
+        """Monotonic timestamp at which the current session is expected to die"""
+        lifetime = self.predicted_lifetime
+        if lifetime is None or self.logged_in_at is None:
+            return None
+        return self.logged_in_at + lifetime
+
+    @property
+    def keepalive_after(self) -> float:
+        """Idle seconds before a keep-alive is worth sending"""
+        lifetime = self.predicted_lifetime
+        if lifetime is None:
+            return self.keepalive_interval
+        return max(1.0, lifetime * self.keepalive_fraction)
+
+    def mark_login(self):
+        """Record a fresh login on the active session"""
+        now = time.monotonic()
+        self.logged_in_at = now
+        self.last_activity_at = now
+        self.last_keepalive_at = None
+        self.refresh_failures = 0
+        self.next_refresh_at = None
+
+    def mark_activity(self):
+        """Record a successful authenticated response (lower bound of the session's lifetime, keeps it warm)"""
+        self.last_activity_at = time.monotonic()
+
+    def mark_expired(self):
+        """Record a reactive logout and learn the lifetime from it"""
+        self.reactive_relogins += 1
+        if self.logged_in_at is None:
+            return
+
+        # Last successful request is the lower bound of when the session died
+        last_alive = self.last_activity_at or time.monotonic()
+        lifetime = last_alive - self.logged_in_at
+        if lifetime > 0:
+            self.observed_lifetimes.append(lifetime)
+            logger.info(f"📏 Session lifetime observed: {lifetime:.0f}s (predicted: {self.predicted_lifetime:.0f}s)")
+        self.logged_in_at = None
+
+    async def tick(self):
+        """Called once per monitoring loop - keep-alive timer and pre-emptive refresh"""
+        if self.logged_in_at is None:
+            return
+
+        # The timer covers the gaps between backed-off polls, so it runs on its own
+        if self.keepalive_task is None or self.keepalive_task.done():
+            self.keepalive_task = asyncio.create_task(self._keepalive_loop())
+
+        now = time.monotonic()
+
+        # Pre-emptive re-login on a parallel session before predicted expiry
+        expiry = self.predicted_expiry
+        if expiry is None or now < expiry - self.refresh_lead:
+            return
+        if self.refresh_task is not None and not self.refresh_task.done():
+            return
+        if self.next_refresh_at is not None and now < self.next_refresh_at:
+            return
+        self.refresh_task = asyncio.create_task(self._refresh_session())
+
+    async def _keepalive_loop(self):
+        """Sleep until the session has been idle for keepalive_after, then touch it"""
+        while self.logged_in_at is not None:
+            last_touch = max(self.last_activity_at or 0.0, self.last_keepalive_at or 0.0)
+            wait = last_touch + self.keepalive_after - time.monotonic()
+            if wait > 0:
+                # Polls moving last_activity_at forward just push the deadline out
+                await asyncio.sleep(wait)
+                continue
+
+            self.last_keepalive_at = time.monotonic()
+            async with self.bot.poll_lock:
+                status = await asyncio.to_thread(self._keepalive)
+            if status == 'alive':
+                self.mark_activity()
+            elif status == 'expired':
+                # Let the monitoring loop log in again (and catch up) before its next poll
+                self.mark_expired()
+                self.bot.logged_in = False
+                self.bot.request_catchup()
+
+    def _keepalive(self) -> str:
+        """HEAD the SMS page without following redirects - a redirect to login means expired"""
+        try:
+            response = self.bot.session.head(self.bot.sms_url, allow_redirects=False, timeout=10)
+            self.keepalives_sent += 1
+            if response.status_code in (301, 302, 303, 307, 308):
+                location = response.headers.get('Location', '')
+                if 'login' in location.lower() or 'signin' in location.lower():
+                    logger.warning("🔓 Keep-alive found session expired")
+                    return 'expired'
+            return 'alive' if response.status_code < 400 else 'error'
+        except Exception as e:
+            logger.warning(f"⚠️ Keep-alive failed: {e}")
+            return 'error'
+
+    def _refresh_failed(self):
+        """Back off before the next pre-emptive attempt - the reactive re-login still covers expiry"""
+        self.refresh_failures += 1
+        delay = min(self.max_retry_delay, self.refresh_lead * 2 ** (self.refresh_failures - 1))
+        self.next_refresh_at = time.monotonic() + delay
+        logger.warning(f"⚠️ Pre-emptive re-login failed ({self.refresh_failures}x), retrying in {delay:.0f}s")
+
+    async def _refresh_session(self):
+        """Login on a new session in a worker thread and swap it in on success"""
+        new_session = None
+        try:
+            logger.info("🔄 Pre-emptive re-login before predicted session expiry...")
+            new_session = self.bot.create_session()
+            if not await asyncio.to_thread(self.bot.login_once, new_session):
+                logger.warning("⚠️ Pre-emptive re-login failed, keeping current session")
+                new_session.close()
+                self._refresh_failed()
+                return
+
+            # Swap (and close the old session) only between polls - no request is in flight on it
+            async with self.bot.poll_lock:
+                old_session = self.bot.session
+                self.bot.session = new_session
+                new_session = None
+                self.bot.logged_in = True
+                self.preemptive_refreshes += 1
+                self.mark_login()
+                logger.info("✅ Fresh session swapped in")
+
+                try:
+                    old_session.close()
+                except Exception:
+                    pass
+
+        except asyncio.CancelledError:
+            if new_session is not None:
+                new_session.close()
+            raise
+        except Exception as e:
+            logger.error(f"❌ Pre-emptive re-login error: {e}")
+            self._refresh_failed()
+
+    async def close(self):
+        """Cancel the keep-alive timer and any pre-emptive re-login, and wait for both"""
+        tasks = [task for task in (self.keepalive_task, self.refresh_task) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.keepalive_task = None
+        self.refresh_task = None
+
+    def get_stats(self) -> dict:
+        """Session manager state for health/metrics"""
+        now = time.monotonic()
+        expiry = self.predicted_expiry
+        return {
+            'predicted_lifetime': self.predicted_lifetime,
+            'seconds_to_expiry': (expiry - now) if expiry is not None else None,
+            'session_age': (now - self.logged_in_at) if self.logged_in_at is not None else None,
+            'idle_seconds': (now - self.last_activity_at) if self.last_activity_at is not None else None,
+            'keepalives_sent': self.keepalives_sent,
+            'refresh_failures': self.refresh_failures,
+            'preemptive_refreshes': self.preemptive_refreshes,
+            'reactive_relogins': self.reactive_relogins,
+        }
@@ -4,13 +4,16 @@ TaskTreasure OTP Bot - Complete System
 Runs both OTP monitoring and user interaction bots
 """
 
+import os
 import subprocess
 import sys
+import time
 
 if __name__ == "__main__":
     print("🚀 STARTING COMPLETE OTP BOT SYSTEM...")
     try:
-        subprocess.run([sys.executable, "run_complete_bot.py"])
+        # Child's startup profile counts from here (interpreter start + imports included)
+        subprocess.run([sys.executable, "run_complete_bot.py"], env=dict(os.environ, STARTUP_T0=str(time.time())))
     except Exception as e:
         print(f"❌ Complete system error: {e}")
         print("🔄 Fallback: Starting number bot only...")
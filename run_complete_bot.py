@@ -2,163 +2,288 @@
 """
 Complete OTP Bot System
 Runs both the OTP monitoring bot and the user interaction bot
+
+Modes (first argument or BOT_MODE):
+- all      monitor + user bot on one event loop (default)
+- split    bus, monitor and user bot as separate child processes
+- bus      message bus broker only
+- monitor  panel monitor only, talks to the user bot over the bus
+- userbot  Telegram user bot only, talks to the monitor over the bus
 """
 
 import asyncio
 import logging
-import threading
+import os
+import sys
 import time
-from datetime import datetime
-from http.server import HTTPServer, BaseHTTPRequestHandler
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
 
-class QuickHealthHandler(BaseHTTPRequestHandler):
-    """Immediate health check handler"""
-    def do_GET(self):
-        self.send_response(200)
-        self.send_header('Content-type', 'text/html; charset=utf-8')
-        self.end_headers()
-        
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>TaskTreasure OTP Bot System</title>
-            <meta charset="utf-8">
-        </head>
-        <body>
-            <h1>🤖 TaskTreasure OTP Bot System</h1>
-            <h2>✅ System Status: Running</h2>
-            <p>🕒 <strong>Server Time:</strong> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
-            
-            <h3>🔧 Available Services:</h3>
-            <ul>
-                <li>📡 <strong>OTP Monitor:</strong> Scraping website for OTP messages</li>
-                <li>📱 <strong>User Bot:</strong> Telegram bot for number requests</li>
-                <li>🔔 <strong>Notifications:</strong> Individual user OTP delivery</li>
-                <li>📢 <strong>Channel:</strong> Broadcasting all OTPs to channel</li>
-            </ul>
-            
-            <h3>🌍 Supported Countries:</h3>
-            <p>Venezuela, Tunisia, Tanzania, Jordan + More</p>
-            
-            <hr>
-            <p><small>Powered by @tasktreasur_support | TaskTreasure OTP System</small></p>
-        </body>
-        </html>
-        """
-        self.wfile.write(html_content.encode('utf-8'))
-    
-    def log_message(self, format, *args):
-        # Suppress default HTTP server logs
-        pass
-
-def start_health_server():
-    """Start health check server immediately"""
-    try:
-        import os
-        port = int(os.environ.get('PORT', 10000))
-        
-        server = HTTPServer(('0.0.0.0', port), QuickHealthHandler)
-        logger.info(f"🌐 Health server starting on port {port}")
-        server.serve_forever()
-    except Exception as e:
-        logger.error(f"❌ Health server error: {e}")
+from health_server import HealthServer
+from loop_watchdog import WATCHDOG
+from metrics import REGISTRY
+from startup_profile import STARTUP
+from supervisor import RestartPolicy, Supervisor, SupervisorEscalation
+from log_setup import setup_logging
+
+logger = logging.getLogger(__name__)
 
 # Global shared instance
 SHARED_NUMBER_BOT = None
 
+# Monitor currently running (for the supervisor's health check)
+CURRENT_MONITOR = None
+
+# Supervisor of this process (for the health server)
+CURRENT_SUPERVISOR = None
+
+# Split mode: mode -> child process record
+SPLIT_CHILDREN = {}
+
+# A logged-in poller must have succeeded this recently to be "ready"
+READY_MAX_POLL_AGE = 120
+
+async def start_health_server(status_provider) -> HealthServer:
+    """Bind the health port first so the platform sees us while the bots initialise"""
+    server = HealthServer(status_provider, port=int(os.environ.get('PORT', 10000)))
+    server.add_route('/metrics', REGISTRY.render, 'text/plain; version=0.0.4; charset=utf-8')
+    await server.start()
+    return server
+
+def collect_status() -> dict:
+    """Liveness/readiness from the real monitor, user bot and supervisor state
+    
+    Panel freshness only affects readiness: a panel outage or bad credentials
+    must not get the whole process (and the user bot with it) restarted.
+    """
+    reasons = []
+    live = True
+    
+    monitor = CURRENT_MONITOR
+    pollers = monitor.get_stats() if monitor else []
+    if monitor is not None and not monitor.is_healthy():
+        reasons.append("monitor has not completed a poll recently")
+    
+    children = CURRENT_SUPERVISOR.get_stats() if CURRENT_SUPERVISOR else {}
+    for name, child in children.items():
+        if child['state'] == 'failed':
+            live = False
+            reasons.append(f"{name} exceeded its restart intensity")
+    
+    ready = any(
+        poller['logged_in'] and poller['last_poll_age'] is not None
+        and poller['last_poll_age'] < READY_MAX_POLL_AGE
+        for poller in pollers
+    )
+    if not ready:
+        reasons.append("panel not logged in or no recent successful poll")
+    
+    number_bot = SHARED_NUMBER_BOT
+    return {
+        'live': live,
+        'ready': ready,
+        'reasons': reasons,
+        'pollers': pollers,
+        'outbound_queue_depth': sum(poller['outbound_inflight'] + poller['channel_pending'] for poller in pollers),
+        'waiting_users': sum(
+            1 for session in list(number_bot.user_sessions.values()) if session.get('waiting_for_otp')
+        ) if number_bot else None,
+        'supervisor': children,
+        'loop_watchdog': WATCHDOG.get_stats(),
+        'startup': STARTUP.get_stats(),
+    }
+
+def collect_split_status() -> dict:
+    """Split mode parent: healthy while every child process is running"""
+    children = {
+        mode: {
+            'pid': child['process'].pid,
+            'running': child['process'].returncode is None,
+            'restarts': child['restarts'],
+        }
+        for mode, child in SPLIT_CHILDREN.items()
+    }
+    down = [mode for mode, child in children.items() if not child['running']]
+    return {
+        'live': not down,
+        'ready': not down and bool(children),
+        'reasons': [f"{mode} process not running" for mode in down],
+        'processes': children,
+    }
+
 async def get_shared_number_bot():
     """Get or create shared number bot instance"""
     global SHARED_NUMBER_BOT
     if SHARED_NUMBER_BOT is None:
-        from telegram_number_bot import TelegramNumberBot
-        SHARED_NUMBER_BOT = TelegramNumberBot()
+        with STARTUP.phase('number_bot'):
+            from telegram_number_bot import TelegramNumberBot
+            number_bot = TelegramNumberBot(defer_init=True)
+            # Supabase connect, country scan and DB reads overlap, off the loop (and /health stays responsive)
+            await number_bot.initialize()
+        SHARED_NUMBER_BOT = number_bot
         logger.info("🔗 Shared number bot instance created")
     return SHARED_NUMBER_BOT
 
 async def run_otp_monitor(shared_number_bot):
-    """Run the REQUESTS-BASED OTP monitoring system (NO BROWSER)"""
-    try:
-        # Import requests-based system
-        from simple_requests_otp_bot import SimpleRequestsOTPBot
-        
-        logger.info("🚀 Starting REQUESTS-BASED OTP Monitor (NO BROWSER)...")
-        
-        # Create requests bot
-        bot = SimpleRequestsOTPBot()
-        
-        # Set shared number bot
-        bot.number_bot = shared_number_bot
-        logger.info("🔗 Connected to shared number bot")
-        
-        # Run requests monitoring
-        await bot.run()
-        
-    except Exception as e:
-        logger.error(f"❌ Requests OTP Monitor error: {e}")
-        logger.info("🔄 Restarting requests OTP system...")
-        
-        # Keep retrying with requests approach
-        await asyncio.sleep(10)
-        await run_otp_monitor(shared_number_bot)
+    """Run the REQUESTS-BASED OTP monitoring system (NO BROWSER) - restarted by the supervisor"""
+    global CURRENT_MONITOR
+    
+    # Import requests-based system
+    from panel_accounts import MultiAccountMonitor
+    
+    logger.info("🚀 Starting REQUESTS-BASED OTP Monitor (NO BROWSER)...")
+    
+    # One poller per panel account in this shard, all on the shared number bot
+    CURRENT_MONITOR = MultiAccountMonitor.from_env(number_bot=shared_number_bot)
+    logger.info("🔗 Connected to shared number bot")
+    
+    # Run requests monitoring
+    await CURRENT_MONITOR.run()
+
+def monitor_healthy() -> bool:
+    """Supervisor health check: the monitor is still completing polls"""
+    return CURRENT_MONITOR is None or CURRENT_MONITOR.is_healthy()
 
 async def run_user_bot(shared_number_bot):
-    """Run the user interaction bot using shared instance"""
+    """Run the user interaction bot using shared instance - restarted by the supervisor"""
+    logger.info("👥 Starting User Interaction Bot...")
+    
+    # Use the shared instance directly
+    await shared_number_bot.run_bot()
+
+def build_supervisor(children) -> Supervisor:
+    """Supervisor with the system's restart policy for (name, factory, health_check) children"""
+    global CURRENT_SUPERVISOR
+    supervisor = Supervisor("otp-system")
+    policy = RestartPolicy(initial_delay=2.0, max_delay=60.0, max_restarts=10, window=600.0)
+    for name, factory, health_check in children:
+        supervisor.add_child(name, factory, policy=policy, health_check=health_check)
+    CURRENT_SUPERVISOR = supervisor
+    return supervisor
+
+async def run_bus():
+    """Run the message bus broker"""
+    from message_bus import MessageBusServer
+    
+    await MessageBusServer().serve_forever()
+
+async def run_monitor_process():
+    """Monitor process: sessions come from, and OTPs go to, the bus"""
+    from message_bus import MessageBusClient, RemoteNumberBot
+    
+    WATCHDOG.start()
+    STARTUP.expect('first_poll')
+    client = MessageBusClient(name="monitor")
+    remote_number_bot = RemoteNumberBot(client)
+    await build_supervisor([
+        ("bus-client", client.run, None),
+        ("otp-monitor", lambda: run_otp_monitor(remote_number_bot), monitor_healthy),
+    ]).run()
+
+async def run_userbot_process():
+    """User bot process: delivers OTPs from the bus, publishes session changes"""
+    from message_bus import MessageBusClient, NumberBotBridge
+    
+    WATCHDOG.start()
+    STARTUP.expect('number_bot', 'telegram_polling')
+    client = MessageBusClient(name="userbot")
+    number_bot = await get_shared_number_bot()
+    bridge = NumberBotBridge(number_bot, client)
+    await build_supervisor([
+        ("bus-client", client.run, None),
+        ("session-bridge", bridge.run, None),
+        ("user-bot", lambda: run_user_bot(number_bot), None),
+    ]).run()
+
+async def run_split():
+    """Start bus, monitor and user bot as child processes and restart any that exit"""
+    await start_health_server(collect_split_status)
+    
+    async def spawn(mode):
+        env = dict(os.environ, BOT_MODE=mode, STARTUP_T0=str(time.time()))
+        process = await asyncio.create_subprocess_exec(sys.executable, os.path.abspath(__file__), mode, env=env)
+        restarts = SPLIT_CHILDREN[mode]['restarts'] + 1 if mode in SPLIT_CHILDREN else 0
+        SPLIT_CHILDREN[mode] = {'process': process, 'restarts': restarts}
+        logger.info(f"🧩 Started {mode} process (pid {process.pid})")
+    
+    await spawn('bus')
+    await asyncio.sleep(1)
+    await spawn('monitor')
+    await spawn('userbot')
+    
     try:
-        logger.info("👥 Starting User Interaction Bot...")
-        
-        # Use the shared instance directly
-        await shared_number_bot.run_bot()
-        
-    except Exception as e:
-        logger.error(f"❌ User Bot error: {e}")
-        # Keep retrying
-        await asyncio.sleep(10)
-        await run_user_bot(shared_number_bot)
+        while True:
+            await asyncio.sleep(2)
+            for mode, child in list(SPLIT_CHILDREN.items()):
+                if child['process'].returncode is not None:
+                    logger.warning(f"⚠️ {mode} process exited with {child['process'].returncode}, restarting in 5s...")
+                    await asyncio.sleep(5)
+                    await spawn(mode)
+    finally:
+        for child in SPLIT_CHILDREN.values():
+            if child['process'].returncode is None:
+                child['process'].terminate()
 
 async def main():
     """Main async function that runs both bots with shared state"""
     try:
         logger.info("🚀 Starting Complete OTP Bot System...")
         
-        # Give health server a moment to bind
-        await asyncio.sleep(1)
+        # Name whatever blocks the loop (sync Supabase/requests calls, heavy parsing)
+        WATCHDOG.start()
+        
+        # Startup report once users can talk to the bot and the first panel poll is in
+        STARTUP.expect('number_bot', 'telegram_polling', 'first_poll')
+        
+        # Health server first - it shares this loop and reports real state
+        with STARTUP.phase('health_server'):
+            await start_health_server(collect_status)
         
         # Create shared number bot instance
         shared_number_bot = await get_shared_number_bot()
         logger.info("✅ Shared bot instance ready")
         
-        # Run both bots concurrently with shared state
-        await asyncio.gather(
-            run_otp_monitor(shared_number_bot),
-            run_user_bot(shared_number_bot),
-            return_exceptions=True
-        )
-        
+        # Run both bots as supervised children with shared state
+        await build_supervisor([
+            ("otp-monitor", lambda: run_otp_monitor(shared_number_bot), monitor_healthy),
+            ("user-bot", lambda: run_user_bot(shared_number_bot), None),
+        ]).run()
+    
+    except SupervisorEscalation as e:
+        logger.critical(f"🛑 Crash loop, stopping: {e}")
+        raise
     except Exception as e:
         logger.error(f"❌ System error: {e}")
 
+PROCESS_MODES = {
+    'bus': run_bus,
+    'monitor': run_monitor_process,
+    'userbot': run_userbot_process,
+}
+
 if __name__ == "__main__":
-    print("🤖 Starting TaskTreasure OTP Bot System...")
-    print("Press Ctrl+C to stop the system")
+    # Only in the real entry point - spawned workers (upload parsing) re-import this module as __mp_main__
+    setup_logging()
+    STARTUP.mark('imports')
     
-    # Start health server in background thread FIRST
-    health_thread = threading.Thread(target=start_health_server, daemon=True)
-    health_thread.start()
+    mode = sys.argv[1] if len(sys.argv) > 1 else os.getenv('BOT_MODE', 'all')
     
-    # Wait a moment for port binding
-    time.sleep(2)
+    # Child processes of split mode - no health server, the parent owns the port
+    if mode in PROCESS_MODES:
+        logger.info(f"🚀 Starting {mode} process...")
+        try:
+            asyncio.run(PROCESS_MODES[mode]())
+        except KeyboardInterrupt:
+            logger.info(f"🛑 {mode} process stopped")
+        sys.exit(0)
+    
+    print("🤖 Starting TaskTreasure OTP Bot System...")
+    print("Press Ctrl+C to stop the system")
     
-    # Start main bot system
+    # Start main bot system (the health server starts first, on the same loop)
     try:
-        asyncio.run(main())
+        if mode == 'split':
+            asyncio.run(run_split())
+        else:
+            asyncio.run(main())
     except KeyboardInterrupt:
         logger.info("🛑 System stopped by user")
     except Exception as e:
@@ -17,26 +17,44 @@ from typing import List, Dict, Optional
 import requests
 from bs4 import BeautifulSoup
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+from adaptive_polling import AdaptivePollScheduler
+from catchup import CatchUpEngine, HighWaterMark
+from metrics import (
+    DEDUP_HITS, EXTRACTION_DURATION, NEW_OTPS, POLL_DURATION, POLL_ERRORS, ROWS_FETCHED,
+    TELEGRAM_SEND_RETRIES,
 )
+from panel_accounts import PanelAccount, default_account
+from panel_session import PanelSessionManager
+from targeted_polling import TargetedPollPlanner
+from telegram_delivery import ChannelPoster, TelegramDelivery
+from startup_profile import STARTUP
+from catchup import TIMESTAMP_FORMAT
+from tracing import TRACER, panel_now, panel_timestamp_to_epoch
+from log_setup import setup_logging
+
+# Setup logging
+setup_logging()
 logger = logging.getLogger(__name__)
 
 class SimpleRequestsOTPBot:
-    def __init__(self):
-        # Website credentials
-        self.login_url = "http://94.23.120.156/ints/login"
-        self.sms_url = "http://94.23.120.156/ints/client/SMSCDRStats"
-        self.username = "Roni_dada"
-        self.password = "Roni_dada"
+    def __init__(self, account: Optional[PanelAccount] = None, number_bot=None):
+        # Website credentials (one poller per panel account)
+        self.account = account or default_account()
+        self.login_url = self.account.login_url
+        self.sms_url = self.account.sms_url
+        self.ajax_url = self.account.ajax_url
+        self.username = self.account.username
+        self.password = self.account.password
         
         # Session for persistent cookies
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        })
+        self.session = self.create_session()
+        
+        # Held while a poll or catch-up uses the session - the session manager's
+        # keep-alive and session swap take it too
+        self.poll_lock = asyncio.Lock()
+        
+        # Session lifetime learning, idle keep-alive and pre-emptive re-login
+        self.session_manager = PanelSessionManager(self)
         
         # State management
         self.logged_in = False
@@ -44,27 +62,72 @@ class SimpleRequestsOTPBot:
         self.last_check_time = 0
         self.failure_count = 0
         self.max_hashes = 1000
+        self.last_poll_ok = False
+        
+        # Health: wall-clock time of the last successful poll, sends in flight
+        self.last_success_at: Optional[float] = None
+        self.outbound_inflight = 0
+        
+        # Poll cadence driven by waiting numbers, OTP arrivals and panel errors
+        self.poll_scheduler = AdaptivePollScheduler(
+            min_interval=0.5, hot_interval=1.0, idle_interval=2.0, max_interval=30.0
+        )
+        
+        # Full sweep every poll + fnum/frange queries for numbers awaiting OTP when it overflows
+        self.poll_planner = TargetedPollPlanner(enabled=os.getenv('TARGETED_POLLING', '1') != '0')
+        
+        # Newest processed row, persisted so a restart can page through the backlog
+        self.high_water_mark = HighWaterMark(os.getenv('PANEL_STATE_FILE', 'panel_state.json'), key=self.account.name)
+        self.processed_hashes.update(self.high_water_mark.hashes_at_mark)
+        self.last_mark_save = 0.0
+        
+        # Paginated catch-up after downtime/logout/page overflow (startup counts as downtime).
+        # catchup_since is the mark when the gap opened; while it is set the persisted
+        # mark stays put, so neither polls nor a restart can skip over the gap
+        self.catchup_engine = CatchUpEngine(self, page_size=100, max_parallel=3)
+        self.monitor_started_at = panel_now().strftime(TIMESTAMP_FORMAT)
+        self.catchup_since: Optional[str] = None
+        self.catchup_needed = False
+        if self.high_water_mark.timestamp:
+            self.request_catchup()
         
         # Telegram bot for channel messages
         self.bot_token = os.getenv('BOT_TOKEN')
         self.channel_id = "-1002724043027"
         
-        # Initialize number bot
-        try:
-            from telegram_number_bot import TelegramNumberBot
-            self.number_bot = TelegramNumberBot()
-            logger.info("✅ Number bot ready for user notifications")
-        except Exception as e:
-            logger.warning(f"⚠️ Number bot not available: {e}")
-            self.number_bot = None
+        # One bot (and connection pool) for every channel post
+        self.delivery = TelegramDelivery(self.bot_token) if self.bot_token else None
+        
+        # Channel posts go out from a paced background queue, off the poll path
+        self.channel_poster = ChannelPoster(self.delivery, self.channel_id) if self.delivery else None
+        
+        # Initialize number bot (unless a shared instance is handed in)
+        self.number_bot = number_bot
+        if self.number_bot is None:
+            try:
+                from telegram_number_bot import TelegramNumberBot
+                self.number_bot = TelegramNumberBot()
+                logger.info("✅ Number bot ready for user notifications")
+            except Exception as e:
+                logger.warning(f"⚠️ Number bot not available: {e}")
+                self.number_bot = None
+    
+    def create_session(self) -> requests.Session:
+        """Create a requests session with browser-like headers"""
+        session = requests.Session()
+        session.headers.update({
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+        })
+        return session
     
-    def login_once(self) -> bool:
-        """Login once using requests"""
+    def login_once(self, session: Optional[requests.Session] = None) -> bool:
+        """Login once using requests (on the active session unless one is given)"""
         try:
-            logger.info("🔐 Logging in with requests...")
+            logger.info(f"🔐 Logging in with requests ({self.account.name})...")
+            session = session or self.session
             
             # Get login page first
-            response = self.session.get(self.login_url, timeout=30)
+            response = session.get(self.login_url, timeout=30)
             if response.status_code != 200:
                 logger.error(f"❌ Login page failed: {response.status_code}")
                 return False
@@ -130,7 +193,7 @@ class SimpleRequestsOTPBot:
             headers = {
                 'Content-Type': 'application/x-www-form-urlencoded',
                 'Referer': self.login_url,
-                'Origin': 'http://94.23.120.156'
+                'Origin': self.account.origin
             }
             
             # Determine correct submit URL
@@ -139,15 +202,14 @@ class SimpleRequestsOTPBot:
                     submit_url = form_action
                 else:
                     # Relative URL - construct full URL
-                    base_url = "http://94.23.120.156/ints/"
-                    submit_url = base_url + form_action.lstrip('/')
+                    submit_url = f"{self.account.base_url}/{form_action.lstrip('/')}"
             else:
                 submit_url = self.login_url
             
             logger.info(f"Submitting to: {submit_url}")
             
             # Submit login
-            login_response = self.session.post(
+            login_response = session.post(
                 submit_url, 
                 data=login_data,
                 headers=headers,
@@ -170,7 +232,9 @@ class SimpleRequestsOTPBot:
             
             if any(success_indicators):
                 logger.info("✅ Login successful - found success indicator")
-                self.logged_in = True
+                if session is self.session:
+                    self.logged_in = True
+                    self.session_manager.mark_login()
                 return True
             else:
                 # Check for specific error messages
@@ -194,10 +258,17 @@ class SimpleRequestsOTPBot:
     
     def check_for_messages(self) -> List[Dict]:
         """Check for messages using AJAX endpoint with logout detection"""
+        self.last_poll_ok = False
+        poll_start = time.perf_counter()
+        poll_started_at = time.time()
         try:
             if not self.logged_in:
                 return []
             
+            # Full sweep first (it feeds the channel), then 🎯 targeted queries
+            # (fnum/frange) for numbers awaiting OTP
+            filter_sets = self.poll_planner.plan()
+            
             # First check if we're still logged in by accessing SMS page
             check_response = self.session.get(self.sms_url, timeout=15)
             if check_response.status_code != 200:
@@ -210,6 +281,8 @@ class SimpleRequestsOTPBot:
                 logger.warning(f"🔓 LOGOUT DETECTED! Redirected to: {final_url}")
                 logger.info("🔄 Attempting automatic re-login...")
                 self.logged_in = False
+                self.request_catchup()
+                self.session_manager.mark_expired()
                 
                 # Attempt re-login
                 if self.login_once():
@@ -226,6 +299,8 @@ class SimpleRequestsOTPBot:
                 logger.warning("🔓 LOGOUT DETECTED! On login page")
                 logger.info("🔄 Attempting automatic re-login...")
                 self.logged_in = False
+                self.request_catchup()
+                self.session_manager.mark_expired()
                 
                 if self.login_once():
                     logger.info("✅ Re-login successful, retrying message check...")
@@ -235,16 +310,74 @@ class SimpleRequestsOTPBot:
                     return []
             
             # 🚀 USE AJAX ENDPOINT FOR REAL DATA
-            from datetime import datetime
-            today = datetime.now().strftime('%Y-%m-%d')
+            messages = []
+            seen_rows = {}
+            sent_filters = []
+            overflowed = False
+            for filters in filter_sets:
+                if filters and not overflowed:
+                    # The sweep page holds every new row - targeted queries would only repeat it
+                    break
+                records = self.fetch_ajax_records(filters)
+                if records is None:
+                    return []
+                fetched_at = time.time()
+                sent_filters.append(filters)
+                
+                if filters == {} and self.page_overflowed(records):
+                    # More new rows than one page holds - page through the rest, and
+                    # fetch waiting users' numbers directly so they don't wait for it
+                    overflowed = True
+                    self.request_catchup()
+                
+                parsed = self.parse_ajax_records(records)
+                parsed_at = time.time()
+                for message_data in parsed:
+                    row_key = (message_data['timestamp'], message_data['number'], message_data['message'])
+                    if row_key in seen_rows:
+                        if filters == {}:
+                            seen_rows[row_key]['swept'] = True
+                        continue
+                    # Only rows from an unfiltered sweep may move the high-water mark
+                    message_data['swept'] = filters == {}
+                    seen_rows[row_key] = message_data
+                    # Stage timings for the OTP trace
+                    message_data['poll_started_at'] = poll_started_at
+                    message_data['fetched_at'] = fetched_at
+                    message_data['parsed_at'] = parsed_at
+                    messages.append(message_data)
+            
+            self.poll_planner.learn(messages, sent_filters)
+            
+            mode = "full sweep" if sent_filters == [{}] else f"full sweep + {len(sent_filters) - 1} targeted queries"
+            logger.debug(f"📊 Found {len(messages)} messages via AJAX ({mode})")
+            POLL_DURATION.observe(time.perf_counter() - poll_start, account=self.account.name,
+                                  mode='full' if sent_filters == [{}] else 'targeted')
+            self.last_poll_ok = True
+            return messages
             
-            ajax_url = "http://94.23.120.156/ints/client/res/data_smscdr.php"
+        except Exception as e:
+            logger.error(f"❌ Message check error: {e}")
+            self.failure_count += 1
+            return []
+    
+    def fetch_ajax_records(self, filters: Optional[Dict] = None, start: int = 0, length: int = 100) -> Optional[List]:
+        """POST one DataTables request to the SMS CDR endpoint, returns aaData or None on failure"""
+        data = self.fetch_ajax_page(filters, start, length)
+        if data is None:
+            return None
+        return data.get('aaData', [])
+    
+    def fetch_ajax_page(self, filters: Optional[Dict] = None, start: int = 0, length: int = 100) -> Optional[Dict]:
+        """POST one DataTables request, returns the whole JSON (rows + totals) or None on failure"""
+        try:
+            today = datetime.now().strftime('%Y-%m-%d')
             
             # DataTables headers for AJAX request
             headers = {
                 'Accept': 'application/json, text/javascript, */*; q=0.01',
                 'X-Requested-With': 'XMLHttpRequest',
-                'Referer': 'http://94.23.120.156/ints/client/SMSCDRStats',
+                'Referer': self.sms_url,
                 'Content-Type': 'application/x-www-form-urlencoded',
             }
             
@@ -262,67 +395,94 @@ class SimpleRequestsOTPBot:
                 'fgcli': '',
                 'fg': '0',
                 'draw': '1',
-                'start': '0',
-                'length': '100',
+                'start': str(start),
+                'length': str(length),
                 'search[value]': '',
                 'search[regex]': 'false',
                 '_': str(int(datetime.now().timestamp() * 1000))
             }
+            if filters:
+                params.update(filters)
             
             # Make AJAX request
-            response = self.session.post(ajax_url, data=params, headers=headers, timeout=15)
+            response = self.session.post(self.ajax_url, data=params, headers=headers, timeout=15)
             
             if response.status_code != 200:
                 logger.warning(f"⚠️ AJAX request failed: {response.status_code}")
-                return []
+                return None
+            
+            # Authenticated round-trip succeeded - the session was alive until now
+            self.session_manager.mark_activity()
             
             # Parse JSON response
             try:
                 data = response.json()
-                sms_records = data.get('aaData', [])
-                
-                messages = []
-                for record in sms_records:
-                    if isinstance(record, list) and len(record) >= 5:
-                        # Skip summary rows (like ['0,0,0,1', 0, 0, 0, 0, 0, 0])
-                        if isinstance(record[0], str) and ',' in record[0]:
-                            continue
-                            
-                        try:
-                            timestamp = str(record[0])
-                            service_range = str(record[1])  # Service description
-                            number = str(record[2])
-                            service = str(record[3])        # Service name (CLI column)
-                            message = str(record[4])
-                            
-                            # Debug: Log message content to understand what we're receiving
-                            if message and len(message) > 10:
-                                logger.info(f"📨 Message from {number}: {message[:100]}...")
-                            
-                            # Don't filter by 'code' keyword - let OTP extraction decide
-                            if message and len(message) > 5:
-                                messages.append({
-                                    'timestamp': timestamp,
-                                    'number': number,
-                                    'service': service,
-                                    'message': message,
-                                    'service_range': service_range
-                                })
-                        except Exception as parse_error:
-                            logger.warning(f"⚠️ AJAX record parse error: {parse_error}")
-                            continue
-                
-                logger.info(f"📊 Found {len(messages)} messages via AJAX")
-                return messages
-                
+                if not isinstance(data, dict):
+                    logger.error("❌ AJAX response is not a JSON object")
+                    return None
+                ROWS_FETCHED.inc(len(data.get('aaData', [])), account=self.account.name)
+                return data
             except Exception as json_error:
                 logger.error(f"❌ AJAX JSON parse error: {json_error}")
-                return []
+                return None
             
         except Exception as e:
-            logger.error(f"❌ Message check error: {e}")
-            self.failure_count += 1
-            return []
+            logger.error(f"❌ AJAX request error: {e}")
+            return None
+    
+    def request_catchup(self):
+        """Schedule a catch-up from the current mark (kept if an earlier gap is still open)"""
+        if self.catchup_since is None:
+            # No mark yet: nothing before this monitor started is owed
+            self.catchup_since = self.high_water_mark.timestamp or self.monitor_started_at
+        self.catchup_needed = True
+    
+    def page_overflowed(self, records: List) -> bool:
+        """True when a full first page holds only rows at or after the high-water mark
+        (with no mark, any full page may have overflowed)"""
+        mark = self.high_water_mark.timestamp
+        if len(records) < 100:
+            return False
+        if not mark:
+            return True
+        timestamps = [str(r[0]) for r in records if isinstance(r, list) and r and ',' not in str(r[0])]
+        # Rows sharing the mark's second may continue past the page too
+        return bool(timestamps) and min(timestamps) >= mark
+    
+    def parse_ajax_records(self, sms_records: List) -> List[Dict]:
+        """Convert DataTables aaData rows into message dicts"""
+        messages = []
+        for record in sms_records:
+            if isinstance(record, list) and len(record) >= 5:
+                # Skip summary rows (like ['0,0,0,1', 0, 0, 0, 0, 0, 0])
+                if isinstance(record[0], str) and ',' in record[0]:
+                    continue
+                    
+                try:
+                    timestamp = str(record[0])
+                    service_range = str(record[1])  # Service description
+                    number = str(record[2])
+                    service = str(record[3])        # Service name (CLI column)
+                    message = str(record[4])
+                    
+                    # Debug: Log message content to understand what we're receiving
+                    if message and len(message) > 10:
+                        logger.debug(f"📨 Message from {number}: {message[:100]}...")
+                    
+                    # Don't filter by 'code' keyword - let OTP extraction decide
+                    if message and len(message) > 5:
+                        messages.append({
+                            'timestamp': timestamp,
+                            'number': number,
+                            'service': service,
+                            'message': message,
+                            'service_range': service_range
+                        })
+                except Exception as parse_error:
+                    logger.warning(f"⚠️ AJAX record parse error: {parse_error}")
+                    continue
+        
+        return messages
     
     def extract_otp_data(self, message_data: Dict) -> Optional[Dict]:
         """Extract OTP from message - handles hyphenated codes like 752-637"""
@@ -386,27 +546,32 @@ class SimpleRequestsOTPBot:
                 logger.error("❌ No bot token available for channel sending")
                 return False
                 
-            import telegram
             from telegram.constants import ParseMode
-            
-            bot = telegram.Bot(token=self.bot_token)
+            from telegram.error import RetryAfter
             
             # Try Markdown first, fallback to plain text if parsing fails
             try:
-                await bot.send_message(
+                await self.delivery.send(
                     chat_id=self.channel_id,
                     text=message,
-                    parse_mode=ParseMode.MARKDOWN
+                    parse_mode=ParseMode.MARKDOWN,
+                    target='channel'
                 )
                 logger.info("📢 Message sent to channel with Markdown")
                 return True
+            except RetryAfter as flood_error:
+                # Plain text would hit the same flood limit
+                logger.error(f"❌ Channel flood limit: {flood_error}")
+                return False
             except Exception as markdown_error:
                 logger.warning(f"⚠️ Markdown failed: {markdown_error}")
+                TELEGRAM_SEND_RETRIES.inc(target='channel')
                 # Fallback to plain text
                 try:
-                    await bot.send_message(
+                    await self.delivery.send(
                         chat_id=self.channel_id,
-                        text=message
+                        text=message,
+                        target='channel'
                     )
                     logger.info("📢 Message sent to channel as plain text")
                     return True
@@ -417,6 +582,14 @@ class SimpleRequestsOTPBot:
         except Exception as e:
             logger.error(f"❌ Channel send error: {e}")
             return False
+    
+    def post_to_channel(self, message: str) -> bool:
+        """Queue a channel post; returns at once, the poster paces and retries it"""
+        if not self.channel_poster:
+            logger.error("❌ No bot token available for channel sending")
+            return False
+        self.channel_poster.post(message)
+        return True
 
     def escape_markdown(self, text: str) -> str:
         """Escape special characters for Telegram Markdown"""
@@ -671,14 +844,9 @@ Powered by @tasktreasur\\_support"""
 
     async def notify_user_otp(self, otp_data: Dict):
         """Notify users about new OTP"""
+        self.outbound_inflight += 1
         try:
-            # Channel notification - using original format
-            channel_message = self.format_channel_message(otp_data)
-            
-            await self.send_to_channel_direct(channel_message)
-            logger.info(f"📢 Channel notified: {otp_data['otp_code']}")
-            
-            # Individual user notifications
+            # Individual user notification first - the user never waits on the channel
             if self.number_bot:
                 await self.number_bot.notify_user_otp(
                     otp_data['number'], 
@@ -686,69 +854,192 @@ Powered by @tasktreasur\\_support"""
                     otp_data['service'], 
                     otp_data['message']
                 )
+                self.record_delivery_latency('user_latency_ms', otp_data)
+            
+            # Channel notification - using original format, queued (a channel 429 can't stall polling)
+            with TRACER.span('format'):
+                channel_message = self.format_channel_message(otp_data)
+            
+            with TRACER.span('channel_enqueue'):
+                self.post_to_channel(channel_message)
+            logger.info(f"📢 Channel post queued: {otp_data['otp_code']}")
             
         except Exception as e:
             logger.error(f"❌ User notification error: {e}")
+        finally:
+            self.outbound_inflight -= 1
+    
+    def record_delivery_latency(self, key: str, otp_data: Dict):
+        """Panel row timestamp → now, on the current OTP trace"""
+        panel_epoch = panel_timestamp_to_epoch(otp_data.get('timestamp'))
+        if panel_epoch:
+            TRACER.set_attribute(key, round((time.time() - panel_epoch) * 1000))
+    
+    async def process_messages(self, messages: List[Dict]) -> int:
+        """Dedup, notify and advance the high-water mark; returns how many new OTPs were sent"""
+        new_otps = 0
+        for msg in messages:
+            extract_started_at = time.time()
+            with EXTRACTION_DURATION.time():
+                otp_data = self.extract_otp_data(msg)
+            dedup_started_at = time.time()
+            msg_hash = self.get_message_hash(msg['message'])
+            if otp_data:
+                if msg_hash in self.processed_hashes:
+                    DEDUP_HITS.inc(account=self.account.name)
+                else:
+                    # New OTP found
+                    self.processed_hashes.add(msg_hash)
+                    new_otps += 1
+                    dedup_done_at = time.time()
+                    
+                    # Trace from the panel row timestamp (second precision) to delivery
+                    with TRACER.trace('otp', start=panel_timestamp_to_epoch(msg['timestamp']) or msg.get('poll_started_at'),
+                                      account=self.account.name, number=otp_data['number'],
+                                      service=otp_data['service'], panel_timestamp=msg['timestamp']) as trace:
+                        TRACER.record('fetch', msg.get('poll_started_at'), msg.get('fetched_at'))
+                        TRACER.record('parse', msg.get('fetched_at'), msg.get('parsed_at'))
+                        TRACER.record('extract', extract_started_at, dedup_started_at)
+                        TRACER.record('dedup', dedup_started_at, dedup_done_at)
+                        
+                        logger.info(f"⚡ NEW OTP [{trace.trace_id}]: {otp_data['otp_code']} → {otp_data['service']} ({otp_data['number']})")
+                        
+                        # Notify users
+                        await self.notify_user_otp(otp_data)
+                    NEW_OTPS.inc(account=self.account.name)
+            # Targeted rows don't prove everything before them was seen, and an
+            # open gap keeps the mark where it was until the catch-up closes it
+            if msg.get('swept') and self.catchup_since is None:
+                self.high_water_mark.advance(msg['timestamp'], msg_hash)
+        
+        # Cleanup old hashes
+        if len(self.processed_hashes) > self.max_hashes:
+            old_hashes = list(self.processed_hashes)[:500]
+            for old_hash in old_hashes:
+                self.processed_hashes.remove(old_hash)
+            self.processed_hashes.update(self.high_water_mark.hashes_at_mark)
+            logger.info("🧹 Cleaned old message hashes")
+        
+        # Throttled persistence - at most every 5 seconds, file lock + I/O off the event loop
+        if time.monotonic() - self.last_mark_save >= 5:
+            self.last_mark_save = time.monotonic()
+            await self.high_water_mark.save_async()
+        
+        return new_otps
+    
+    async def run_catchup(self) -> int:
+        """Page through everything since the gap opened, streaming pages into processing"""
+        self.catchup_needed = False
+        since = self.catchup_since
+        if not since:
+            return 0
+        
+        start_time = time.monotonic()
+        pages = 0
+        new_otps = 0
+        # Newest rows streamed - the mark jumps there once the whole gap is covered
+        newest, newest_hashes = None, []
+        async for page in self.catchup_engine.stream(since):
+            pages += 1
+            new_otps += await self.process_messages(page)
+            for msg in page:
+                if newest is None or msg['timestamp'] > newest:
+                    newest, newest_hashes = msg['timestamp'], []
+                if msg['timestamp'] == newest:
+                    newest_hashes.append(self.get_message_hash(msg['message']))
+        
+        if not self.catchup_engine.last_run_complete:
+            # Gap still open - keep the mark and try again on the next pass
+            self.catchup_needed = True
+            logger.warning(f"⚠️ Catch-up from {since} incomplete after {pages} pages, will retry")
+            return new_otps
+        
+        self.catchup_since = None
+        for message_hash in newest_hashes:
+            self.high_water_mark.advance(newest, message_hash)
+        await self.high_water_mark.save_async()
+        self.last_mark_save = time.monotonic()
+        logger.info(f"⏩ Catch-up done: {pages} pages, {new_otps} new OTPs in {time.monotonic() - start_time:.1f}s")
+        return new_otps
     
     async def run(self):
         """Main monitoring loop"""
         logger.info("🚀 SIMPLE REQUESTS OTP BOT STARTING...")
         
-        while True:
-            try:
-                # Login if needed
-                if not self.logged_in:
-                    if not self.login_once():
-                        logger.error("❌ Login failed, retrying in 30 seconds...")
-                        await asyncio.sleep(30)
-                        continue
-                
-                # Check for messages
-                messages = self.check_for_messages()
-                
-                if messages:
+        # Number bot may be swapped for a shared instance after construction
+        self.poll_scheduler.number_bot = self.number_bot
+        self.poll_planner.number_bot = self.number_bot
+        
+        try:
+            while True:
+                try:
+                    # Login if needed
+                    if not self.logged_in:
+                        async with self.poll_lock:
+                            logged_in = await asyncio.to_thread(self.login_once)
+                        if not logged_in:
+                            logger.error("❌ Login failed, retrying in 30 seconds...")
+                            await asyncio.sleep(30)
+                            continue
+                        STARTUP.mark('panel_login')
+                    
+                    async with self.poll_lock:
+                        # Back from downtime/logout - drain the backlog before steady-state polling
+                        if self.catchup_needed:
+                            await self.run_catchup()
+                        
+                        # Check for messages
+                        # Blocking HTTP runs off the event loop so the user bot and health server stay responsive
+                        messages = await asyncio.to_thread(self.check_for_messages)
                     new_otps = 0
-                    for msg in messages:
-                        otp_data = self.extract_otp_data(msg)
-                        if otp_data:
-                            msg_hash = self.get_message_hash(otp_data['message'])
-                            if msg_hash not in self.processed_hashes:
-                                # New OTP found
-                                self.processed_hashes.add(msg_hash)
-                                new_otps += 1
-                                
-                                logger.info(f"⚡ NEW OTP: {otp_data['otp_code']} → {otp_data['service']} ({otp_data['number']})")
-                                
-                                # Notify users
-                                await self.notify_user_otp(otp_data)
                     
-                    if new_otps == 0:
-                        logger.info(f"📊 Checked {len(messages)} messages - no new OTPs")
+                    if messages:
+                        new_otps = await self.process_messages(messages)
+                        
+                        if new_otps == 0:
+                            logger.info(f"📊 Checked {len(messages)} messages - no new OTPs")
                     
-                    # Cleanup old hashes
-                    if len(self.processed_hashes) > self.max_hashes:
-                        old_hashes = list(self.processed_hashes)[:500]
-                        for old_hash in old_hashes:
-                            self.processed_hashes.remove(old_hash)
-                        logger.info("🧹 Cleaned old message hashes")
-                
-                # Reset failure count on success
-                self.failure_count = 0
-                
-                # Wait before next check
-                await asyncio.sleep(2)  # Check every 2 seconds
-                
-            except Exception as e:
-                logger.error(f"❌ Monitoring error: {e}")
-                self.failure_count += 1
-                
-                # Re-login after 10 consecutive failures
-                if self.failure_count >= 10:
-                    logger.warning("🔄 Too many failures, forcing re-login...")
-                    self.logged_in = False
+                    # Reset failure count on success
                     self.failure_count = 0
-                
-                await asyncio.sleep(5)
+                    
+                    # Keep-alive / pre-emptive re-login before the session expires
+                    await self.session_manager.tick()
+                    
+                    # Wait before next check - adaptive interval
+                    if self.last_poll_ok:
+                        self.last_success_at = time.time()
+                        STARTUP.mark('first_poll')
+                        self.poll_scheduler.record_success(new_otps)
+                    else:
+                        POLL_ERRORS.inc(account=self.account.name)
+                        self.poll_scheduler.record_error()
+                    await self.poll_scheduler.sleep()
+                    
+                except Exception as e:
+                    logger.error(f"❌ Monitoring error: {e}")
+                    self.failure_count += 1
+                    
+                    # Re-login after 10 consecutive failures
+                    if self.failure_count >= 10:
+                        logger.warning("🔄 Too many failures, forcing re-login...")
+                        self.logged_in = False
+                        self.failure_count = 0
+                    
+                    # Exponential back-off while the panel keeps failing
+                    POLL_ERRORS.inc(account=self.account.name)
+                    self.poll_scheduler.record_error()
+                    await self.poll_scheduler.sleep()
+        finally:
+            await self.close()
+    
+    async def close(self):
+        """Stop background tasks and close the panel and Bot API sessions (shutdown path)"""
+        await self.session_manager.close()
+        self.session.close()
+        if self.channel_poster:
+            await self.channel_poster.close()
+        if self.delivery:
+            await self.delivery.close()
 
 if __name__ == "__main__":
     bot = SimpleRequestsOTPBot()
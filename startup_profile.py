@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Startup Profile
+Times cold start: interpreter + imports, each init phase, and the first
+milestones (user bot polling, first panel poll). The report is logged once
+every expected milestone has been reached and is kept for /health and
+/metrics.
+
+run_bot.py passes its own clock in STARTUP_T0 so the child's interpreter
+start and imports are included; otherwise time is measured from the first
+import of this module.
+
+    with STARTUP.phase('number_bot'):
+        ...
+    STARTUP.mark('telegram_polling')
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+STARTUP_SECONDS = REGISTRY.gauge(
+    'startup_seconds', 'Seconds from process start to each startup phase end / milestone', ['phase'])
+
+
+def _origin() -> float:
+    try:
+        return float(os.environ['STARTUP_T0'])
+    except (KeyError, ValueError):
+        return time.time()
+
+
+class StartupProfile:
+    """Phase durations and milestone offsets relative to process start"""
+
+    def __init__(self, origin: Optional[float] = None):
+        self.origin = origin if origin is not None else _origin()
+        # name -> (offset from origin when it ended, own duration or None for milestones)
+        self.events: Dict[str, tuple] = {}
+        self.expected: List[str] = []
+        self.reported = False
+        self._lock = threading.Lock()
+
+    def _record(self, name: str, duration: Optional[float]):
+        offset = time.time() - self.origin
+        with self._lock:
+            if name in self.events:
+                return
+            self.events[name] = (offset, duration)
+        STARTUP_SECONDS.set(offset, phase=name)
+        self._maybe_report()
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a block; recorded the first time it completes"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, time.perf_counter() - started)
+
+    def mark(self, name: str):
+        """Milestone reached (only the first one counts)"""
+        if name not in self.events:
+            self._record(name, None)
+
+    def expect(self, *names: str):
+        """Milestones that complete startup; the report is logged when all are in"""
+        self.expected = list(names)
+        self._maybe_report()
+
+    def _maybe_report(self):
+        if self.reported or not self.expected or any(name not in self.events for name in self.expected):
+            return
+        self.reported = True
+        logger.info(self.format_report())
+
+    def format_report(self) -> str:
+        lines = [f"⏱️ Startup profile ({self.total_ms():.0f}ms to ready)"]
+        for name, (offset, duration) in sorted(self.events.items(), key=lambda item: item[1][0]):
+            took = f"{duration * 1000:7.0f}ms" if duration is not None else f"{'-':>9}"
+            lines.append(f"   {name:<22} {took}   @ {offset * 1000:7.0f}ms")
+        return "\n".join(lines)
+
+    def total_ms(self) -> float:
+        offsets = [self.events[name][0] for name in self.expected if name in self.events]
+        return max(offsets, default=0.0) * 1000
+
+    def get_stats(self) -> dict:
+        return {
+            'ready': self.reported,
+            'ready_ms': round(self.total_ms()) if self.reported else None,
+            'phases': {
+                name: {
+                    'at_ms': round(offset * 1000),
+                    'took_ms': round(duration * 1000) if duration is not None else None,
+                }
+                for name, (offset, duration) in self.events.items()
+            },
+        }
+
+
+# Process-wide profile
+STARTUP = StartupProfile()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Task Supervisor
+Runs long-lived coroutines (monitor, user bot, bus client...) as supervised
+children instead of letting them restart by recursively awaiting themselves.
+
+- Restart policy per child: exponential back-off and a maximum restart
+  intensity (N restarts within a window) after which the supervisor gives up
+- Optional per-child health check; an unhealthy child is restarted
+- Structured cancellation: cancelling the supervisor cancels and awaits
+  every child
+- Restart metrics for logging/health endpoints
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Restart types
+PERMANENT = "permanent"   # always restarted, even after a clean return
+TRANSIENT = "transient"   # restarted only after a crash
+
+
+class SupervisorEscalation(Exception):
+    """A child exceeded its restart intensity - the supervisor stops"""
+
+    def __init__(self, child: str, restarts: int, window: float):
+        super().__init__(f"{child} restarted {restarts} times within {window:.0f}s")
+        self.child = child
+
+
+class RestartPolicy:
+    """Back-off and restart intensity for one child"""
+
+    def __init__(self, initial_delay: float = 1.0, max_delay: float = 60.0, backoff_factor: float = 2.0,
+                 max_restarts: int = 10, window: float = 300.0, reset_after: float = 120.0):
+        # Delay before restart n is initial_delay * backoff_factor**(n-1), capped
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.backoff_factor = backoff_factor
+
+        # More than max_restarts within window seconds escalates
+        self.max_restarts = max_restarts
+        self.window = window
+
+        # A run lasting this long resets the back-off
+        self.reset_after = reset_after
+
+    def delay(self, consecutive_failures: int) -> float:
+        if consecutive_failures <= 0:
+            return 0.0
+        return min(self.max_delay, self.initial_delay * (self.backoff_factor ** (consecutive_failures - 1)))
+
+
+class ChildSpec:
+    """A supervised coroutine factory and its bookkeeping"""
+
+    def __init__(self, name: str, factory: Callable[[], Awaitable], policy: RestartPolicy,
+                 restart: str = PERMANENT, health_check: Optional[Callable[[], bool]] = None):
+        self.name = name
+        self.factory = factory
+        self.policy = policy
+        self.restart = restart
+        self.health_check = health_check
+
+        self.task: Optional[asyncio.Task] = None
+        self.state = "pending"
+        self.started_at: Optional[float] = None
+        self.restart_times: deque = deque()
+        self.consecutive_failures = 0
+
+        # Metrics
+        self.starts = 0
+        self.crashes = 0
+        self.clean_exits = 0
+        self.unhealthy_restarts = 0
+        self.last_error: Optional[str] = None
+
+
+class Supervisor:
+    """One-for-one supervisor: a failing child is restarted on its own"""
+
+    def __init__(self, name: str = "supervisor", health_interval: float = 30.0, unhealthy_threshold: int = 3):
+        self.name = name
+        self.children: Dict[str, ChildSpec] = {}
+        self.runners: List[asyncio.Task] = []
+
+        # Health checks run every health_interval; this many failures in a row restarts the child
+        self.health_interval = health_interval
+        self.unhealthy_threshold = unhealthy_threshold
+
+    def add_child(self, name: str, factory: Callable[[], Awaitable], policy: Optional[RestartPolicy] = None,
+                  restart: str = PERMANENT, health_check: Optional[Callable[[], bool]] = None) -> ChildSpec:
+        """Register a child; factory is called again for every (re)start"""
+        child = ChildSpec(name, factory, policy or RestartPolicy(), restart, health_check)
+        self.children[name] = child
+        return child
+
+    async def run(self):
+        """Run all children until one escalates or the supervisor is cancelled"""
+        self.runners = [asyncio.create_task(self._run_child(child), name=f"{self.name}:{child.name}")
+                        for child in self.children.values()]
+        if any(child.health_check for child in self.children.values()):
+            self.runners.append(asyncio.create_task(self._health_loop(), name=f"{self.name}:health"))
+
+        try:
+            done, _ = await asyncio.wait(self.runners, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if not task.cancelled() and task.exception():
+                    raise task.exception()
+        finally:
+            await self.shutdown()
+
+    async def shutdown(self):
+        """Cancel every child and runner and wait for them to finish"""
+        for child in self.children.values():
+            if child.task and not child.task.done():
+                child.task.cancel()
+        for runner in self.runners:
+            if not runner.done():
+                runner.cancel()
+        await asyncio.gather(*self.runners, return_exceptions=True)
+        for child in self.children.values():
+            child.state = "stopped"
+
+    async def _run_child(self, child: ChildSpec):
+        while True:
+            child.state = "running"
+            child.starts += 1
+            child.started_at = time.monotonic()
+            child.task = asyncio.create_task(child.factory(), name=child.name)
+
+            crashed = False
+            try:
+                await child.task
+                child.clean_exits += 1
+                logger.warning(f"⚠️ {child.name} exited")
+            except asyncio.CancelledError:
+                if child.state == "unhealthy":
+                    # Cancelled by the health loop - restart it
+                    crashed = True
+                else:
+                    child.task.cancel()
+                    raise
+            except Exception as e:
+                crashed = True
+                child.crashes += 1
+                child.last_error = f"{type(e).__name__}: {e}"
+                logger.error(f"❌ {child.name} crashed: {child.last_error}")
+
+            if not crashed and child.restart == TRANSIENT:
+                child.state = "finished"
+                return
+
+            # Long healthy run - start the back-off over
+            if time.monotonic() - child.started_at >= child.policy.reset_after:
+                child.consecutive_failures = 0
+            child.consecutive_failures += 1
+
+            now = time.monotonic()
+            child.restart_times.append(now)
+            while child.restart_times and now - child.restart_times[0] > child.policy.window:
+                child.restart_times.popleft()
+            if len(child.restart_times) > child.policy.max_restarts:
+                child.state = "failed"
+                logger.critical(f"🛑 {child.name} exceeded restart intensity - giving up")
+                raise SupervisorEscalation(child.name, len(child.restart_times), child.policy.window)
+
+            delay = child.policy.delay(child.consecutive_failures)
+            child.state = "backoff"
+            logger.info(f"🔄 Restarting {child.name} in {delay:.1f}s "
+                        f"({len(child.restart_times)}/{child.policy.max_restarts} in window)")
+            await asyncio.sleep(delay)
+
+    async def _health_loop(self):
+        failures: Dict[str, int] = {}
+        while True:
+            await asyncio.sleep(self.health_interval)
+            for child in self.children.values():
+                if not child.health_check or child.state != "running":
+                    continue
+                try:
+                    healthy = bool(child.health_check())
+                except Exception:
+                    healthy = False
+
+                failures[child.name] = 0 if healthy else failures.get(child.name, 0) + 1
+                if failures[child.name] >= self.unhealthy_threshold:
+                    failures[child.name] = 0
+                    child.unhealthy_restarts += 1
+                    child.state = "unhealthy"
+                    logger.warning(f"⚠️ {child.name} unhealthy, restarting")
+                    child.task.cancel()
+
+    def get_stats(self) -> dict:
+        """Per-child state and restart counters"""
+        now = time.monotonic()
+        return {
+            name: {
+                'state': child.state,
+                'uptime': round(now - child.started_at, 1) if child.started_at and child.state == "running" else 0.0,
+                'starts': child.starts,
+                'restarts': max(0, child.starts - 1),
+                'crashes': child.crashes,
+                'clean_exits': child.clean_exits,
+                'unhealthy_restarts': child.unhealthy_restarts,
+                'restarts_in_window': len(child.restart_times),
+                'last_error': child.last_error,
+            }
+            for name, child in self.children.items()
+        }
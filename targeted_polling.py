@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Targeted Poll Planner
+Builds fnum/frange filters for the panel's SMS CDR AJAX endpoint for the
+numbers currently waiting for an OTP, grouped by the panel range they
+belong to. Every poll is still an unfiltered full sweep at the poll
+scheduler's cadence - that is what feeds the channel - and the targeted
+queries ride on top of it for the polls where the sweep's single page
+can't show everything (an overflowing page).
+"""
+
+import logging
+import re
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_number(number: str) -> str:
+    """Digits only - the panel shows numbers without '+' or spacing"""
+    return re.sub(r'\D', '', str(number or ''))
+
+
+class TargetedPollPlanner:
+    """Decides which AJAX filter sets the next poll sends"""
+
+    def __init__(self, enabled: bool = True, max_queries: int = 10, max_learned_ranges: int = 50000,
+                 number_bot=None):
+        self.enabled = enabled
+
+        # More targeted queries than this per poll is worse than relying on the catch-up
+        self.max_queries = max_queries
+
+        # number -> panel range name, learned from rows we have seen
+        self.range_by_number: Dict[str, str] = {}
+        self.max_learned_ranges = max_learned_ranges
+
+        # Source of user_sessions (TelegramNumberBot)
+        self.number_bot = number_bot
+
+        self.full_sweeps = 0
+        self.targeted_polls = 0
+
+    def waiting_numbers(self) -> List[str]:
+        """Normalised numbers held in user_sessions with waiting_for_otp"""
+        if not self.number_bot:
+            return []
+        try:
+            sessions = list(self.number_bot.user_sessions.values())
+        except Exception:
+            return []
+
+        numbers = set()
+        for session in sessions:
+            if session.get('waiting_for_otp') and session.get('number'):
+                numbers.add(normalize_number(session['number']))
+        numbers.discard('')
+        return sorted(numbers)
+
+    def plan(self) -> List[Dict[str, str]]:
+        """Filter sets for the next poll: the full sweep {} first, then targeted ones"""
+        if not self.enabled:
+            return [{}]
+
+        waiting = self.waiting_numbers()
+        if not waiting:
+            return [{}]
+
+        # Group by learned range; numbers with no known range are queried individually
+        by_range: Dict[str, List[str]] = {}
+        unknown: List[str] = []
+        for number in waiting:
+            range_name = self.range_by_number.get(number)
+            if range_name:
+                by_range.setdefault(range_name, []).append(number)
+            else:
+                unknown.append(number)
+
+        filter_sets = []
+        for range_name, numbers in by_range.items():
+            if len(numbers) == 1:
+                # A single number is narrower than its whole range
+                filter_sets.append({'fnum': numbers[0]})
+            else:
+                filter_sets.append({'frange': range_name})
+        for number in unknown:
+            filter_sets.append({'fnum': number})
+
+        if len(filter_sets) > self.max_queries:
+            # Too many to be cheap - the sweep and the overflow catch-up cover them
+            return [{}]
+
+        return [{}] + filter_sets
+
+    def learn(self, messages: List[Dict], filter_sets: List[Dict[str, str]]):
+        """Record number→range from fetched rows and count the queries sent"""
+        for message_data in messages:
+            number = normalize_number(message_data.get('number'))
+            range_name = message_data.get('service_range')
+            if number and range_name and range_name != 'None':
+                if number not in self.range_by_number and len(self.range_by_number) >= self.max_learned_ranges:
+                    continue
+                self.range_by_number[number] = range_name
+
+        if {} in filter_sets:
+            self.full_sweeps += 1
+        if any(filters for filters in filter_sets):
+            self.targeted_polls += 1
+
+    def get_stats(self) -> dict:
+        """Planner counters for logging/health"""
+        return {
+            'enabled': self.enabled,
+            'waiting_numbers': len(self.waiting_numbers()),
+            'learned_ranges': len(self.range_by_number),
+            'full_sweeps': self.full_sweeps,
+            'targeted_polls': self.targeted_polls,
+        }
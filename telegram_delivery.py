@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Telegram Delivery
+One long-lived telegram.Bot per process for outbound messages (channel
+posts, OTP notifications, admin messages, broadcasts) instead of building
+a new Bot/Application - and a new HTTP connection pool - for every send.
+
+The Bot API endpoint comes from TELEGRAM_API_URL so load tests can point
+the bots at the local fake API (fake_telegram_api.py).
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Iterable, Optional, Tuple
+
+from metrics import (
+    CHANNEL_POSTS_DROPPED, CHANNEL_QUEUE_DELAY, CHANNEL_QUEUE_DEPTH, TELEGRAM_SEND_DURATION, TELEGRAM_SEND_FAILURES,
+    TELEGRAM_SEND_RETRIES,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_API_URL = "https://api.telegram.org"
+
+
+def api_url() -> str:
+    return os.getenv('TELEGRAM_API_URL', DEFAULT_API_URL).rstrip('/')
+
+
+def build_bot(token: str, connection_pool_size: int = 64):
+    """telegram.Bot on TELEGRAM_API_URL with a pool sized for concurrent sends"""
+    import telegram
+    from telegram.request import HTTPXRequest
+
+    base = api_url()
+    return telegram.Bot(
+        token=token,
+        base_url=f"{base}/bot",
+        base_file_url=f"{base}/file/bot",
+        request=HTTPXRequest(connection_pool_size=connection_pool_size),
+    )
+
+
+def build_application(token: str):
+    """Application builder on TELEGRAM_API_URL (the user bot's polling application)"""
+    from telegram.ext import Application
+
+    base = api_url()
+    return Application.builder().token(token).base_url(f"{base}/bot").base_file_url(f"{base}/file/bot").build()
+
+
+def _retry_after_seconds(error) -> float:
+    retry_after = getattr(error, 'retry_after', 1)
+    # timedelta in newer python-telegram-bot releases, int before
+    return retry_after.total_seconds() if hasattr(retry_after, 'total_seconds') else float(retry_after)
+
+
+class TelegramDelivery:
+    """Shared outbound bot with flood-wait handling and send metrics"""
+
+    def __init__(self, token: str, max_flood_retries: int = 1):
+        self.token = token
+        self.max_flood_retries = max_flood_retries
+        self._bot = None
+        # Only a bot built here is shut down by close() - a shared one belongs to its Application
+        self._owns_bot = False
+        self.stats = {'sent': 0, 'failed': 0, 'flood_waits': 0, 'flood_wait_seconds': 0.0}
+
+    @property
+    def bot(self):
+        if self._bot is None:
+            self._bot = build_bot(self.token)
+            self._owns_bot = True
+        return self._bot
+
+    def use_bot(self, bot):
+        """Share an existing bot (e.g. the running Application's) instead of a separate one"""
+        self._bot = bot
+        self._owns_bot = False
+
+    async def close(self):
+        """Close the connection pool of a bot built here"""
+        if self._bot is not None and self._owns_bot:
+            # The bot is never initialize()d, so Bot.shutdown() would skip its request objects
+            await self._bot.request.shutdown()
+        self._bot = None
+        self._owns_bot = False
+
+    async def send(self, chat_id, text: str, parse_mode: Optional[str] = None, target: str = 'user',
+                   flood_retries: Optional[int] = None, **kwargs):
+        """send_message that waits out 429 retry_after (up to max_flood_retries); raises on failure
+
+        flood_retries=0 hands a RetryAfter straight back to a caller that reschedules
+        the send itself, so it is not counted as a failure.
+        """
+        from telegram.error import RetryAfter
+
+        max_retries = self.max_flood_retries if flood_retries is None else flood_retries
+        send_start = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                message = await self.bot.send_message(chat_id=chat_id, text=text, parse_mode=parse_mode, **kwargs)
+                TELEGRAM_SEND_DURATION.observe(time.perf_counter() - send_start, target=target)
+                self.stats['sent'] += 1
+                return message
+            except RetryAfter as e:
+                wait = _retry_after_seconds(e)
+                self.stats['flood_waits'] += 1
+                self.stats['flood_wait_seconds'] += wait
+                if flood_retries == 0:
+                    raise
+                if attempt >= max_retries:
+                    TELEGRAM_SEND_FAILURES.inc(target=target)
+                    self.stats['failed'] += 1
+                    raise
+                attempt += 1
+                TELEGRAM_SEND_RETRIES.inc(target=target)
+                logger.warning(f"⏳ Flood limit for {chat_id}, retrying in {wait:.1f}s")
+                await asyncio.sleep(wait)
+            except Exception:
+                TELEGRAM_SEND_FAILURES.inc(target=target)
+                self.stats['failed'] += 1
+                raise
+
+    async def broadcast(self, chat_ids: Iterable, text: str, rate: float = 10.0, **kwargs) -> Tuple[int, int]:
+        """Send one text to many chats at most `rate` messages/second; returns (sent, failed)"""
+        sent = failed = 0
+        interval = 1.0 / rate if rate > 0 else 0.0
+        next_send = time.monotonic()
+        for chat_id in chat_ids:
+            delay = next_send - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            next_send = max(next_send + interval, time.monotonic())
+            try:
+                await self.send(chat_id, text, target='broadcast', **kwargs)
+                sent += 1
+            except Exception as e:
+                failed += 1
+                logger.warning(f"Failed to send to user {chat_id}: {e}")
+        return sent, failed
+
+    def get_stats(self) -> dict:
+        return dict(self.stats, flood_wait_seconds=round(self.stats['flood_wait_seconds'], 1))
+
+
+class ChannelPoster:
+    """Background queue for channel posts, paced under the group limit (~20/min)
+
+    The poll loop only enqueues; flood waits and the Markdown → plain text
+    fallback happen here, so a channel 429 never delays user notifications.
+    """
+
+    def __init__(self, delivery: TelegramDelivery, chat_id, rate_per_minute: float = 20.0, burst: int = 20,
+                 max_queue: int = 1000):
+        self.delivery = delivery
+        self.chat_id = chat_id
+
+        # Token bucket: bursts of up to `burst` posts, then rate_per_minute
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.tokens = float(burst)
+        self.tokens_at = time.monotonic()
+
+        # (text, parse_mode, queued_at); when full the oldest post is dropped - counted,
+        # logged and exported (otp_channel_posts_dropped_total) next to the queue depth
+        self.queue: deque = deque(maxlen=max_queue)
+        self.ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {'queued': 0, 'sent': 0, 'failed': 0, 'dropped': 0}
+
+    def post(self, text: str, parse_mode: Optional[str] = 'Markdown'):
+        """Queue a post and return immediately (starts the sender on first use)"""
+        if len(self.queue) == self.queue.maxlen:
+            self.stats['dropped'] += 1
+            CHANNEL_POSTS_DROPPED.inc()
+            logger.warning(f"🗑️ Channel queue full ({self.queue.maxlen}), dropped oldest post "
+                           f"({self.stats['dropped']} dropped so far)")
+        self.queue.append((text, parse_mode, time.monotonic()))
+        self.stats['queued'] += 1
+        CHANNEL_QUEUE_DEPTH.set(len(self.queue))
+        self.ready.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        from telegram.error import RetryAfter
+
+        while True:
+            if not self.queue:
+                self.ready.clear()
+                await self.ready.wait()
+                continue
+
+            await self._take_token()
+            entry = self.queue[0]
+            text, parse_mode, queued_at = entry
+            try:
+                await self.delivery.send(self.chat_id, text, parse_mode=parse_mode, target='channel', flood_retries=0)
+            except RetryAfter as e:
+                # Same post again once the flood wait is over - never a plain text retry
+                wait = _retry_after_seconds(e)
+                TELEGRAM_SEND_RETRIES.inc(target='channel')
+                logger.warning(f"⏳ Channel flood limit, {len(self.queue)} posts queued, resuming in {wait:.1f}s")
+                await asyncio.sleep(wait)
+                continue
+            except Exception as e:
+                if parse_mode and self.queue and self.queue[0] is entry:
+                    logger.warning(f"⚠️ Markdown failed: {e}")
+                    TELEGRAM_SEND_RETRIES.inc(target='channel')
+                    self.queue[0] = (text, None, queued_at)
+                    continue
+                logger.error(f"❌ Channel send error: {e}")
+                self.stats['failed'] += 1
+            else:
+                self.stats['sent'] += 1
+                CHANNEL_QUEUE_DELAY.observe(time.monotonic() - queued_at)
+
+            # The entry may already be gone if the full queue dropped it meanwhile
+            if self.queue and self.queue[0] is entry:
+                self.queue.popleft()
+            CHANNEL_QUEUE_DEPTH.set(len(self.queue))
+
+    async def _take_token(self):
+        if self.rate <= 0:
+            return
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.tokens_at) * self.rate)
+        self.tokens_at = now
+        if self.tokens < 1:
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+            self.tokens, self.tokens_at = 1.0, time.monotonic()
+        self.tokens -= 1
+
+    async def close(self):
+        """Stop the sender; posts still queued are logged and counted as dropped"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.queue:
+            self.stats['dropped'] += len(self.queue)
+            CHANNEL_POSTS_DROPPED.inc(len(self.queue))
+            logger.warning(f"🗑️ Channel poster stopped with {len(self.queue)} posts unsent")
+            self.queue.clear()
+            CHANNEL_QUEUE_DEPTH.set(0)
+
+    @property
+    def pending(self) -> int:
+        """Posts queued and not yet sent"""
+        return len(self.queue)
+
+    def get_stats(self) -> dict:
+        return dict(self.stats, pending=self.pending)
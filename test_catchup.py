@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Catch-up regression test
+More new rows than one AJAX page holds must all be delivered: the monitor
+pages through the gap from the mark it had when the overflow was seen.
+Runs the requests monitor against the local mock panel.
+
+    python -m pytest -q test_catchup.py
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+os.environ.setdefault('TRACE_EXPORTER', 'none')
+os.environ.pop('BOT_TOKEN', None)
+
+from benchmark_monitor import DeliverySink
+from mock_panel import MockPanel
+from panel_accounts import PanelAccount
+
+BURST = 250
+
+
+async def _deliver_burst(baseline: int, timeout: float = 30.0) -> dict:
+    """Inject `baseline` rows, let the monitor see them, then BURST rows at once"""
+    os.environ['PANEL_STATE_FILE'] = os.path.join(tempfile.mkdtemp(prefix='otp-catchup-'), 'panel_state.json')
+    from simple_requests_otp_bot import SimpleRequestsOTPBot
+
+    panel = MockPanel(rate=0, seed=1).start()
+    sink = DeliverySink(panel)
+    account = PanelAccount('catchup-test', panel.base_url, panel.username, panel.password)
+    bot = SimpleRequestsOTPBot(account=account, number_bot=sink)
+    bot.post_to_channel = sink.post_to_channel
+    task = asyncio.create_task(bot.run())
+    try:
+        for _ in range(baseline):
+            panel.inject()
+        deadline = time.monotonic() + timeout
+        while len(sink.detected) < baseline and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+
+        for _ in range(BURST):
+            panel.inject()
+        expected = baseline + BURST
+        while len(sink.detected) < expected and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        panel.stop()
+
+    return {
+        'expected': len(panel.injected_at),
+        'delivered': len(sink.detected),
+        'duplicates': sink.duplicates,
+        'catchup_runs': bot.catchup_engine.runs,
+    }
+
+
+def test_overflowed_page_is_caught_up():
+    result = asyncio.run(_deliver_burst(baseline=5))
+    assert result['catchup_runs'] >= 1
+    assert result['delivered'] == result['expected'], result
+    assert result['duplicates'] == 0
+
+
+def test_overflow_without_a_mark_is_caught_up():
+    # Fresh state: the very first sweep already overflows
+    result = asyncio.run(_deliver_burst(baseline=0))
+    assert result['delivered'] == result['expected'], result
+    assert result['duplicates'] == 0
+
+
+if __name__ == "__main__":
+    test_overflowed_page_is_caught_up()
+    test_overflow_without_a_mark_is_caught_up()
+    print("✅ catch-up delivered every row")
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+OTP Tracing
+Per-OTP trace spans from the panel row timestamp to user delivery:
+fetch → parse → dedup → user routing → DB log → user send → channel enqueue.
+
+Each trace carries a correlation ID (trace_id) that follows the OTP across
+the message bus, and finished traces go to a pluggable exporter:
+TRACE_EXPORTER = none | log | jsonl | otlp (TRACE_FILE, OTLP_ENDPOINT).
+
+Panel timestamps carry no zone; PANEL_UTC_OFFSET (e.g. +05:30, -3) says
+which one the panel uses - unset means the host's local time.
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import urllib.request
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Trace of the OTP being handled by the current task/thread
+_current_trace: contextvars.ContextVar = contextvars.ContextVar('otp_trace', default=None)
+
+
+def new_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+class Span:
+    """One timed stage of an OTP's journey"""
+
+    def __init__(self, name: str, trace_id: str, start: float, end: Optional[float] = None,
+                 attributes: Optional[Dict] = None, parent_id: Optional[str] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = new_id()
+        self.parent_id = parent_id
+        self.start = start
+        self.end = end
+        self.attributes = attributes or {}
+        self.status = "ok"
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end or time.time()) - self.start) * 1000
+
+    def to_dict(self) -> Dict:
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start': self.start,
+            'end': self.end,
+            'duration_ms': round(self.duration_ms, 3),
+            'status': self.status,
+            'attributes': self.attributes,
+        }
+
+
+class Trace:
+    """Root span plus its stage spans"""
+
+    def __init__(self, name: str, trace_id: Optional[str] = None, start: Optional[float] = None,
+                 attributes: Optional[Dict] = None):
+        self.trace_id = trace_id or new_id()
+        self.root = Span(name, self.trace_id, start or time.time(), attributes=attributes)
+        self.spans: List[Span] = []
+
+    def add(self, name: str, start: float, end: float, attributes: Optional[Dict] = None) -> Span:
+        span = Span(name, self.trace_id, start, end, attributes, parent_id=self.root.span_id)
+        self.spans.append(span)
+        return span
+
+
+class NullExporter:
+    def export(self, trace: Trace):
+        pass
+
+    def shutdown(self):
+        pass
+
+
+class LogExporter:
+    """One log line per OTP with the per-stage breakdown"""
+
+    def export(self, trace: Trace):
+        stages = " ".join(f"{span.name}={span.duration_ms:.0f}ms" for span in trace.spans)
+        logger.info(f"🧭 [{trace.trace_id}] {trace.root.name} {trace.root.duration_ms:.0f}ms: {stages}")
+
+    def shutdown(self):
+        pass
+
+
+class JsonlExporter:
+    """Appends every span as one JSON line - written from a background thread, off the event loop"""
+
+    def __init__(self, path: str, flush_interval: float = 1.0, max_queue: int = 5000):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='jsonl-exporter', daemon=True)
+        self._thread.start()
+        # Spans still queued at exit are written out
+        atexit.register(self.shutdown)
+
+    def export(self, trace: Trace):
+        for span in [trace.root] + trace.spans:
+            try:
+                self.queue.put_nowait(span)
+            except queue.Full:
+                self.dropped += 1
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                spans = [self.queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            self._write(spans + self._drain())
+        self._write(self._drain())
+
+    def _drain(self) -> List[Span]:
+        spans = []
+        while True:
+            try:
+                spans.append(self.queue.get_nowait())
+            except queue.Empty:
+                return spans
+
+    def _write(self, spans: List[Span]):
+        if not spans:
+            return
+        lines = [json.dumps(span.to_dict(), default=str) for span in spans]
+        try:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write("\n".join(lines) + "\n")
+        except OSError as e:
+            logger.debug(f"JSONL trace export failed: {e}")
+
+    def shutdown(self):
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+
+class OtlpExporter:
+    """OTLP/HTTP JSON stand-in: batches spans and POSTs them from a background thread"""
+
+    def __init__(self, endpoint: str, service_name: str = 'otp-bot', batch_size: int = 50,
+                 flush_interval: float = 5.0, max_queue: int = 5000):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='otlp-exporter', daemon=True)
+        self._thread.start()
+
+    def export(self, trace: Trace):
+        for span in [trace.root] + trace.spans:
+            try:
+                self.queue.put_nowait(span)
+            except queue.Full:
+                self.dropped += 1
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and time.monotonic() < deadline:
+                try:
+                    batch.append(self.queue.get(timeout=max(0.05, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            if batch:
+                self._post(batch)
+
+    def _post(self, spans: List[Span]):
+        payload = {
+            'resourceSpans': [{
+                'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': self.service_name}}]},
+                'scopeSpans': [{
+                    'scope': {'name': 'otp-bot'},
+                    'spans': [self._otlp_span(span) for span in spans],
+                }],
+            }]
+        }
+        request = urllib.request.Request(
+            self.endpoint, data=json.dumps(payload).encode('utf-8'),
+            headers={'Content-Type': 'application/json'}, method='POST'
+        )
+        try:
+            urllib.request.urlopen(request, timeout=5).close()
+        except Exception as e:
+            logger.debug(f"OTLP export failed: {e}")
+
+    @staticmethod
+    def _otlp_span(span: Span) -> Dict:
+        return {
+            'traceId': span.trace_id.ljust(32, '0'),
+            'spanId': span.span_id,
+            'parentSpanId': span.parent_id or '',
+            'name': span.name,
+            'startTimeUnixNano': int(span.start * 1e9),
+            'endTimeUnixNano': int((span.end or span.start) * 1e9),
+            'attributes': [{'key': key, 'value': {'stringValue': str(value)}} for key, value in span.attributes.items()],
+        }
+
+    def shutdown(self):
+        self._stop.set()
+
+
+class Tracer:
+    """Starts traces, records stage spans and hands finished traces to the exporter"""
+
+    def __init__(self, exporter=None):
+        self.exporter = exporter or NullExporter()
+        self.enabled = not isinstance(self.exporter, NullExporter)
+
+    @contextmanager
+    def trace(self, name: str, trace_id: Optional[str] = None, start: Optional[float] = None, **attributes):
+        """Root span; stage spans opened inside attach to it (also across awaits)"""
+        trace = Trace(name, trace_id, start, attributes)
+        token = _current_trace.set(trace)
+        try:
+            yield trace
+        except Exception:
+            trace.root.status = "error"
+            raise
+        finally:
+            _current_trace.reset(token)
+            trace.root.end = time.time()
+            if self.enabled:
+                try:
+                    self.exporter.export(trace)
+                except Exception as e:
+                    logger.debug(f"Trace export failed: {e}")
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Time a stage of the current trace (no-op outside a trace)"""
+        trace = _current_trace.get()
+        start = time.time()
+        try:
+            yield
+        finally:
+            if trace is not None:
+                trace.add(name, start, time.time(), attributes)
+
+    def record(self, name: str, start: float, end: float, **attributes):
+        """Add a stage measured earlier (e.g. the poll that fetched the row)"""
+        trace = _current_trace.get()
+        if trace is not None and start and end:
+            trace.add(name, start, end, attributes)
+
+    def set_attribute(self, key: str, value):
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.root.attributes[key] = value
+
+    def current_trace_id(self) -> Optional[str]:
+        trace = _current_trace.get()
+        return trace.trace_id if trace else None
+
+
+def parse_utc_offset(value: Optional[str]) -> Optional[timezone]:
+    """'+05:30', '-3' or '5.5' (hours) → fixed timezone; None when unset or invalid"""
+    if not value:
+        return None
+    try:
+        value = value.strip()
+        sign = -1 if value.startswith('-') else 1
+        hours, _, minutes = value.lstrip('+-').partition(':')
+        offset = timedelta(hours=float(hours), minutes=float(minutes or 0))
+        return timezone(sign * offset)
+    except ValueError:
+        logger.warning(f"⚠️ Invalid PANEL_UTC_OFFSET: {value}")
+        return None
+
+
+# Zone the panel writes its timestamps in (None: host local time)
+PANEL_TIMEZONE = parse_utc_offset(os.getenv('PANEL_UTC_OFFSET'))
+
+
+def panel_now() -> datetime:
+    """Current time on the panel's clock (naive, like its row timestamps)"""
+    if PANEL_TIMEZONE is None:
+        return datetime.now()
+    return datetime.now(PANEL_TIMEZONE).replace(tzinfo=None)
+
+
+def panel_timestamp_to_epoch(timestamp: str) -> Optional[float]:
+    """Panel row timestamps are 'YYYY-MM-DD HH:MM:SS' in PANEL_TIMEZONE"""
+    try:
+        parsed = datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S')
+    except (TypeError, ValueError):
+        return None
+    if PANEL_TIMEZONE is not None:
+        parsed = parsed.replace(tzinfo=PANEL_TIMEZONE)
+    return parsed.timestamp()
+
+
+def exporter_from_env():
+    kind = os.getenv('TRACE_EXPORTER', 'log').lower()
+    if kind == 'jsonl':
+        return JsonlExporter(os.getenv('TRACE_FILE', 'otp_traces.jsonl'))
+    if kind == 'otlp':
+        return OtlpExporter(os.getenv('OTLP_ENDPOINT', 'http://127.0.0.1:4318/v1/traces'))
+    if kind == 'log':
+        return LogExporter()
+    return NullExporter()
+
+
+# Process-wide tracer
+TRACER = Tracer(exporter_from_env())
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Upload Worker
+Parses, validates, dedupes and indexes uploaded number files in a worker
+process - and checks them against the other countries' pools, the
+cooldown list and live assignments - so a 100k-row spreadsheet never
+holds the bot's event loop (or its GIL). Workers report rows read over a shared queue; the bot turns that
+into edits of the admin's status message.
+
+    processor = UploadProcessor()
+    parsed = await processor.parse(data, "Togo.xlsx", on_progress=lambda rows: ...)
+
+UPLOAD_WORKERS sets the pool size (default 1). If worker processes cannot
+be started the parse falls back to a thread.
+"""
+
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from number_index import NumberIndex, PoolCheck, check_pool
+from number_loader import read_numbers
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[int], Union[None, Awaitable[None]]]
+
+# Set in each worker process by _init_worker
+_progress_queue = None
+
+
+def _init_worker(progress_queue):
+    global _progress_queue
+    _progress_queue = progress_queue
+
+
+class ParsedUpload:
+    """Picklable outcome of parsing one file: the deduped index plus the validation counts"""
+
+    def __init__(self, filename: str, index: NumberIndex, rows: int, valid: int, invalid: int,
+                 invalid_samples: List[Tuple[int, str]], check: Optional[PoolCheck] = None):
+        self.filename = filename
+        self.index = index
+        self.rows = rows
+        self.valid = valid
+        self.invalid = invalid
+        self.invalid_samples = invalid_samples
+        self.check = check
+
+    @property
+    def duplicates(self) -> int:
+        return self.valid - len(self.index)
+
+
+def _check_against(index: NumberIndex, pools: Dict[str, Union[str, NumberIndex]], cooldown, assigned) -> PoolCheck:
+    """check_pool over the other countries' pools, given as index paths (mapped here) or indexes"""
+    others = {}
+    mapped = []
+    try:
+        for country, pool in pools.items():
+            if isinstance(pool, str):
+                pool = NumberIndex.open(pool)
+                if pool is None:
+                    continue
+                mapped.append(pool)
+            others[country] = pool
+        return check_pool(index, others, cooldown, assigned)
+    finally:
+        for pool in mapped:
+            pool.close()
+
+
+def parse_upload(job_id: int, data: bytes, filename: str, pools: Optional[Dict[str, Union[str, NumberIndex]]] = None,
+                 cooldown: Iterable[str] = (), assigned: Iterable[str] = ()) -> ParsedUpload:
+    """Runs in the worker: parse → validate → dedupe + sort (index) → check against the other pools"""
+    def progress(rows: int):
+        if _progress_queue is not None:
+            _progress_queue.put((job_id, rows))
+
+    result = read_numbers(data, filename, progress=progress)
+    index = NumberIndex.from_result(result)
+    check = _check_against(index, pools, cooldown, assigned) if pools is not None else None
+    return ParsedUpload(filename, index, rows=result.rows, valid=len(result.numbers), invalid=result.invalid,
+                        invalid_samples=result.invalid_samples[:5], check=check)
+
+
+class StatusMessage:
+    """One Telegram status message, edited in place - throttled, unchanged text skipped"""
+
+    def __init__(self, message, min_interval: float = 2.0):
+        self.message = message
+        self.min_interval = min_interval
+        self.text = None
+        self._last_edit = 0.0
+
+    async def update(self, text: str, force: bool = False):
+        """Progress edit - throttled unless forced, failures only logged"""
+        if text == self.text or (not force and time.monotonic() - self._last_edit < self.min_interval):
+            return
+        self.text = text
+        self._last_edit = time.monotonic()
+        try:
+            await self.message.edit_text(text, parse_mode='Markdown')
+        except Exception as e:
+            # Deleted message, flood wait, "message is not modified" - progress is best effort
+            logger.debug(f"Status edit skipped: {e}")
+
+    async def finish(self, text: str):
+        """Final outcome - always sent, as plain text if Telegram rejects the Markdown"""
+        from telegram.error import BadRequest
+
+        self.text = text
+        try:
+            await self.message.edit_text(text, parse_mode='Markdown')
+            return
+        except BadRequest as e:
+            # e.g. "Ivory_Coast" or an error text with '_' / '*' breaks the entities
+            logger.warning(f"⚠️ Upload result rejected as Markdown ({e}), sending as plain text")
+        except Exception as e:
+            logger.warning(f"⚠️ Upload result edit failed ({e}), retrying as plain text")
+        try:
+            await self.message.edit_text(text.replace('**', ''), parse_mode=None)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not deliver upload result: {e}")
+
+
+class UploadProcessor:
+    """Process pool for uploads plus the progress fan-in back to the event loop"""
+
+    def __init__(self, max_workers: Optional[int] = None, progress_interval: float = 0.5):
+        self.max_workers = max_workers or int(os.getenv('UPLOAD_WORKERS', '1'))
+        self.progress_interval = progress_interval
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._progress_queue = None
+        self._callbacks: Dict[int, ProgressCallback] = {}
+        self._progress_task: Optional[asyncio.Task] = None
+        self._job_ids = itertools.count(1)
+        self.stats = {'jobs': 0, 'failed': 0, 'thread_fallbacks': 0}
+
+    def _ensure_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: the bot process runs threads (HTTP clients, log listener) that fork would copy mid-state
+            context = multiprocessing.get_context('spawn')
+            self._progress_queue = context.Queue()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=context,
+                initializer=_init_worker, initargs=(self._progress_queue,),
+            )
+            logger.info(f"🧵 Upload worker pool started ({self.max_workers} process(es))")
+        return self._executor
+
+    async def _pump_progress(self):
+        """Deliver worker progress to the waiting jobs' callbacks"""
+        while self._callbacks:
+            try:
+                while True:
+                    job_id, rows = self._progress_queue.get_nowait()
+                    callback = self._callbacks.get(job_id)
+                    if callback is not None:
+                        outcome = callback(rows)
+                        if asyncio.iscoroutine(outcome):
+                            await outcome
+            except queue.Empty:
+                pass
+            except Exception as e:
+                logger.warning(f"⚠️ Upload progress error: {e}")
+            await asyncio.sleep(self.progress_interval)
+
+    async def parse(self, data: bytes, filename: str, on_progress: Optional[ProgressCallback] = None,
+                    pools: Optional[Dict[str, Union[str, NumberIndex]]] = None,
+                    cooldown: Set[str] = frozenset(), assigned: Set[str] = frozenset()) -> ParsedUpload:
+        """Parse one file off the event loop; raises what the parser raises (e.g. unsupported type)
+
+        With pools (other country -> index path or index) the result also carries a PoolCheck
+        against them, the cooldown numbers and the assigned numbers.
+        """
+        job_id = next(self._job_ids)
+        self.stats['jobs'] += 1
+        loop = asyncio.get_running_loop()
+        try:
+            executor = self._ensure_executor()
+            if on_progress is not None:
+                self._callbacks[job_id] = on_progress
+                if self._progress_task is None or self._progress_task.done():
+                    self._progress_task = asyncio.create_task(self._pump_progress())
+            try:
+                return await loop.run_in_executor(executor, parse_upload, job_id, data, filename, pools, cooldown, assigned)
+            except (BrokenProcessPool, OSError, RuntimeError) as e:
+                # No worker processes available (sandboxed host, pool died) - still keep it off the loop
+                logger.warning(f"⚠️ Upload worker unavailable ({e}), parsing in a thread")
+                self.stats['thread_fallbacks'] += 1
+                self._reset_executor()
+                return await asyncio.to_thread(parse_upload, job_id, data, filename, pools, cooldown, assigned)
+        except Exception:
+            self.stats['failed'] += 1
+            raise
+        finally:
+            self._callbacks.pop(job_id, None)
+
+    def _reset_executor(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def shutdown(self):
+        self._reset_executor()
+
+    def get_stats(self) -> dict:
+        return dict(self.stats, workers=self.max_workers, running=len(self._callbacks))